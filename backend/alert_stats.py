@@ -0,0 +1,140 @@
+import os
+from collections import Counter
+
+# How many rows of each table the statistics prompt shows; the rest is folded into "other".
+STATS_TOP_GROUPS = int(os.getenv("STATS_TOP_GROUPS", "15"))
+STATS_TOP_TITLES = int(os.getenv("STATS_TOP_TITLES", "10"))
+# Example alerts quoted after the statistics, one from each of the largest component/metric groups.
+STATS_SAMPLE_COUNT = int(os.getenv("STATS_SAMPLE_COUNT", "5"))
+PERCENTILES = (50, 90, 99)
+
+
+def _weighted_percentiles(pairs: list[tuple[float, int]], percentiles=PERCENTILES) -> dict:
+    """Nearest-rank percentiles of (value, weight) pairs."""
+    pairs = sorted(pair for pair in pairs if pair[1] > 0)
+    if not pairs:
+        return {}
+    total = sum(weight for _, weight in pairs)
+    result, cumulative, index = {}, 0, 0
+    for p in percentiles:
+        rank = max(1, -(-p * total // 100))  # ceil(p% of total), at least the first value
+        while cumulative + pairs[index][1] < rank:
+            cumulative += pairs[index][1]
+            index += 1
+        result[f"p{p}"] = pairs[index][0]
+    return result
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value  # not NaN
+
+
+def compute_alert_stats(summary_data: dict) -> dict:
+    """
+    Aggregates the alerts of a summary (as produced by format_summary_for_langgraph) in one pass.
+    A de-duplicated alert counts for all its occurrences; for value percentiles its repeats are
+    taken at the first occurrence's value, except one each at the recorded minimum and maximum.
+    Returns totals, per component/metric groups (count, value percentiles and range, noisy and
+    self-resolved ratios), status and impact-radius histograms, top titles and sample alerts.
+    """
+    groups: dict[tuple[str, str], dict] = {}
+    titles, statuses, impacts = Counter(), Counter(), Counter()
+    total = noisy = self_resolved = 0
+    first_seen = last_seen = None
+
+    for alert in summary_data.get("alerts", []):
+        occurrences = alert.get("occurrences") or {}
+        count = occurrences.get("count", 1)
+        node = alert.get("alert_node_analysis") or {}
+        key = (node.get("component") or "unknown", node.get("metric") or "unknown")
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"count": 0, "noisy": 0, "self_resolved": 0, "values": [], "min": None, "max": None, "sample": alert}
+        alert_noisy = occurrences.get("noisy_count", count if alert.get("is_noisy") else 0)
+        alert_self_resolved = occurrences.get("self_resolved_count", count if alert.get("is_self_resolved") else 0)
+        group["count"] += count
+        group["noisy"] += alert_noisy
+        group["self_resolved"] += alert_self_resolved
+        value = node.get("value")
+        if _is_number(value):
+            low = occurrences["value_min"] if _is_number(occurrences.get("value_min")) else value
+            high = occurrences["value_max"] if _is_number(occurrences.get("value_max")) else value
+            if count > 1:
+                # Only the range of the repeats is known: their extremes once each, the rest at the first value.
+                group["values"].extend(((low, 1), (high, 1), (value, count - 2)))
+            else:
+                group["values"].append((value, 1))
+            group["min"] = low if group["min"] is None else min(group["min"], low)
+            group["max"] = high if group["max"] is None else max(group["max"], high)
+
+        total += count
+        noisy += alert_noisy
+        self_resolved += alert_self_resolved
+        titles[alert.get("title", "N/A")] += count
+        statuses[alert.get("status", "N/A")] += count
+        impacts[(alert.get("graph_analysis") or {}).get("impact_radius") or "unknown"] += count
+        first = occurrences.get("first_seen", alert.get("created_date"))
+        last = occurrences.get("last_seen", alert.get("created_date"))
+        if first and (first_seen is None or first < first_seen):  # ISO timestamps compare as strings
+            first_seen = first
+        if last and (last_seen is None or last > last_seen):
+            last_seen = last
+
+    ranked = sorted(groups.items(), key=lambda item: -item[1]["count"])
+    group_rows = []
+    for (component, metric), group in ranked[:STATS_TOP_GROUPS]:
+        group_rows.append({
+            "component": component,
+            "metric": metric,
+            "count": group["count"],
+            "noisy_ratio": group["noisy"] / group["count"],
+            "self_resolved_ratio": group["self_resolved"] / group["count"],
+            "value_min": group["min"],
+            "value_max": group["max"],
+            **_weighted_percentiles(group["values"]),
+        })
+    other = ranked[STATS_TOP_GROUPS:]
+
+    return {
+        "total_alerts": total,
+        "distinct_alerts": len(summary_data.get("alerts", [])),
+        "first_seen": first_seen,
+        "last_seen": last_seen,
+        "noisy_ratio": noisy / total if total else 0.0,
+        "self_resolved_ratio": self_resolved / total if total else 0.0,
+        "groups": group_rows,
+        "other_groups": {"groups": len(other), "count": sum(group["count"] for _, group in other)},
+        "status_counts": dict(statuses.most_common()),
+        "impact_radius_counts": dict(impacts.most_common()),
+        "top_titles": titles.most_common(STATS_TOP_TITLES),
+        "samples": [group["sample"] for _, group in ranked[:STATS_SAMPLE_COUNT]],
+    }
+
+
+def _number(value) -> str:
+    return "n/a" if value is None else f"{value:g}"
+
+
+def format_alert_stats(stats: dict) -> str:
+    """The statistics as compact prompt text; its size depends on the STATS_* limits, not on the alert count."""
+    lines = [
+        f"Alerts: {stats['total_alerts']} ({stats['distinct_alerts']} distinct) from {stats['first_seen']} to {stats['last_seen']}",
+        f"Noisy: {stats['noisy_ratio']:.0%}, self-resolved: {stats['self_resolved_ratio']:.0%}",
+        "Status: " + ", ".join(f"{status} {count}" for status, count in stats["status_counts"].items()),
+        "Impact radius: " + ", ".join(f"{impact} {count}" for impact, count in stats["impact_radius_counts"].items()),
+        "",
+        "By component and metric (count | value p50 / p90 / p99, min-max | noisy | self-resolved):",
+    ]
+    for row in stats["groups"]:
+        lines.append(
+            f"- {row['component']} / {row['metric']}: {row['count']} | "
+            f"{_number(row.get('p50'))} / {_number(row.get('p90'))} / {_number(row.get('p99'))}, "
+            f"{_number(row['value_min'])}-{_number(row['value_max'])} | "
+            f"{row['noisy_ratio']:.0%} | {row['self_resolved_ratio']:.0%}"
+        )
+    if stats["other_groups"]["groups"]:
+        lines.append(f"- {stats['other_groups']['groups']} other component/metric pairs: {stats['other_groups']['count']} alerts")
+    lines.append("")
+    lines.append("Most frequent titles:")
+    lines.extend(f"- {title}: {count}" for title, count in stats["top_titles"])
+    return "\n".join(lines) + "\n"
@@ -1,189 +1,562 @@
 import os
-from flask import Flask, jsonify, request
+import json
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS # Import CORS
 from dotenv import load_dotenv
-from langgraph.checkpoint.memory import MemorySaver
 
 # Load environment variables
 load_dotenv()
 
 # Import graph definition (assuming graph.py is in the same directory or accessible)
-from graph import workflow, GraphState # Make sure graph.py is importable
+from graph import workflow, GraphState, get_compiled_graph, get_state_values, warm_up, llm_cache, build_retrospective_prompt, stream_llm, current_retrospective # Make sure graph.py is importable
+from tenancy import InvalidTenantKey, TENANT_HEADER, ThreadLocks, thread_id_for_request
+from retrospective_jobs import RetrospectiveJobQueue, retrospective_etag
+from summary_stats import SummaryStatsRegistry, entry_fields, entry_scope, scope_filters, scope_key
 
 app = Flask(__name__)
-CORS(app, origins=["http://localhost:5173"]) # Enable CORS for a specific origin
+CORS(app, origins=["http://localhost:5173"], expose_headers=["ETag", "X-Next-Cursor", "Link"]) # Enable CORS for a specific origin; ETag is read by the client for revalidation, X-Next-Cursor/Link for pagination
 
 # Configure Gemini API Key (ensure it's set in .env or environment)
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 if not gemini_api_key:
     raise ValueError("GEMINI_API_KEY not found in environment variables.")
 
-# Compile the graph with a checkpointer
-# MemorySaver is used here for simplicity. For production, use a persistent checkpointer.
-memory_saver = MemorySaver()
-app_graph = workflow.compile(checkpointer=memory_saver)
+# Compile the graphs once, up front, with the shared checkpointer from the graph registry.
+# By default that is the SQLite append-only checkpointer, so daily summaries survive restarts.
+warm_up()
+app_graph = get_compiled_graph("workflow")
+# Writes that depend on the thread's current state (e.g. appending entries at known positions) hold its lock.
+thread_locks = ThreadLocks()
 
-# Helper to get a unique config for each request or session
-# For now, we'll use a static thread_id for simplicity in demonstration.
-# In a real app, this should be dynamic (e.g., user ID, session ID).
-DEFAULT_THREAD_ID = "global_retro_thread"
+@app.errorhandler(InvalidTenantKey)
+def handle_invalid_tenant_key(e):
+    return jsonify({"error": str(e)}), 400
 
-def get_thread_config(thread_id: str = DEFAULT_THREAD_ID):
-    return {"configurable": {"thread_id": thread_id}}
+def get_request_thread_id() -> str:
+    """Returns the graph thread id for the current request's tenant key."""
+    return thread_id_for_request(request.headers, request.args)
+
+def get_thread_config(thread_id: str | None = None):
+    """Returns the graph config for `thread_id`, or for the current request's tenant if not given."""
+    return {"configurable": {"thread_id": thread_id or get_request_thread_id()}}
 
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
+@app.route('/api/llm_cache/stats', methods=['GET'])
+def llm_cache_stats():
+    if llm_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **llm_cache.stats()}), 200
+
 @app.route('/api/submit_daily', methods=['POST'])
 def submit_daily_summary():
     data = request.json
     if not data or "text" not in data:
         return jsonify({"error": "Missing 'text' in request body"}), 400
 
-    daily_entry = {"text": data["text"]} #
-    # Potentially add other fields like date, author, etc. from data if needed by graph state
+    try:
+        # Optional date, type, tags and duration_minutes feed the /api/stats counters
+        daily_entry = {"text": data["text"], **entry_fields(data)}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    config = get_thread_config() # Using default thread for now
+    config = get_thread_config() # Thread of the request's tenant
 
     try:
-        # The input to invoke for "add_summary_entry" node should match its expected input key.
-        # In graph.py, the lambda is `lambda state, new_summary_input: ...`
-        # So, the key in the invoke payload should be "new_summary_input".
-        app_graph.invoke({"new_summary_input": daily_entry}, config)
-        current_state = app_graph.get_state(config)
+        # The "add_summary_entry" node reads its input from the "new_summary_input" state key.
+        thread_id = config["configurable"]["thread_id"]
+        with thread_locks(thread_id): # No other write in between (see save_retrospective)
+            # The entry's position comes from the state this write produced, not from a later read.
+            written = app_graph.invoke({"new_summary_input": daily_entry}, config)
+            summary_count = len(written.get("daily_summaries", []))
+            summary_stats.record(thread_id, [daily_entry], summary_count - 1)
         return jsonify({
             "message": "Daily summary submitted successfully.",
-            "current_summary_count": len(current_state.values.get("daily_summaries", [])) if current_state else 0
+            "current_summary_count": summary_count
         }), 200
     except Exception as e:
         return jsonify({"error": f"Failed to process daily summary: {str(e)}"}), 500
 
+# Upper bound on entries accepted by one batch request
+MAX_BATCH_ENTRIES = int(os.getenv("MAX_BATCH_ENTRIES", "50000"))
+
+def iter_batch_items():
+    """
+    Yields the raw items of a batch request body: a JSON array, {"entries": [...]}, or
+    NDJSON (Content-Type application/x-ndjson), which is read line by line from the stream.
+    Lines that are not valid JSON are yielded as ValueError instances.
+    """
+    if request.mimetype in ("application/x-ndjson", "application/jsonl", "application/json-seq"):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Invalid JSON line: {e}")
+        return
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("entries")
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of entries, {\"entries\": [...]}, or an NDJSON body.")
+    yield from data
+
+@app.route('/api/submit_daily/batch', methods=['POST'])
+def submit_daily_summaries_batch():
+    """Appends many daily summaries in a single state update and reports a result per item."""
+    config = get_thread_config() # Thread of the request's tenant
+
+    accepted = []
+    results = []
+    try:
+        for index, item in enumerate(iter_batch_items()):
+            if index >= MAX_BATCH_ENTRIES:
+                return jsonify({"error": f"Batch exceeds the limit of {MAX_BATCH_ENTRIES} entries."}), 413
+            if isinstance(item, ValueError):
+                results.append({"index": index, "status": "rejected", "error": str(item)})
+            elif not isinstance(item, dict) or not isinstance(item.get("text"), str):
+                results.append({"index": index, "status": "rejected", "error": "Missing 'text' in entry"})
+            else:
+                try:
+                    entry = {"text": item["text"], **entry_fields(item)}
+                except ValueError as e:
+                    results.append({"index": index, "status": "rejected", "error": str(e)})
+                    continue
+                results.append({"index": index, "status": "accepted"})
+                accepted.append(entry)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    thread_id = config["configurable"]["thread_id"]
+    try:
+        # Serialized with the thread's other writes, so no entry is appended between reading the
+        # state and writing the batch (which would fork the checkpoint and drop one of them).
+        with thread_locks(thread_id):
+            if accepted:
+                # One checkpoint for the whole batch; the daily_summaries reducer appends the entries.
+                written_config = app_graph.update_state(config, {"daily_summaries": accepted, "summaries_version": len(accepted)},
+                                                        as_node="add_summary_entry")
+                # Positions come from the checkpoint this write created.
+                written_state = app_graph.get_state(written_config)
+                start_count = len(written_state.values.get("daily_summaries", [])) - len(accepted)
+                summary_stats.record(thread_id, accepted, start_count)
+            else:
+                current_state = app_graph.get_state(config)
+                start_count = len(current_state.values.get("daily_summaries", [])) if current_state else 0
+    except Exception as e:
+        return jsonify({"error": f"Failed to process daily summaries: {str(e)}"}), 500
+
+    position = start_count
+    for result in results:
+        if result["status"] == "accepted":
+            result["position"] = position # Index of the entry in the thread's daily_summaries
+            position += 1
+    return jsonify({
+        "message": f"Accepted {len(accepted)} of {len(results)} daily summaries.",
+        "accepted_count": len(accepted),
+        "rejected_count": len(results) - len(accepted),
+        "current_summary_count": position,
+        "results": results,
+    }), 200
+
+# Counters behind /api/stats, per thread; rebuilt from the stored daily summaries when missing.
+summary_stats = SummaryStatsRegistry()
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """
+    Statistics of the tenant's daily entries in the shape of StatisticalInsightsData (types.ts):
+    top tags, item counts by type, the last `days` days (default 7) by type and oncall load by tag.
+    """
+    config = get_thread_config() # Thread of the request's tenant
+    try:
+        # Only summaries_version is read; the daily summaries are loaded only if the counters lag behind it.
+        stored_count = get_state_values(config, ["summaries_version"]).get("summaries_version", 0)
+        stats = summary_stats.get(config["configurable"]["thread_id"], stored_count,
+                                  lambda: get_state_values(config, ["daily_summaries"]).get("daily_summaries", []))
+        return jsonify(stats.to_dict(top_tags=request.args.get("top", default=5, type=int),
+                                     trend_days=min(max(request.args.get("days", default=7, type=int), 1), 366))), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to compute statistics: {str(e)}"}), 500
+
+# Retrospectives are generated by background jobs. Concurrent requests for the same thread and
+# state version (number of daily summaries) join the job already in flight, so N simultaneous
+# viewers cost one LLM generation.
+retrospective_jobs = RetrospectiveJobQueue()
+# How long GET /api/retrospective waits for its job before answering 202 with the job to poll.
+RETROSPECTIVE_WAIT_SECONDS = float(os.getenv("RETROSPECTIVE_WAIT_SECONDS", "120"))
+NO_SUMMARIES_RESPONSE = {"summary": "No daily summaries available to generate a retrospective.", "details": []}
+
+def generate_retrospective(config: dict, state_values: dict) -> dict:
+    """
+    Runs on a job worker: summarizes `state_values` and saves the retrospective to the thread's state
+    (unless daily summaries were added meanwhile, see save_retrospective).
+    """
+    from graph import summarize_daily_entries_node
+
+    summary_output = summarize_daily_entries_node(state_values)
+    if summary_output.get("error"):
+        raise RuntimeError(summary_output["error"])
+
+    # partial_summaries carries the block summaries computed so far, so the next request only summarizes new blocks,
+    # and retrospective_version lets later requests reuse the retrospective until new summaries arrive.
+    save_retrospective(config, state_values.get("summaries_version", 0),
+                       {key: summary_output[key] for key in RETROSPECTIVE_STATE_KEYS if key in summary_output})
+    return retrospective_result(state_values, summary_output.get("retrospective_summary"))
+
+# Graph state written back after generating a retrospective
+RETROSPECTIVE_STATE_KEYS = ("retrospective_summary", "retrospective_version", "partial_summaries")
+
+def save_retrospective(config: dict, version, values: dict) -> bool:
+    """
+    Saves a retrospective generated from state version `version` to the thread's state, unless daily
+    summaries were added since. A job for an older version that finishes late would otherwise
+    overwrite the newer retrospective and partial summaries. Returns whether it was saved.
+    """
+    with thread_locks(config["configurable"]["thread_id"]):
+        if get_state_values(config, ["summaries_version"]).get("summaries_version", 0) != version:
+            return False
+        app_graph.update_state(config, values)
+        return True
+
+def retrospective_result(state_values: dict, summary: str) -> dict:
+    return {
+        "summary": summary,
+        "source_summary_count": len(state_values.get("daily_summaries", [])),
+        "version": state_values.get("summaries_version", 0),
+    }
+
+def retrospective_response(result: dict):
+    """
+    JSON response for a retrospective result with an ETag for its thread and version,
+    or an empty 304 if the request's If-None-Match already names that ETag.
+    """
+    etag = retrospective_etag(get_request_thread_id(), result["version"], result["summary"])
+    response = Response(status=304) if request.if_none_match.contains(etag) else jsonify(result)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache" # Always revalidate; a 304 costs no generation
+    response.vary.add(TENANT_HEADER)
+    return response
+
+def start_retrospective_job(config: dict, state_values: dict):
+    """Returns (job, created) for generating the retrospective of `state_values`, the thread's current state."""
+    version = state_values.get("summaries_version", 0)
+    return retrospective_jobs.submit(config["configurable"]["thread_id"], version,
+                                     lambda: generate_retrospective(config, state_values))
+
+def generate_scoped_retrospective(entries: list[dict], version: str, scope: dict) -> dict:
+    """Runs on a job worker: summarizes the daily entries of a window/tags scope. Nothing is saved to the thread's state."""
+    from graph import summarize_daily_entries_node
+
+    summary_output = summarize_daily_entries_node({"daily_summaries": entries})
+    if summary_output.get("error"):
+        raise RuntimeError(summary_output["error"])
+    return {"summary": summary_output.get("retrospective_summary"), "source_summary_count": len(entries),
+            "version": version, "scope": scope}
+
+def scoped_retrospective(config: dict, state_values: dict, scope: dict):
+    """
+    Retrospective of the entries dated within the scope's window and tagged with its tags.
+    They are selected through the thread's entry index, so only the matching entries are read.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    entries = state_values.get("daily_summaries", [])
+    stats = summary_stats.get(thread_id, state_values.get("summaries_version", 0), lambda: entries)
+    entries = stats.index.items(**scope_filters(scope))
+    if not entries:
+        return jsonify({**NO_SUMMARIES_RESPONSE, "summary": "No daily summaries match the requested dates and tags.", "scope": scope}), 200
+    version = f"{state_values.get('summaries_version', 0)}-{scope_key(scope)}"
+    job, _ = retrospective_jobs.submit(thread_id, version, lambda: generate_scoped_retrospective(entries, version, scope))
+    try:
+        return retrospective_response(job.result(timeout=RETROSPECTIVE_WAIT_SECONDS))
+    except TimeoutError:
+        return jsonify(job.to_dict()), 202
+
 @app.route('/api/retrospective', methods=['GET']) # Changed to GET for simplicity, could be POST if params are complex
 def get_retrospective():
-    config = get_thread_config() # Using default thread
+    """
+    Returns the stored retrospective if it is current, otherwise generates it (or joins the
+    generation in flight) and waits for it. Supports If-None-Match revalidation.
+    With `start`, `end` and/or `tags` (see entry_scope), summarizes only the matching entries.
+    """
+    config = get_thread_config() # Thread of the request's tenant
+    try:
+        scope = entry_scope(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     try:
-        # Ensure the graph state exists for the thread
         current_state = app_graph.get_state(config)
-        if not current_state or not current_state.values.get("daily_summaries"):
-            return jsonify({"summary": "No daily summaries available to generate a retrospective.", "details": []}), 200
-
-        # Invoke the 'generate_retrospective_summary' node.
-        # This node reads from the current state.
-        # Note: The 'invoke' method on a compiled graph usually starts from the graph's entry point.
-        # If 'generate_retrospective_summary' is not an entry point or reachable from one based on current state,
-        # this might not work as expected without further graph structure (e.g. conditional edges).
-        # A more direct way if the graph isn't set up with complex routing for this:
-        # result_state = summarize_daily_entries_node(current_state.values) # Calling the node function directly
-
-        # However, to use the compiled graph properly with state:
-        # We need to ensure the graph can transition to 'generate_retrospective_summary'.
-        # For simplicity, if our graph is just a collection of nodes and Flask decides which to call,
-        # we might need a way to update the state after calling a specific node function.
-        # The current graph definition in graph.py does not link 'add_summary_entry' to 'generate_retrospective_summary'.
-        # They are treated as separate callable units.
-
-        # Let's try to invoke the specific node via the graph, assuming it can be targeted.
-        # LangGraph's `invoke` typically requires sending inputs that might trigger transitions.
-        # If 'generate_retrospective_summary' is a standalone node we want to run on current state:
-
-        # Option 1: Update graph to have an edge or entry point for summarization.
-        # (This would be a change in graph.py)
-
-        # Option 2: Call the node function directly with the current state if the graph object allows it.
-        # (Not standard for `app_graph.invoke` which usually takes inputs for the *start* of the graph or a runnable.)
-
-        # Option 3: Use `app_graph.update_state` and then `app_graph.invoke` if the node is reachable.
-        # Or, more simply, if the node just needs the state, we can call the underlying node function.
-
-        # Let's assume `summarize_daily_entries_node` (the function itself) can be called with the current state values.
-        # This bypasses invoking it *through* the graph's compiled execution path for this specific call,
-        # but uses the state managed by the graph's checkpointer.
-        from graph import summarize_daily_entries_node # Import the function directly for this
-
-        summary_output = summarize_daily_entries_node(current_state.values)
-
-        # Update the state with the new summary (if the node doesn't do it implicitly via graph execution)
-        # The node itself returns the new state components.
-        if summary_output.get("error"):
-             return jsonify({"error": summary_output["error"]}), 500
-
-        # To persist this change back into the graph's state:
-        app_graph.update_state(config, {"retrospective_summary": summary_output.get("retrospective_summary")})
-
-        return jsonify({
-            "summary": summary_output.get("retrospective_summary"),
-            "source_summary_count": len(current_state.values.get("daily_summaries", []))
-        }), 200
-
+        state_values = current_state.values if current_state else {}
+        if not state_values.get("daily_summaries"):
+            return jsonify(NO_SUMMARIES_RESPONSE), 200
+        if scope is not None:
+            return scoped_retrospective(config, state_values, scope)
+        cached = current_retrospective(state_values)
+        if cached is not None:
+            return retrospective_response(retrospective_result(state_values, cached))
+
+        job, _ = start_retrospective_job(config, state_values)
+        try:
+            return retrospective_response(job.result(timeout=RETROSPECTIVE_WAIT_SECONDS))
+        except TimeoutError:
+            return jsonify(job.to_dict()), 202 # Still running; poll /api/retrospective/jobs/<job_id>
     except Exception as e:
         print(f"Error in /api/retrospective: {e}")
         return jsonify({"error": f"Failed to generate retrospective: {str(e)}"}), 500
 
-if __name__ == '__main__':
-    # Make sure to set FLASK_APP=app.py (or your filename) in your environment
-    # And FLASK_DEBUG=1 for development mode
-    app.run(debug=True, port=5000) # Default Flask port is 5000
-
+@app.route('/api/retrospective/jobs', methods=['POST'])
+def create_retrospective_job():
+    """Starts (or joins) a background retrospective job and returns it without waiting."""
+    config = get_thread_config() # Thread of the request's tenant
+    try:
+        current_state = app_graph.get_state(config)
+        state_values = current_state.values if current_state else {}
+        if not state_values.get("daily_summaries"):
+            return jsonify({"job_id": None, "status": "succeeded", "result": NO_SUMMARIES_RESPONSE}), 200
+        cached = current_retrospective(state_values)
+        if cached is not None: # Nothing to generate
+            return jsonify({"job_id": None, "status": "succeeded", "result": retrospective_result(state_values, cached)}), 200
+        job, created = start_retrospective_job(config, state_values)
+    except Exception as e:
+        return jsonify({"error": f"Failed to start retrospective job: {str(e)}"}), 500
+    return jsonify({**job.to_dict(), "coalesced": not created}), 202
+
+@app.route('/api/retrospective/jobs/<job_id>', methods=['GET'])
+def get_retrospective_job(job_id):
+    """Returns a job's status and, once finished, its result or error. `?wait=<seconds>` blocks until it finishes."""
+    job = retrospective_jobs.get(job_id)
+    if job is None or job.thread_id != get_request_thread_id():
+        return jsonify({"error": "Unknown retrospective job."}), 404
+    wait = min(request.args.get("wait", default=0, type=float), RETROSPECTIVE_WAIT_SECONDS)
+    if wait > 0:
+        try:
+            job.result(timeout=wait)
+        except Exception:
+            pass # Timed out or failed; the status below says which
+    return jsonify(job.to_dict()), 200
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/retrospective/stream', methods=['GET'])
+def stream_retrospective():
+    """
+    Streams the retrospective as server-sent events:
+    - "start" immediately, then one "token" event per chunk of LLM output ({"text": ...}),
+    - "done" with the full summary once it has been saved to graph state, or "error".
+    """
+    config = get_thread_config() # Thread of the request's tenant
+
+    def generate():
+        yield format_sse("start", {}) # Sent before any LLM work so the client gets its first byte right away
+        try:
+            current_state = app_graph.get_state(config)
+            summaries = current_state.values.get("daily_summaries", []) if current_state else []
+            if not summaries:
+                yield format_sse("done", {"summary": "No daily summaries available to generate a retrospective.", "source_summary_count": 0})
+                return
+
+            state_values = current_state.values
+            version = state_values.get("summaries_version", 0)
+            cached = current_retrospective(state_values)
+            if cached is not None: # Still current: send it as a single token without touching the LLM
+                yield format_sse("token", {"text": cached})
+                yield format_sse("done", retrospective_result(state_values, cached))
+                return
+
+            prompt, message, partials = build_retrospective_prompt(summaries, state_values.get("partial_summaries"))
+            if prompt is None:
+                summary = message
+                yield format_sse("token", {"text": summary})
+            else:
+                parts = []
+                for text in stream_llm(prompt):
+                    parts.append(text)
+                    yield format_sse("token", {"text": text})
+                summary = "".join(parts)
+
+            save_retrospective(config, version, {"retrospective_summary": summary, "retrospective_version": version, "partial_summaries": partials})
+            yield format_sse("done", retrospective_result(state_values, summary))
+        except Exception as e:
+            print(f"Error in /api/retrospective/stream: {e}")
+            yield format_sse("error", {"error": f"Failed to generate retrospective: {str(e)}"})
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 # --- Mock Data Endpoints ---
 import random # Added random import
+import bisect
+import threading
 from datetime import datetime, timedelta
-from .mock_data_generator import generate_mock_daily_summary, generate_mock_retrospective_summary, generate_mock_daily_summary_item # Added item generator for tags
+from urllib.parse import urlencode
+from mock_data_generator import generate_mock_daily_summary, generate_mock_retrospective_summary, generate_mock_daily_summary_item # Added item generator for tags
+from tag_index import TagIndex
+from response_cache import ResponseCache
 
 # Store generated mock data in memory for consistent responses across calls during a session
 # In a real scenario with a DB, this wouldn't be needed or would be handled differently.
-MOCK_DAILY_SUMMARIES_CACHE = []
+MOCK_DAILY_SUMMARIES_CACHE = [] # Kept sorted by date, so date ranges are found by binary search
 MOCK_RETROSPECTIVE_SUMMARIES_CACHE = []
+MOCK_RETROSPECTIVE_POSITIONS = {} # id -> position in MOCK_RETROSPECTIVE_SUMMARIES_CACHE, for `after` cursors
+# Tag/day index over the items of MOCK_DAILY_SUMMARIES_CACHE, updated as daily summaries are added
+MOCK_TAG_INDEX = TagIndex()
+# Serialized (and gzipped) pages of the mock endpoints; invalidated whenever the mock caches change
+MOCK_RESPONSE_CACHE = ResponseCache()
+MOCK_CACHE_LOCK = threading.Lock()
 CACHE_INITIALIZED = False
+# Largest page a paginated request gets
+MAX_PAGE_LIMIT = int(os.getenv("MAX_PAGE_LIMIT", "1000"))
+
+def add_mock_daily_summary(daily_summary: dict):
+    """Inserts a daily summary into MOCK_DAILY_SUMMARIES_CACHE in date order and indexes its items."""
+    bisect.insort(MOCK_DAILY_SUMMARIES_CACHE, daily_summary, key=lambda ds: ds["date"])
+    MOCK_TAG_INDEX.add_daily_summary(daily_summary)
+    MOCK_RESPONSE_CACHE.invalidate()
+
+def add_mock_retrospective_summary(retrospective: dict):
+    """Appends a retrospective summary; they are listed in the order they were added."""
+    MOCK_RETROSPECTIVE_POSITIONS[retrospective["id"]] = len(MOCK_RETROSPECTIVE_SUMMARIES_CACHE)
+    MOCK_RETROSPECTIVE_SUMMARIES_CACHE.append(retrospective)
+    MOCK_RESPONSE_CACHE.invalidate()
+
+def mock_daily_summaries_between(start: str | None, end: str | None) -> list:
+    """Daily summaries dated from `start` to `end` inclusive (either may be None), by binary search."""
+    lo = bisect.bisect_left(MOCK_DAILY_SUMMARIES_CACHE, start, key=lambda ds: ds["date"]) if start else 0
+    hi = bisect.bisect_right(MOCK_DAILY_SUMMARIES_CACHE, end, key=lambda ds: ds["date"]) if end else len(MOCK_DAILY_SUMMARIES_CACHE)
+    return MOCK_DAILY_SUMMARIES_CACHE[lo:hi]
 
 def initialize_mock_cache():
-    global MOCK_DAILY_SUMMARIES_CACHE, MOCK_RETROSPECTIVE_SUMMARIES_CACHE, CACHE_INITIALIZED
-    if CACHE_INITIALIZED:
-        return
+    global CACHE_INITIALIZED
+    with MOCK_CACHE_LOCK:
+        if not CACHE_INITIALIZED:
+            generate_mock_cache()
+            CACHE_INITIALIZED = True
+
+def generate_mock_cache():
 
     # Generate some daily summaries for the past 7 days
     start_date = datetime.now() - timedelta(days=6)
     for i in range(7):
         current_date = (start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-        MOCK_DAILY_SUMMARIES_CACHE.append(generate_mock_daily_summary(current_date, num_items=random.randint(3, 8)))
+        add_mock_daily_summary(generate_mock_daily_summary(current_date, num_items=random.randint(3, 8)))
 
-    # Generate a few retrospective summaries based on the daily ones
+    # Generate a few retrospective summaries based on the daily ones (looked up through MOCK_TAG_INDEX)
     if len(MOCK_DAILY_SUMMARIES_CACHE) >= 3:
         # Retro 1: last 3 days, random 2 tags
         retro_start_1 = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
         retro_end_1 = (datetime.now() - timedelta(days=0)).strftime("%Y-%m-%d")
-        relevant_daily_1 = [ds for ds in MOCK_DAILY_SUMMARIES_CACHE if retro_start_1 <= ds["date"] <= retro_end_1]
+        relevant_daily_1 = mock_daily_summaries_between(retro_start_1, retro_end_1)
         if relevant_daily_1:
             tags_1 = random.sample(generate_mock_daily_summary_item()["tags"], k=min(2, len(generate_mock_daily_summary_item()["tags"]))) # Use tags from generator
-            MOCK_RETROSPECTIVE_SUMMARIES_CACHE.append(
-                generate_mock_retrospective_summary(relevant_daily_1, tags_1, retro_start_1, retro_end_1)
+            add_mock_retrospective_summary(
+                generate_mock_retrospective_summary(None, tags_1, retro_start_1, retro_end_1, index=MOCK_TAG_INDEX)
             )
 
     if len(MOCK_DAILY_SUMMARIES_CACHE) >= 5:
         # Retro 2: 5 days ago to 3 days ago, specific tags
         retro_start_2 = (datetime.now() - timedelta(days=4)).strftime("%Y-%m-%d")
         retro_end_2 = (datetime.now() - timedelta(days=2)).strftime("%Y-%m-%d")
-        relevant_daily_2 = [ds for ds in MOCK_DAILY_SUMMARIES_CACHE if retro_start_2 <= ds["date"] <= retro_end_2]
+        relevant_daily_2 = mock_daily_summaries_between(retro_start_2, retro_end_2)
         if relevant_daily_2:
             tags_2 = ["Database", "Performance"] # Example specific tags
-            MOCK_RETROSPECTIVE_SUMMARIES_CACHE.append(
-                generate_mock_retrospective_summary(relevant_daily_2, tags_2, retro_start_2, retro_end_2)
+            add_mock_retrospective_summary(
+                generate_mock_retrospective_summary(None, tags_2, retro_start_2, retro_end_2, index=MOCK_TAG_INDEX)
             )
-    CACHE_INITIALIZED = True
 
 
+def page_limit() -> int | None:
+    """
+    The `limit` of a paginated request, 1..MAX_PAGE_LIMIT, or the older `count` (the first `count` items),
+    0..MAX_PAGE_LIMIT; None for everything.
+    """
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        return min(max(limit, 1), MAX_PAGE_LIMIT)
+    count = request.args.get('count', type=int)
+    return None if count is None else min(max(count, 0), MAX_PAGE_LIMIT)
+
+def paginate(items: list, start: int, limit: int | None, cursor_of) -> tuple[list, dict]:
+    """
+    The page of `items` from position `start` and its headers: X-Next-Cursor and a Link to the
+    next page when there is one. `cursor_of(item)` is the `after` value that continues past `item`.
+    """
+    page = items[start:start + limit] if limit is not None else items[start:]
+    headers = {}
+    if page and limit is not None and start + limit < len(items):
+        next_cursor = cursor_of(page[-1])
+        args = request.args.to_dict()
+        args.update(after=next_cursor, limit=limit)
+        args.pop('count', None)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return page, headers
+
+def cached_page_response(build):
+    """
+    The serialized page for this request from MOCK_RESPONSE_CACHE (built by `build()` on a miss),
+    gzip-encoded if the client accepts it, or an empty 304 if If-None-Match names its ETag.
+    """
+    key = (request.path, tuple(sorted(request.args.items(multi=True))))
+    cached = MOCK_RESPONSE_CACHE.get(key, build)
+    if request.if_none_match.contains(cached.etag):
+        response = Response(status=304)
+    elif cached.gzipped is not None and request.accept_encodings["gzip"]:
+        response = Response(cached.gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(cached.body, mimetype="application/json")
+    response.set_etag(cached.etag)
+    response.headers.update(cached.headers)
+    response.vary.add("Accept-Encoding")
+    return response
+
 @app.route('/api/mock/daily_summaries', methods=['GET'])
 def get_mock_daily_summaries():
+    """
+    Daily summaries in date order, optionally limited to `start`..`end` and to items with `tags`
+    (see entry_scope). Paginated with `limit` and `after` (the date of the previous page's last summary).
+    """
     initialize_mock_cache()
-    # Allow specifying number of summaries, default to all cached
-    count = request.args.get('count', default=len(MOCK_DAILY_SUMMARIES_CACHE), type=int)
-    return jsonify(MOCK_DAILY_SUMMARIES_CACHE[:count])
+    try:
+        scope = entry_scope(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build():
+        if scope is None:
+            summaries = MOCK_DAILY_SUMMARIES_CACHE
+        elif not scope["tags"]:
+            summaries = mock_daily_summaries_between(scope["start"], scope["end"])
+        else: # Only the days with matching items, each with just those items
+            summaries = [{"date": day, "items": items} for day, items in MOCK_TAG_INDEX.items_by_day(**scope_filters(scope)).items()]
+        after = request.args.get('after')
+        start = bisect.bisect_right(summaries, after, key=lambda ds: ds["date"]) if after else 0
+        return paginate(summaries, start, page_limit(), lambda ds: ds["date"])
+
+    return cached_page_response(build)
 
 @app.route('/api/mock/retrospective_summaries', methods=['GET'])
 def get_mock_retrospective_summaries():
+    """Retrospective summaries in the order they were added. Paginated with `limit` and `after` (a summary id)."""
     initialize_mock_cache()
-    # Allow specifying number of summaries, default to all cached
-    count = request.args.get('count', default=len(MOCK_RETROSPECTIVE_SUMMARIES_CACHE), type=int)
-    return jsonify(MOCK_RETROSPECTIVE_SUMMARIES_CACHE[:count])
+    after = request.args.get('after')
+    if after and after not in MOCK_RETROSPECTIVE_POSITIONS:
+        return jsonify({"error": "Unknown 'after' cursor."}), 400
+
+    def build():
+        start = MOCK_RETROSPECTIVE_POSITIONS[after] + 1 if after else 0
+        return paginate(MOCK_RETROSPECTIVE_SUMMARIES_CACHE, start, page_limit(), lambda retro: retro["id"])
+
+    return cached_page_response(build)
+
+
+if __name__ == '__main__':
+    # Make sure to set FLASK_APP=app.py (or your filename) in your environment
+    # And FLASK_DEBUG=1 for development mode
+    app.run(debug=True, port=5000) # Default Flask port is 5000
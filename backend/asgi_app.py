@@ -0,0 +1,268 @@
+"""
+ASGI version of the retrospective API (app.py), built on Quart.
+
+The LLM-bound endpoints await the graph nodes' async variants instead of blocking a worker
+thread, so one process can serve many concurrent retrospective requests. Run with:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import os
+import json
+import asyncio
+from quart import Quart, Response, jsonify, request
+from quart_cors import cors
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from graph import get_compiled_graph, get_state_values, aget_state_values, warm_up, llm_cache, abuild_retrospective_prompt, asummarize_daily_entries_node, astream_llm, current_retrospective
+from tenancy import InvalidTenantKey, TENANT_HEADER, ThreadLocks, thread_id_for_request
+from retrospective_jobs import RetrospectiveJobQueue, retrospective_etag
+from summary_stats import SummaryStatsRegistry, entry_fields, entry_scope, scope_filters, scope_key
+
+app = Quart(__name__)
+app = cors(app, allow_origin="http://localhost:5173", expose_headers=["ETag"])
+
+gemini_api_key = os.getenv("GEMINI_API_KEY")
+if not gemini_api_key:
+    raise ValueError("GEMINI_API_KEY not found in environment variables.")
+
+# Same compiled graphs and checkpointer as the Flask app.
+warm_up()
+app_graph = get_compiled_graph("workflow")
+# Writes that depend on the thread's current state hold its lock, as in app.py.
+thread_locks = ThreadLocks(factory=asyncio.Lock)
+
+@app.errorhandler(InvalidTenantKey)
+async def handle_invalid_tenant_key(e):
+    return jsonify({"error": str(e)}), 400
+
+def get_thread_config(thread_id: str | None = None):
+    """Returns the graph config for `thread_id`, or for the current request's tenant if not given."""
+    return {"configurable": {"thread_id": thread_id or thread_id_for_request(request.headers, request.args)}}
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    return jsonify({"status": "healthy"}), 200
+
+@app.route('/api/llm_cache/stats', methods=['GET'])
+async def llm_cache_stats():
+    if llm_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **(await asyncio.to_thread(llm_cache.stats))}), 200
+
+@app.route('/api/submit_daily', methods=['POST'])
+async def submit_daily_summary():
+    data = await request.get_json(silent=True)
+    if not data or "text" not in data:
+        return jsonify({"error": "Missing 'text' in request body"}), 400
+
+    try:
+        daily_entry = {"text": data["text"], **entry_fields(data)}
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    config = get_thread_config()
+    try:
+        thread_id = config["configurable"]["thread_id"]
+        async with thread_locks(thread_id):
+            written = await app_graph.ainvoke({"new_summary_input": daily_entry}, config)
+            summary_count = len(written.get("daily_summaries", []))
+            summary_stats.record(thread_id, [daily_entry], summary_count - 1)
+        return jsonify({
+            "message": "Daily summary submitted successfully.",
+            "current_summary_count": summary_count
+        }), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to process daily summary: {str(e)}"}), 500
+
+# Counters behind /api/stats, as in app.py.
+summary_stats = SummaryStatsRegistry()
+
+@app.route('/api/stats', methods=['GET'])
+async def get_stats():
+    config = get_thread_config()
+    try:
+        # As in app.py: the daily summaries are loaded (off the event loop) only if the counters lag behind.
+        stored_count = (await aget_state_values(config, ["summaries_version"])).get("summaries_version", 0)
+        stats = await asyncio.to_thread(summary_stats.get, config["configurable"]["thread_id"], stored_count,
+                                        lambda: get_state_values(config, ["daily_summaries"]).get("daily_summaries", []))
+        return jsonify(stats.to_dict(top_tags=request.args.get("top", default=5, type=int),
+                                     trend_days=min(max(request.args.get("days", default=7, type=int), 1), 366))), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to compute statistics: {str(e)}"}), 500
+
+# Background retrospective jobs with single-flight coalescing, as in app.py. Here the jobs run as
+# tasks on the server's event loop rather than on worker threads.
+retrospective_jobs = RetrospectiveJobQueue()
+RETROSPECTIVE_WAIT_SECONDS = float(os.getenv("RETROSPECTIVE_WAIT_SECONDS", "120"))
+NO_SUMMARIES_RESPONSE = {"summary": "No daily summaries available to generate a retrospective.", "details": []}
+
+async def generate_retrospective(config: dict, state_values: dict) -> dict:
+    summary_output = await asummarize_daily_entries_node(state_values)
+    if summary_output.get("error"):
+        raise RuntimeError(summary_output["error"])
+    await save_retrospective(config, state_values.get("summaries_version", 0),
+                             {key: summary_output[key] for key in RETROSPECTIVE_STATE_KEYS if key in summary_output})
+    return retrospective_result(state_values, summary_output.get("retrospective_summary"))
+
+RETROSPECTIVE_STATE_KEYS = ("retrospective_summary", "retrospective_version", "partial_summaries")
+
+async def save_retrospective(config: dict, version, values: dict) -> bool:
+    """Saves a retrospective of state version `version` unless daily summaries were added since, as in app.py."""
+    async with thread_locks(config["configurable"]["thread_id"]):
+        if (await aget_state_values(config, ["summaries_version"])).get("summaries_version", 0) != version:
+            return False
+        await app_graph.aupdate_state(config, values)
+        return True
+
+def retrospective_result(state_values: dict, summary: str) -> dict:
+    return {
+        "summary": summary,
+        "source_summary_count": len(state_values.get("daily_summaries", [])),
+        "version": state_values.get("summaries_version", 0),
+    }
+
+def retrospective_response(result: dict):
+    """JSON response with an ETag for the retrospective, or an empty 304 if If-None-Match names it."""
+    etag = retrospective_etag(thread_id_for_request(request.headers, request.args), result["version"], result["summary"])
+    response = Response("", status=304) if request.if_none_match.contains(etag) else jsonify(result)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add(TENANT_HEADER)
+    return response
+
+def start_retrospective_job(config: dict, state_values: dict):
+    """Returns (job, created) for generating the retrospective of `state_values`, the thread's current state."""
+    version = state_values.get("summaries_version", 0)
+    return retrospective_jobs.submit_coroutine(config["configurable"]["thread_id"], version,
+                                               lambda: generate_retrospective(config, state_values),
+                                               asyncio.get_running_loop())
+
+async def generate_scoped_retrospective(entries: list[dict], version: str, scope: dict) -> dict:
+    summary_output = await asummarize_daily_entries_node({"daily_summaries": entries})
+    if summary_output.get("error"):
+        raise RuntimeError(summary_output["error"])
+    return {"summary": summary_output.get("retrospective_summary"), "source_summary_count": len(entries),
+            "version": version, "scope": scope}
+
+async def scoped_retrospective(config: dict, state_values: dict, scope: dict):
+    """Retrospective of the entries matching a window/tags scope, as in app.py; nothing is saved to state."""
+    thread_id = config["configurable"]["thread_id"]
+    entries = state_values.get("daily_summaries", [])
+    # Off the event loop: an out-of-date registry rebuilds its counters and tag index from the entries.
+    stats = await asyncio.to_thread(summary_stats.get, thread_id, state_values.get("summaries_version", 0),
+                                    lambda: entries)
+    entries = stats.index.items(**scope_filters(scope))
+    if not entries:
+        return jsonify({**NO_SUMMARIES_RESPONSE, "summary": "No daily summaries match the requested dates and tags.", "scope": scope}), 200
+    version = f"{state_values.get('summaries_version', 0)}-{scope_key(scope)}"
+    job, _ = retrospective_jobs.submit_coroutine(thread_id, version, lambda: generate_scoped_retrospective(entries, version, scope),
+                                                 asyncio.get_running_loop())
+    try:
+        return retrospective_response(await job.aresult(timeout=RETROSPECTIVE_WAIT_SECONDS))
+    except asyncio.TimeoutError:
+        return jsonify(job.to_dict()), 202
+
+@app.route('/api/retrospective', methods=['GET'])
+async def get_retrospective():
+    config = get_thread_config()
+    try:
+        scope = entry_scope(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        current_state = await app_graph.aget_state(config)
+        state_values = current_state.values if current_state else {}
+        if not state_values.get("daily_summaries"):
+            return jsonify(NO_SUMMARIES_RESPONSE), 200
+        if scope is not None:
+            return await scoped_retrospective(config, state_values, scope)
+        cached = current_retrospective(state_values)
+        if cached is not None:
+            return retrospective_response(retrospective_result(state_values, cached))
+
+        job, _ = start_retrospective_job(config, state_values)
+        try:
+            return retrospective_response(await job.aresult(timeout=RETROSPECTIVE_WAIT_SECONDS))
+        except asyncio.TimeoutError:
+            return jsonify(job.to_dict()), 202
+    except Exception as e:
+        print(f"Error in /api/retrospective: {e}")
+        return jsonify({"error": f"Failed to generate retrospective: {str(e)}"}), 500
+
+@app.route('/api/retrospective/jobs', methods=['POST'])
+async def create_retrospective_job():
+    config = get_thread_config()
+    try:
+        current_state = await app_graph.aget_state(config)
+        state_values = current_state.values if current_state else {}
+        if not state_values.get("daily_summaries"):
+            return jsonify({"job_id": None, "status": "succeeded", "result": NO_SUMMARIES_RESPONSE}), 200
+        cached = current_retrospective(state_values)
+        if cached is not None:
+            return jsonify({"job_id": None, "status": "succeeded", "result": retrospective_result(state_values, cached)}), 200
+        job, created = start_retrospective_job(config, state_values)
+    except Exception as e:
+        return jsonify({"error": f"Failed to start retrospective job: {str(e)}"}), 500
+    return jsonify({**job.to_dict(), "coalesced": not created}), 202
+
+@app.route('/api/retrospective/jobs/<job_id>', methods=['GET'])
+async def get_retrospective_job(job_id):
+    job = retrospective_jobs.get(job_id)
+    if job is None or job.thread_id != thread_id_for_request(request.headers, request.args):
+        return jsonify({"error": "Unknown retrospective job."}), 404
+    wait = min(request.args.get("wait", default=0, type=float), RETROSPECTIVE_WAIT_SECONDS)
+    if wait > 0:
+        try:
+            await job.aresult(timeout=wait)
+        except Exception:
+            pass
+    return jsonify(job.to_dict()), 200
+
+def format_sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/retrospective/stream', methods=['GET'])
+async def stream_retrospective():
+    """Streams the retrospective as server-sent events, like the Flask endpoint of the same name."""
+    config = get_thread_config()
+
+    async def generate():
+        yield format_sse("start", {})
+        try:
+            current_state = await app_graph.aget_state(config)
+            summaries = current_state.values.get("daily_summaries", []) if current_state else []
+            if not summaries:
+                yield format_sse("done", {"summary": "No daily summaries available to generate a retrospective.", "source_summary_count": 0})
+                return
+
+            state_values = current_state.values
+            version = state_values.get("summaries_version", 0)
+            cached = current_retrospective(state_values)
+            if cached is not None: # Still current: send it as a single token without touching the LLM
+                yield format_sse("token", {"text": cached})
+                yield format_sse("done", retrospective_result(state_values, cached))
+                return
+
+            prompt, message, partials = await abuild_retrospective_prompt(summaries, state_values.get("partial_summaries"))
+            if prompt is None:
+                summary = message
+                yield format_sse("token", {"text": summary})
+            else:
+                parts = []
+                async for text in astream_llm(prompt):
+                    parts.append(text)
+                    yield format_sse("token", {"text": text})
+                summary = "".join(parts)
+
+            await save_retrospective(config, version, {"retrospective_summary": summary, "retrospective_version": version, "partial_summaries": partials})
+            yield format_sse("done", retrospective_result(state_values, summary))
+        except Exception as e:
+            print(f"Error in /api/retrospective/stream: {e}")
+            yield format_sse("error", {"error": f"Failed to generate retrospective: {str(e)}"})
+
+    return generate(), 200, {"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5000)
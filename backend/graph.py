@@ -1,41 +1,253 @@
 import os
+import asyncio
+import operator
+import threading
 from typing import TypedDict, Annotated, Sequence
 from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.memory import MemorySaver
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
 
+# Loaded before the local modules below, which read their settings from the environment on import.
 load_dotenv()
 
+try:
+    from .llm_cache import LLMResponseCache
+    from .prompt_builder import map_reduce_prompt, build_reduced_prompt, amap_reduce_prompt, abuild_reduced_prompt
+    from .sqlite_checkpointer import AppendOnlySqliteSaver
+    from .alert_stats import compute_alert_stats, format_alert_stats
+except ImportError:  # graph.py imported as a top-level module (e.g. by app.py)
+    from llm_cache import LLMResponseCache
+    from prompt_builder import map_reduce_prompt, build_reduced_prompt, amap_reduce_prompt, abuild_reduced_prompt
+    from sqlite_checkpointer import AppendOnlySqliteSaver
+    from alert_stats import compute_alert_stats, format_alert_stats
+
 # Initialize LLM
-llm = ChatGoogleGenerativeAI(model="gemini-pro", google_api_key=os.getenv("GEMINI_API_KEY"))
+LLM_MODEL_NAME = "gemini-pro"
+llm = ChatGoogleGenerativeAI(model=LLM_MODEL_NAME, google_api_key=os.getenv("GEMINI_API_KEY"))
+
+# Persistent response cache shared by all nodes (None when LLM_CACHE_ENABLED=0)
+llm_cache = LLMResponseCache.from_env()
+
+def invoke_llm(prompt: str) -> str:
+    """Returns the LLM's text response, serving byte-identical prompts from the response cache."""
+    if llm_cache is not None:
+        cached = llm_cache.get(LLM_MODEL_NAME, prompt)
+        if cached is not None:
+            return cached
+    content = llm.invoke(prompt).content
+    if llm_cache is not None and content:
+        llm_cache.set(LLM_MODEL_NAME, prompt, content)
+    return content
+
+def stream_llm(prompt: str):
+    """Yields the LLM's text response in chunks as they arrive; a cached response is yielded in one piece."""
+    if llm_cache is not None:
+        cached = llm_cache.get(LLM_MODEL_NAME, prompt)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
+    for chunk in llm.stream(prompt):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+    if llm_cache is not None and parts:
+        llm_cache.set(LLM_MODEL_NAME, prompt, "".join(parts))
+
+# Async variants for the ASGI server (asgi_app.py): the LLM call is awaited instead of blocking
+# a thread. Cache lookups are short SQLite queries and run in the default executor.
+async def ainvoke_llm(prompt: str) -> str:
+    """Async version of `invoke_llm`."""
+    if llm_cache is not None:
+        cached = await asyncio.to_thread(llm_cache.get, LLM_MODEL_NAME, prompt)
+        if cached is not None:
+            return cached
+    content = (await llm.ainvoke(prompt)).content
+    if llm_cache is not None and content:
+        await asyncio.to_thread(llm_cache.set, LLM_MODEL_NAME, prompt, content)
+    return content
+
+async def astream_llm(prompt: str):
+    """Async version of `stream_llm`."""
+    if llm_cache is not None:
+        cached = await asyncio.to_thread(llm_cache.get, LLM_MODEL_NAME, prompt)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
+    async for chunk in llm.astream(prompt):
+        if chunk.content:
+            parts.append(chunk.content)
+            yield chunk.content
+    if llm_cache is not None and parts:
+        await asyncio.to_thread(llm_cache.set, LLM_MODEL_NAME, prompt, "".join(parts))
 
 class GraphState(TypedDict):
-    daily_summaries: list[dict]
+    # Append-only: nodes return only the new entries and the reducer appends them.
+    daily_summaries: Annotated[list[dict], operator.add]
+    # Monotonic version of daily_summaries: every write adds the number of entries it appended.
+    summaries_version: Annotated[int, operator.add]
     retrospective_summary: str
+    # summaries_version that retrospective_summary was generated from
+    retrospective_version: int | None
+    # Cached summaries of completed blocks of daily_summaries (see update_partial_summaries)
+    partial_summaries: list[dict]
     actionable_insights: str | None # Added for our new node
     error: str | None
+    # Per-invocation inputs for the entry nodes. They are state channels so that
+    # `graph.invoke({"new_summary_input": ...})` actually reaches the node.
+    new_summary_input: dict | None
+    retrospective_summary_input: dict | None
 
 # Node functions
 def add_daily_summary_node(state: GraphState, new_summary: dict):
     """Adds a new daily summary to the list."""
-    summaries = state.get("daily_summaries", [])
-    summaries.append(new_summary)
-    return {"daily_summaries": summaries, "error": None}
+    return {"daily_summaries": [new_summary], "summaries_version": 1, "error": None}
+
+# Incremental (hierarchical) retrospective summarization.
+# Every SUMMARY_BLOCK_SIZE daily entries are summarized once into a level-0 partial summary,
+# and every SUMMARY_MERGE_FAN_IN consecutive partials of the same level are merged into one
+# partial of the next level. Partials are kept in the graph state, so a retrospective only
+# reduces over O(fan_in * log(n)) partials plus the entries not yet covered by a block.
+SUMMARY_BLOCK_SIZE = int(os.getenv("SUMMARY_BLOCK_SIZE", "10"))  # 0 disables incremental mode
+SUMMARY_MERGE_FAN_IN = int(os.getenv("SUMMARY_MERGE_FAN_IN", "4"))
+
+def entry_texts(summaries: list[dict]) -> list[str]:
+    return [s.get("text", "") for s in summaries if s.get("text")]
+
+BLOCK_SUMMARY_INSTRUCTION = ("Please provide a concise summary of the following daily entries. "
+                             "It will later be combined with summaries of other periods:\n\n")
+MERGE_SUMMARY_INSTRUCTION = ("Please combine the following summaries of consecutive periods "
+                             "into one concise summary:\n\n")
+NO_TEXT_MESSAGE = "No text found in daily summaries to process."
+
+def _partial_summary_steps(summaries: list[dict], partials: list[dict], block_size: int, fan_in: int):
+    """
+    Shared by update_partial_summaries and aupdate_partial_summaries. A generator that yields
+    (instruction, texts) whenever it needs an LLM summary, expects the summary text to be sent
+    back, and returns the updated partials. Raises ValueError if block_size is not positive.
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1 (SUMMARY_BLOCK_SIZE=0 disables incremental mode).")
+    partials = list(partials)
+    covered = partials[-1]["end"] if partials else 0
+    while len(summaries) - covered >= block_size:
+        block_texts = entry_texts(summaries[covered:covered + block_size])
+        text = (yield BLOCK_SUMMARY_INSTRUCTION, block_texts) if "".join(block_texts).strip() else ""
+        partials.append({"level": 0, "start": covered, "end": covered + block_size, "text": text})
+        covered += block_size
+
+        # Merge runs of `fan_in` same-level partials, like carrying in a counter.
+        while fan_in > 1 and len(partials) >= fan_in and len({p["level"] for p in partials[-fan_in:]}) == 1:
+            group = partials[-fan_in:]
+            group_texts = [p["text"] for p in group if p["text"]]
+            text = (yield MERGE_SUMMARY_INSTRUCTION, group_texts) if "".join(group_texts).strip() else ""
+            partials[-fan_in:] = [{"level": group[0]["level"] + 1, "start": group[0]["start"], "end": group[-1]["end"], "text": text}]
+    return partials
+
+def update_partial_summaries(summaries: list[dict], partials: list[dict],
+                             block_size: int = SUMMARY_BLOCK_SIZE, fan_in: int = SUMMARY_MERGE_FAN_IN) -> list[dict]:
+    """
+    Returns `partials` extended to cover every complete block of `summaries`.
+    Each partial is {"level", "start", "end", "text"} and covers summaries[start:end];
+    together they cover a contiguous prefix of `summaries`. Only new blocks hit the LLM.
+    """
+    steps = _partial_summary_steps(summaries, partials, block_size, fan_in)
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(map_reduce_prompt(*request, invoke_llm))
+    except StopIteration as done:
+        return done.value
+
+async def aupdate_partial_summaries(summaries: list[dict], partials: list[dict],
+                                    block_size: int = SUMMARY_BLOCK_SIZE, fan_in: int = SUMMARY_MERGE_FAN_IN) -> list[dict]:
+    """Async version of `update_partial_summaries`."""
+    steps = _partial_summary_steps(summaries, partials, block_size, fan_in)
+    try:
+        request = next(steps)
+        while True:
+            request = steps.send(await amap_reduce_prompt(*request, ainvoke_llm))
+    except StopIteration as done:
+        return done.value
+
+def _retrospective_prompt_parts(summaries: list[dict], partials: list[dict]) -> tuple[str, list[str]] | None:
+    """Returns (instruction, texts) for the final retrospective prompt, or None if there is no text."""
+    covered = partials[-1]["end"] if partials else 0
+    partial_texts = [f"Summary of entries {p['start'] + 1}-{p['end']}:\n{p['text']}" for p in partials if p["text"]]
+    texts_to_summarize = entry_texts(summaries[covered:])
+
+    if not partial_texts and not "".join(texts_to_summarize).strip():
+        return None
+    if partial_texts:
+        instruction = ("Please provide a concise retrospective summary of the following summaries "
+                       "of earlier periods and the most recent daily entries:\n\n")
+    else:
+        instruction = "Please provide a concise retrospective summary of the following daily entries:\n\n"
+    return instruction, partial_texts + texts_to_summarize
+
+def build_retrospective_prompt(summaries: list[dict], partials: list[dict] | None) -> tuple[str | None, str | None, list[dict]]:
+    """
+    Brings the partial summaries up to date and builds the final retrospective prompt.
+    Returns (prompt, message, partials); prompt is None when there is no text to summarize,
+    in which case message explains why.
+    """
+    partials = update_partial_summaries(summaries, partials or []) if SUMMARY_BLOCK_SIZE > 0 else []
+    parts = _retrospective_prompt_parts(summaries, partials)
+    if parts is None:
+        return None, NO_TEXT_MESSAGE, partials
+    # Runs concurrent map calls first if the prompt would exceed the token budget.
+    return build_reduced_prompt(*parts, invoke_llm), None, partials
+
+async def abuild_retrospective_prompt(summaries: list[dict], partials: list[dict] | None) -> tuple[str | None, str | None, list[dict]]:
+    """Async version of `build_retrospective_prompt`."""
+    partials = await aupdate_partial_summaries(summaries, partials or []) if SUMMARY_BLOCK_SIZE > 0 else []
+    parts = _retrospective_prompt_parts(summaries, partials)
+    if parts is None:
+        return None, NO_TEXT_MESSAGE, partials
+    return await abuild_reduced_prompt(*parts, ainvoke_llm), None, partials
+
+def current_retrospective(state: GraphState) -> str | None:
+    """Returns the stored retrospective if it was generated from the current daily summaries, else None."""
+    if state.get("retrospective_summary") is None:
+        return None
+    if state.get("retrospective_version") != state.get("summaries_version", 0):
+        return None
+    return state["retrospective_summary"]
 
 def summarize_daily_entries_node(state: GraphState):
     """Summarizes all daily entries to generate a retrospective."""
     summaries = state.get("daily_summaries", [])
     if not summaries:
         return {"retrospective_summary": "No daily summaries to process.", "error": None}
+    version = state.get("summaries_version", 0)
+    cached = current_retrospective(state)
+    if cached is not None:
+        return {"retrospective_summary": cached, "retrospective_version": version, "error": None}
 
     try:
-        texts_to_summarize = "\n\n---\n\n".join([s.get("text", "") for s in summaries if s.get("text")])
-        if not texts_to_summarize.strip():
-            return {"retrospective_summary": "No text found in daily summaries to process.", "error": None}
+        prompt, message, partials = build_retrospective_prompt(summaries, state.get("partial_summaries"))
+        retrospective = invoke_llm(prompt) if prompt is not None else message
+        return {"retrospective_summary": retrospective, "retrospective_version": version, "partial_summaries": partials, "error": None}
+    except Exception as e:
+        print(f"Error during summarization: {e}")
+        return {"retrospective_summary": "", "error": f"Failed to generate summary: {str(e)}"}
 
-        prompt = f"Please provide a concise retrospective summary of the following daily entries:\n\n{texts_to_summarize}"
-        response = llm.invoke(prompt)
-        return {"retrospective_summary": response.content, "error": None}
+async def asummarize_daily_entries_node(state: GraphState):
+    """Async version of `summarize_daily_entries_node`."""
+    summaries = state.get("daily_summaries", [])
+    if not summaries:
+        return {"retrospective_summary": "No daily summaries to process.", "error": None}
+    version = state.get("summaries_version", 0)
+    cached = current_retrospective(state)
+    if cached is not None:
+        return {"retrospective_summary": cached, "retrospective_version": version, "error": None}
+
+    try:
+        prompt, message, partials = await abuild_retrospective_prompt(summaries, state.get("partial_summaries"))
+        retrospective = await ainvoke_llm(prompt) if prompt is not None else message
+        return {"retrospective_summary": retrospective, "retrospective_version": version, "partial_summaries": partials, "error": None}
     except Exception as e:
         print(f"Error during summarization: {e}")
         return {"retrospective_summary": "", "error": f"Failed to generate summary: {str(e)}"}
@@ -43,16 +255,15 @@ def summarize_daily_entries_node(state: GraphState):
 # Node function for adding summary - modified to take direct input for clarity in graph.
 def add_summary_node_direct_input(state: GraphState, new_summary: dict):
     """Adds a new daily summary to the list. Input is passed directly."""
-    summaries = state.get("daily_summaries", [])
-    summaries.append(new_summary)
-    return {"daily_summaries": summaries, "error": None}
+    # Only the new entry is returned; the daily_summaries reducer appends it to the state.
+    return {"daily_summaries": [new_summary], "summaries_version": 1, "error": None}
 
 
 # Define the graph
 workflow = StateGraph(GraphState)
 
 # Nodes
-workflow.add_node("add_summary_entry", lambda state, new_summary_input: add_summary_node_direct_input(state, new_summary_input))
+workflow.add_node("add_summary_entry", lambda state: add_summary_node_direct_input(state, state.get("new_summary_input")))
 workflow.add_node("generate_retrospective_summary", summarize_daily_entries_node)
 
 # Edges
@@ -120,6 +331,82 @@ workflow.add_edge("add_summary_entry", END)
 #     else:
 #         print(f"No state found for {thread_id}")
 
+def format_alert_for_prompt(index: int, alert: dict) -> str:
+    """Formats one alert (as produced by format_summary_for_langgraph) for an LLM prompt."""
+    lines = [
+        f"- Alert {index + 1}:",
+        f"  Title: {alert.get('title', 'N/A')}",
+        f"  Status: {alert.get('status', 'N/A')}",
+        f"  Created: {alert.get('created_date', 'N/A')}",
+        f"  Noisy: {'Yes' if alert.get('is_noisy') else 'No'}",
+        f"  Self-Resolved: {'Yes' if alert.get('is_self_resolved') else 'No'}",
+    ]
+    if alert.get('alert_node_analysis'):
+        node_analysis = alert['alert_node_analysis']
+        lines.append(f"  Node Analysis: {node_analysis.get('component', 'N/A')} - {node_analysis.get('metric', 'N/A')}: {node_analysis.get('value', 'N/A')}")
+    if alert.get('graph_analysis'):
+        graph_analysis = alert['graph_analysis']
+        lines.append(f"  Graph Analysis: Impact {graph_analysis.get('impact_radius', 'N/A')}, Correlated Alerts: {len(graph_analysis.get('correlated_alerts', []))}")
+    occurrences = alert.get('occurrences')
+    if occurrences and occurrences.get('count', 1) > 1:
+        # A de-duplicated alert: this one stands for every occurrence of the same alert.
+        line = f"  Occurrences: {occurrences['count']} between {occurrences.get('first_seen', 'N/A')} and {occurrences.get('last_seen', 'N/A')}"
+        if occurrences.get('value_min') is not None:
+            line += f", value {occurrences['value_min']} to {occurrences['value_max']}"
+        line += f", noisy {occurrences.get('noisy_count', 0)}, self-resolved {occurrences.get('self_resolved_count', 0)}"
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+# "stats": the insights prompt carries aggregate statistics plus a few sample alerts, so its size
+# does not grow with the summary; "full": every alert is listed (map-reduced over the token budget).
+INSIGHTS_PROMPT_MODE = os.getenv("INSIGHTS_PROMPT_MODE", "stats").lower()
+
+def _insights_prompt_parts(retrospective_summary_data: dict) -> tuple[str, str, list[str]] | None:
+    """Returns (instruction, map_instruction, alert_texts) for the insights prompt, or None if there are no alerts."""
+    tags = retrospective_summary_data.get("tags", [])
+    alerts = retrospective_summary_data.get("alerts", [])
+    item_count = retrospective_summary_data.get("item_count", len(alerts))
+    unique_count = retrospective_summary_data.get("unique_alert_count", len(alerts))
+    total_line = f"Total Alerts: {item_count}" + (f" ({unique_count} distinct, repeats listed once with their occurrences)"
+                                                  if unique_count < item_count else "")
+
+    if not alerts:
+        return None
+
+    summary_header = (
+        f"Retrospective Summary ID: {retrospective_summary_data.get('summary_id', 'N/A')}\n"
+        f"Tags: {', '.join(tags)}\n"
+        f"{total_line}\n\n"
+    )
+    instruction = (
+        "You are an AI operations assistant. Based on the following retrospective summary of alerts, "
+        "provide actionable insights. Focus on potential root causes, trends, and recommendations "
+        "for investigation or improvement. Be concise and clear.\n\n"
+        f"{summary_header}"
+    )
+    stats_mode = INSIGHTS_PROMPT_MODE == "stats"
+    # Used if the alert texts have to be split: each part is summarized on its own first.
+    map_instruction = (
+        "The following is part {index} of {total} of the "
+        + ("representative alerts" if stats_mode else "alerts")
+        + " in a retrospective summary. Summarize the key findings concisely: recurring titles, affected "
+        "components and metric values, noisy and self-resolved patterns, and impact. They will be combined "
+        "with findings from the other parts.\n\n"
+        f"{summary_header}"
+    )
+    if stats_mode:
+        # One pass over the alerts; the prompt holds bounded tables and samples, so it is usually a single call.
+        stats = compute_alert_stats(retrospective_summary_data)
+        instruction += f"Alert Statistics:\n{format_alert_stats(stats)}\nRepresentative Alerts:\n"
+        alert_texts = [format_alert_for_prompt(i, alert) for i, alert in enumerate(stats["samples"])]
+        return instruction, map_instruction, alert_texts
+    instruction += "Alerts Included:\n"
+    # Every alert is included; large summaries are split into concurrent map calls within the token budget.
+    alert_texts = [format_alert_for_prompt(i, alert) for i, alert in enumerate(alerts)]
+    return instruction, map_instruction, alert_texts
+
+NO_ALERTS_MESSAGE = "No alert data provided in the summary to generate insights."
+
 # Node function for generating actionable insights from a RetrospectiveSummary object
 def generate_actionable_insights_node(state: GraphState, retrospective_summary_data: dict):
     """
@@ -128,42 +415,24 @@ def generate_actionable_insights_node(state: GraphState, retrospective_summary_d
     formatted from our `RetrospectiveSummary` model.
     """
     try:
-        # Construct a detailed prompt for the LLM
-        tags = retrospective_summary_data.get("tags", [])
-        alerts = retrospective_summary_data.get("alerts", [])
-        item_count = retrospective_summary_data.get("item_count", len(alerts))
-
-        prompt_details = f"Retrospective Summary ID: {retrospective_summary_data.get('summary_id', 'N/A')}\n"
-        prompt_details += f"Tags: {', '.join(tags)}\n"
-        prompt_details += f"Total Alerts: {item_count}\n\n"
-        prompt_details += "Alerts Included:\n"
-
-        if not alerts:
-            return {"actionable_insights": "No alert data provided in the summary to generate insights.", "error": None}
-
-        for i, alert in enumerate(alerts[:5]): # Limit to first 5 alerts for brevity in prompt
-            prompt_details += f"- Alert {i+1}:\n"
-            prompt_details += f"  Title: {alert.get('title', 'N/A')}\n"
-            prompt_details += f"  Status: {alert.get('status', 'N/A')}\n"
-            prompt_details += f"  Created: {alert.get('created_date', 'N/A')}\n"
-            prompt_details += f"  Noisy: {'Yes' if alert.get('is_noisy') else 'No'}\n"
-            prompt_details += f"  Self-Resolved: {'Yes' if alert.get('is_self_resolved') else 'No'}\n"
-            if alert.get('alert_node_analysis'):
-                prompt_details += f"  Node Analysis: {alert['alert_node_analysis'].get('component', 'N/A')} - {alert['alert_node_analysis'].get('metric', 'N/A')}: {alert['alert_node_analysis'].get('value', 'N/A')}\n"
-            if alert.get('graph_analysis'):
-                prompt_details += f"  Graph Analysis: Impact {alert['graph_analysis'].get('impact_radius', 'N/A')}, Correlated Alerts: {len(alert['graph_analysis'].get('correlated_alerts', []))}\n"
-        if item_count > 5:
-            prompt_details += f"...and {item_count - 5} more alerts.\n"
-
-        prompt = (
-            "You are an AI operations assistant. Based on the following retrospective summary of alerts, "
-            "provide actionable insights. Focus on potential root causes, trends, and recommendations "
-            "for investigation or improvement. Be concise and clear.\n\n"
-            f"{prompt_details}"
-        )
-
-        response = llm.invoke(prompt)
-        insights = response.content
+        parts = _insights_prompt_parts(retrospective_summary_data)
+        if parts is None:
+            return {"actionable_insights": NO_ALERTS_MESSAGE, "error": None}
+        instruction, map_instruction, alert_texts = parts
+        insights = map_reduce_prompt(instruction, alert_texts, invoke_llm, map_instruction=map_instruction, separator="")
+        return {"actionable_insights": insights, "error": None}
+    except Exception as e:
+        print(f"Error during actionable insights generation: {e}")
+        return {"actionable_insights": "", "error": f"Failed to generate actionable insights: {str(e)}"}
+
+async def agenerate_actionable_insights_node(state: GraphState, retrospective_summary_data: dict):
+    """Async version of `generate_actionable_insights_node`."""
+    try:
+        parts = _insights_prompt_parts(retrospective_summary_data)
+        if parts is None:
+            return {"actionable_insights": NO_ALERTS_MESSAGE, "error": None}
+        instruction, map_instruction, alert_texts = parts
+        insights = await amap_reduce_prompt(instruction, alert_texts, ainvoke_llm, map_instruction=map_instruction, separator="")
         return {"actionable_insights": insights, "error": None}
     except Exception as e:
         print(f"Error during actionable insights generation: {e}")
@@ -173,9 +442,9 @@ def generate_actionable_insights_node(state: GraphState, retrospective_summary_d
 workflow = StateGraph(GraphState)
 
 # Nodes
-workflow.add_node("add_summary_entry", lambda state, new_summary_input: add_summary_node_direct_input(state, new_summary_input))
+workflow.add_node("add_summary_entry", lambda state: add_summary_node_direct_input(state, state.get("new_summary_input")))
 workflow.add_node("generate_retrospective_summary", summarize_daily_entries_node)
-workflow.add_node("generate_actionable_insights", lambda state, retrospective_summary_input: generate_actionable_insights_node(state, retrospective_summary_input))
+workflow.add_node("generate_actionable_insights", lambda state: generate_actionable_insights_node(state, state.get("retrospective_summary_input")))
 
 
 # Edges
@@ -238,6 +507,103 @@ workflow.add_edge("add_summary_entry", END)
     # print(insights_result)
 
 
+# --- Compiled graph registry ---
+# Building and compiling a StateGraph is comparatively expensive, so every graph
+# is compiled at most once per process and then reused. All stateful graphs share
+# one checkpointer so state written by one is visible to the others.
+
+def build_insights_workflow() -> StateGraph:
+    """Builds a workflow with 'generate_actionable_insights' as its entry point."""
+    insights_workflow = StateGraph(GraphState)
+    insights_workflow.add_node("generate_actionable_insights",
+                               lambda state: generate_actionable_insights_node(state, state.get("retrospective_summary_input")))
+    insights_workflow.set_entry_point("generate_actionable_insights")
+    insights_workflow.add_edge("generate_actionable_insights", END)
+    return insights_workflow
+
+# Graph name -> zero-argument callable returning the (uncompiled) workflow.
+GRAPH_BUILDERS = {
+    "workflow": lambda: workflow,
+    "insights": build_insights_workflow,
+}
+
+# Graphs compiled without a checkpointer: each invocation is a one-off (e.g. insights for one
+# retrospective summary), so persisting its thread would only grow the checkpoint store forever.
+STATELESS_GRAPHS = {"insights"}
+
+_registry_lock = threading.Lock()
+_compiled_graphs: dict = {}
+_shared_checkpointer = None
+
+def create_checkpointer():
+    """
+    Creates the checkpointer selected by the CHECKPOINTER environment variable:
+    "sqlite" (default) persists state to CHECKPOINT_DB_PATH and keeps at most THREAD_CACHE_MAX_THREADS
+    threads in memory, dropping those idle for THREAD_CACHE_IDLE_SECONDS; "memory" keeps every thread
+    in an unbounded MemorySaver (for local development only).
+    """
+    if os.getenv("CHECKPOINTER", "sqlite").lower() == "memory":
+        return MemorySaver()
+    idle_seconds = float(os.getenv("THREAD_CACHE_IDLE_SECONDS", "1800"))
+    kwargs = {
+        "max_cached_threads": int(os.getenv("THREAD_CACHE_MAX_THREADS", "256")),
+        "cache_idle_seconds": idle_seconds if idle_seconds > 0 else None,
+    }
+    path = os.getenv("CHECKPOINT_DB_PATH")
+    return AppendOnlySqliteSaver(path, **kwargs) if path else AppendOnlySqliteSaver(**kwargs)
+
+def get_checkpointer():
+    """Returns the process-wide checkpointer, creating it on first use."""
+    global _shared_checkpointer
+    with _registry_lock:
+        if _shared_checkpointer is None:
+            _shared_checkpointer = create_checkpointer()
+        return _shared_checkpointer
+
+def get_compiled_graph(name: str = "workflow"):
+    """Returns the compiled graph registered under `name`, compiling it on first use."""
+    compiled = _compiled_graphs.get(name)
+    if compiled is not None:
+        return compiled
+    if name not in GRAPH_BUILDERS:
+        raise KeyError(f"Unknown graph '{name}'. Known graphs: {sorted(GRAPH_BUILDERS)}")
+    checkpointer = None if name in STATELESS_GRAPHS else get_checkpointer()
+    with _registry_lock:
+        # Another thread may have compiled it while we waited for the lock.
+        compiled = _compiled_graphs.get(name)
+        if compiled is None:
+            compiled = GRAPH_BUILDERS[name]().compile(checkpointer=checkpointer)
+            _compiled_graphs[name] = compiled
+        return compiled
+
+def get_state_values(config: dict, channels) -> dict:
+    """
+    The latest values of `channels` in a thread of the workflow graph. With the SQLite checkpointer
+    only those channels are read, so e.g. summaries_version is checked without loading every daily summary.
+    """
+    checkpointer = get_checkpointer()
+    if isinstance(checkpointer, AppendOnlySqliteSaver):
+        return checkpointer.get_channel_values(config, channels) or {}
+    state = get_compiled_graph("workflow").get_state(config)
+    return {channel: state.values[channel] for channel in channels if channel in state.values}
+
+async def aget_state_values(config: dict, channels) -> dict:
+    """Async version of `get_state_values`."""
+    return await asyncio.to_thread(get_state_values, config, channels)
+
+def warm_up(names=None):
+    """Compiles the given graphs (all registered graphs by default) ahead of time."""
+    for name in (names or GRAPH_BUILDERS):
+        get_compiled_graph(name)
+
+def reset_registry():
+    """Drops all compiled graphs and the shared checkpointer (mainly for benchmarks)."""
+    global _shared_checkpointer
+    with _registry_lock:
+        _compiled_graphs.clear()
+        _shared_checkpointer = None
+
+
 # This illustrates the stateful nature with a checkpointer.
 # The Flask app will need to implement similar logic for managing state per user/session.
 print("Graph definition loaded with add_summary, summarize_daily, and generate_actionable_insights nodes. Ready for compilation and integration.")
@@ -0,0 +1,228 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Defaults can be overridden from the environment (.env), see `from_env`.
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.sqlite3")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MiB of cached response text
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # one week
+
+
+# Hit/miss counters and last-access times are written in batches: a lookup only reads, and the
+# pending updates are flushed after this many lookups or seconds, whichever comes first.
+STATS_FLUSH_EVERY = 64
+STATS_FLUSH_SECONDS = 5.0
+# Once the stored responses exceed max_bytes, entries are evicted until they fit in this fraction
+# of it, so an insert into a full cache doesn't trigger an eviction pass every time.
+EVICT_TO_RATIO = 0.9
+
+
+class LLMResponseCache:
+    """
+    Persistent, content-addressed cache of LLM responses stored in SQLite.
+
+    Entries are keyed on sha256(model name + prompt). The database runs in WAL mode,
+    so several worker processes can read and write the same file concurrently. It is
+    opened (and created) on first use, not when the cache object is built.
+    - Entries older than `ttl_seconds` are treated as misses and removed on the next insert.
+    - Once the stored responses exceed `max_bytes`, the least recently used entries are evicted.
+    - Hit and miss counters are kept in the database, so they are shared across processes
+      and survive restarts. Lookups don't write: counters and access times are buffered and
+      flushed in batches (see STATS_FLUSH_EVERY), so the counters may lag by one batch.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float | None = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()  # sqlite3 connections must not be shared between threads
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._pending_lock = threading.Lock()
+        self._pending_hits = 0
+        self._pending_misses = 0
+        self._pending_access: dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        atexit.register(self.flush)
+
+    @classmethod
+    def from_env(cls):
+        """Builds a cache from LLM_CACHE_* environment variables, or returns None if LLM_CACHE_ENABLED is off."""
+        if os.getenv("LLM_CACHE_ENABLED", "1").lower() in ("0", "false", "no"):
+            return None
+        ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            ttl_seconds=ttl if ttl > 0 else None,
+        )
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\0")  # separator so ("ab", "c") and ("a", "bc") differ
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: we issue BEGIN IMMEDIATE ourselves for multi-statement writes.
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(conn)
+                    self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS llm_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO llm_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+        # Total size of the stored responses, kept up to date by every write so that checking
+        # it against max_bytes doesn't scan the table (seeded once for databases created before).
+        conn.execute("INSERT OR IGNORE INTO llm_cache_stats (name, value) "
+                     "SELECT 'bytes', COALESCE(SUM(size), 0) FROM llm_cache")
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, model: str, prompt: str) -> str | None:
+        """Returns the cached response for (model, prompt), or None on a miss."""
+        key = self.make_key(model, prompt)
+        now = time.time()
+        row = self._connection().execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None and self._is_expired(row[1], now):
+            row = None
+        with self._pending_lock:
+            if row is None:
+                self._pending_misses += 1
+            else:
+                self._pending_hits += 1
+                self._pending_access[key] = now
+            due = (self._pending_hits + self._pending_misses >= STATS_FLUSH_EVERY
+                   or time.monotonic() - self._last_flush >= STATS_FLUSH_SECONDS)
+        if due:
+            self.flush()
+        return row[0] if row is not None else None
+
+    def _take_pending(self):
+        with self._pending_lock:
+            pending = (self._pending_hits, self._pending_misses, self._pending_access)
+            self._pending_hits = self._pending_misses = 0
+            self._pending_access = {}
+            self._last_flush = time.monotonic()
+        return pending
+
+    @staticmethod
+    def _write_pending(conn: sqlite3.Connection, pending):
+        hits, misses, access = pending
+        if hits:
+            conn.execute("UPDATE llm_cache_stats SET value = value + ? WHERE name = 'hits'", (hits,))
+        if misses:
+            conn.execute("UPDATE llm_cache_stats SET value = value + ? WHERE name = 'misses'", (misses,))
+        if access:
+            conn.executemany("UPDATE llm_cache SET last_access = MAX(last_access, ?) WHERE key = ?",
+                             [(at, key) for key, at in access.items()])
+
+    def flush(self):
+        """Writes the buffered hit/miss counters and access times to the database."""
+        pending = self._take_pending()
+        if not any(pending):
+            return
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_pending(conn, pending)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, keys_and_sizes):
+        """Deletes the given (key, size) rows and subtracts their sizes from the stored total."""
+        if not keys_and_sizes:
+            return
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(key,) for key, _ in keys_and_sizes])
+        conn.execute("UPDATE llm_cache_stats SET value = value - ? WHERE name = 'bytes'",
+                     (sum(size for _, size in keys_and_sizes),))
+
+    def set(self, model: str, prompt: str, response: str):
+        """Stores a response and evicts expired and least recently used entries as needed."""
+        key = self.make_key(model, prompt)
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        pending = self._take_pending()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write_pending(conn, pending)
+            old = conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            conn.execute("UPDATE llm_cache_stats SET value = value + ? WHERE name = 'bytes'", (size - (old[0] if old else 0),))
+            if self.ttl_seconds is not None:
+                self._delete(conn, conn.execute("SELECT key, size FROM llm_cache WHERE created_at < ?",
+                                                (now - self.ttl_seconds,)).fetchall())
+            total = conn.execute("SELECT value FROM llm_cache_stats WHERE name = 'bytes'").fetchone()[0]
+            if total > self.max_bytes:
+                # Evict least recently used entries until the rest fit in EVICT_TO_RATIO of max_bytes.
+                excess = total - int(self.max_bytes * EVICT_TO_RATIO)
+                victims, freed = [], 0
+                for victim_key, victim_size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access, key"):
+                    if freed >= excess:
+                        break
+                    victims.append((victim_key, victim_size))
+                    freed += victim_size
+                self._delete(conn, victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        self.flush()
+        conn = self._connection()
+        entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        counters = dict(conn.execute("SELECT name, value FROM llm_cache_stats").fetchall())
+        return {
+            "entries": entries,
+            "bytes": counters.get("bytes", 0),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+        }
+
+    def clear(self):
+        self._take_pending()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM llm_cache")
+            conn.execute("UPDATE llm_cache_stats SET value = 0")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
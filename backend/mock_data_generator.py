@@ -1,7 +1,14 @@
+import json
+import os
+import sys
 import uuid
 import random
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from tag_index import TagIndex
+
 # Mock data elements
 MOCK_TITLES = [
     "High CPU Usage on Payment Gateway",
@@ -64,7 +71,8 @@ def generate_mock_daily_summary_item():
     # For simplicity, we'll just pick randomly, but a real system might have more correlation
     description = random.choice(MOCK_DESCRIPTIONS)
     graph_analysis = random.choice(MOCK_GRAPH_ANALYSIS)
-    nodes_affected = random.sample(random.choice(MOCK_NODES_AFFECTED) + ["generic-node-1", "generic-node-2"], k=min(random.randint(1,3), len(random.choice(MOCK_NODES_AFFECTED))+2) )
+    candidate_nodes = random.choice(MOCK_NODES_AFFECTED) + ["generic-node-1", "generic-node-2"]
+    nodes_affected = random.sample(candidate_nodes, k=min(random.randint(1, 3), len(candidate_nodes)))
     tags = random.sample(MOCK_TAGS, k=random.randint(2, 5))
 
     return {
@@ -91,21 +99,93 @@ def generate_mock_daily_summary(date_str, num_items=5):
         "items": items
     }
 
-def generate_mock_retrospective_summary(daily_summaries, target_tags, start_date_str, end_date_str):
+# A few titles account for most items: the k-th title is drawn with weight 1 / k.
+MOCK_TITLE_WEIGHTS = [1 / rank for rank in range(1, len(MOCK_TITLES) + 1)]
+# Most nodes and tags any item gets, for drawing them in bulk.
+MAX_MOCK_NODES = max(len(nodes) for nodes in MOCK_NODES_AFFECTED)
+MAX_MOCK_TAGS = 5
+
+def _sample_rows(rng, sizes, max_size, count):
+    """For each row i < count, a random ordering of range(sizes[i]) padded to max_size (as in rng.sample)."""
+    keys = rng.random((count, max_size))
+    keys[np.arange(max_size) >= sizes[:, None]] = np.inf  # positions past the row's size sort last
+    return np.argsort(keys, axis=1)
+
+def iter_mock_daily_summaries(start_date_str, num_days, items_per_day=50, seed=0, id_prefix="item-"):
     """
-    Generates a mock retrospective summary based on a list of daily summaries and target tags.
+    Yields `num_days` mock daily summaries from `start_date_str` on, one day at a time, for load
+    tests. Reproducible for a given `seed`. Each day's fields are drawn in bulk with NumPy, the
+    way src/synthetic_alerts.py generates alerts, and items get its counter-based ids
+    (`id_prefix` + counter) instead of UUIDs. Titles repeat (MOCK_TITLE_WEIGHTS), timestamps
+    follow its DIURNAL_WEIGHTS, and the number of items varies from day to day around `items_per_day`.
     """
-    relevant_items = []
-    daily_summary_ids_used = []
-
-    for summary in daily_summaries:
-        # Assuming date strings are comparable or convert them to datetime objects if needed
-        # For this mock, we'll just use all provided daily_summaries that fall in range
-        # In a real scenario, you'd filter daily_summaries by date more strictly.
-        daily_summary_ids_used.append(summary["date"]) # Using date as ID for simplicity here
-        for item in summary["items"]:
-            if any(tag in item["tags"] for tag in target_tags):
-                relevant_items.append(item)
+    try:
+        from src.synthetic_alerts import DIURNAL_WEIGHTS, counter_ids
+    except ImportError:  # imported from backend/ (e.g. by app.py); src is in the repository root
+        sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from src.synthetic_alerts import DIURNAL_WEIGHTS, counter_ids
+
+    rng = np.random.default_rng(seed)
+    title_p = np.array(MOCK_TITLE_WEIGHTS) / sum(MOCK_TITLE_WEIGHTS)
+    hour_p = np.array(DIURNAL_WEIGHTS) / sum(DIURNAL_WEIGHTS)
+    node_counts = np.array([len(nodes) for nodes in MOCK_NODES_AFFECTED])
+    base_date = np.datetime64(datetime.strptime(start_date_str, "%Y-%m-%d").date(), "D")
+    counter = 0
+    for day in range(num_days):
+        date = base_date + day
+        n = max(1, round(rng.exponential(items_per_day))) if items_per_day > 0 else 0
+        titles = rng.choice(len(MOCK_TITLES), n, p=title_p)
+        seconds = np.sort(rng.choice(24, n, p=hour_p) * 3600 + rng.integers(0, 3600, n))
+        timestamps = np.datetime_as_string(date.astype("datetime64[s]") + seconds).tolist()
+        graph_analyses = rng.integers(0, len(MOCK_GRAPH_ANALYSIS), n)
+        # Description and nodes follow the title (the lists are aligned), as repeats of one problem would.
+        title_nodes = node_counts[titles]
+        node_order = _sample_rows(rng, title_nodes, MAX_MOCK_NODES, n)
+        nodes_per_item = rng.integers(1, title_nodes + 1)
+        tag_order = _sample_rows(rng, np.full(n, len(MOCK_TAGS)), len(MOCK_TAGS), n)[:, :MAX_MOCK_TAGS]
+        tags_per_item = rng.integers(2, MAX_MOCK_TAGS + 1, n)
+        ids = counter_ids(counter, n, id_prefix).astype("U").tolist()
+        counter += n
+        yield {"date": str(date), "items": [
+            {
+                "id": item_id,
+                "timestamp": timestamp,
+                "title": MOCK_TITLES[title],
+                "description": MOCK_DESCRIPTIONS[title],
+                "graph_analysis": MOCK_GRAPH_ANALYSIS[graph_analysis],
+                "nodes_affected": [MOCK_NODES_AFFECTED[title][k] for k in nodes[:node_count]],
+                "tags": [MOCK_TAGS[k] for k in tags[:tag_count]],
+            }
+            for item_id, timestamp, title, graph_analysis, nodes, node_count, tags, tag_count in zip(
+                ids, timestamps, titles.tolist(), graph_analyses.tolist(), node_order.tolist(),
+                nodes_per_item.tolist(), tag_order.tolist(), tags_per_item.tolist())
+        ]}
+
+def write_mock_daily_summaries_jsonl(path, start_date_str, num_days, items_per_day=50, seed=0):
+    """Streams mock daily summaries to `path`, one JSON summary per line; returns the number of items written."""
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for summary in iter_mock_daily_summaries(start_date_str, num_days, items_per_day, seed):
+            f.write(json.dumps(summary) + "\n")
+            written += len(summary["items"])
+    return written
+
+def generate_mock_retrospective_summary(daily_summaries, target_tags, start_date_str, end_date_str, index=None):
+    """
+    Generates a mock retrospective summary based on daily summaries and target tags.
+    Relevant items (any of `target_tags`, dated within the range) are looked up in a TagIndex of
+    daily summary items: either `index`, an existing one, or one built from `daily_summaries`.
+    Pass exactly one of them (`daily_summaries=None` with an index).
+    """
+    if (index is None) == (daily_summaries is None):
+        raise ValueError("Pass either daily_summaries or an index of them, not both.")
+    if index is None:
+        index = TagIndex()
+        for summary in daily_summaries:
+            index.add_daily_summary(summary)
+
+    relevant_items = index.items(any_tags=target_tags, start=start_date_str, end=end_date_str)
+    daily_summary_ids_used = index.days(start_date_str, end_date_str) # Using date as ID for simplicity here
 
     insight_summary = f"Retrospective analysis for tags: {', '.join(target_tags)}. "
     if relevant_items:
@@ -136,8 +216,6 @@ def generate_mock_retrospective_summary(daily_summaries, target_tags, start_date
     }
 
 if __name__ == "__main__":
-    import json
-
     # Generate sample daily summaries
     mock_daily_summaries = []
     start_date = datetime.now() - timedelta(days=5)
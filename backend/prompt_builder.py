@@ -0,0 +1,171 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable
+
+# Rough token estimate: Gemini/English text averages about 4 characters per token.
+CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4"))
+# Maximum estimated tokens for a single prompt sent to the LLM.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "24000"))
+# Number of "map" LLM calls run concurrently when an input has to be split.
+PROMPT_MAP_CONCURRENCY = int(os.getenv("PROMPT_MAP_CONCURRENCY", "4"))
+# Reduce rounds before the remaining text is truncated to fit (guards against non-shrinking outputs).
+MAX_REDUCE_DEPTH = 3
+
+SEPARATOR = "\n\n---\n\n"
+
+MAP_INSTRUCTION = (
+    "The following is part {index} of {total} of a larger input. Summarize it concisely, "
+    "keeping every distinct issue, affected component and notable number, so it can be "
+    "combined with summaries of the other parts:\n\n"
+)
+
+
+def _format_map_instruction(map_instruction: str, index: int, total: int) -> str:
+    # str.replace rather than str.format: instructions may embed user text containing braces.
+    return map_instruction.replace("{index}", str(index)).replace("{total}", str(total))
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def fits_budget(prompt: str, budget_tokens: int = PROMPT_TOKEN_BUDGET) -> bool:
+    return estimate_tokens(prompt) <= budget_tokens
+
+
+def chunk_texts(texts: list[str], budget_tokens: int, separator: str = SEPARATOR) -> list[list[str]]:
+    """
+    Packs `texts` in order into chunks whose joined size fits `budget_tokens`.
+    A single text larger than the budget is split into several pieces.
+    Raises ValueError if `budget_tokens` is not positive.
+    """
+    if budget_tokens < 1:
+        raise ValueError(f"budget_tokens must be at least 1, got {budget_tokens}.")
+    # estimate_tokens rounds up, so a piece of (budget - 1) * CHARS_PER_TOKEN characters is the longest that fits.
+    max_chars = max(1, int((budget_tokens - 1) * CHARS_PER_TOKEN))
+    separator_tokens = estimate_tokens(separator)
+    chunks: list[list[str]] = []
+    current: list[str] = []
+    current_tokens = 0
+    for text in texts:
+        pieces = [text[i:i + max_chars] for i in range(0, len(text), max_chars)] or [text]
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece) + (separator_tokens if current else 0)
+            if current and current_tokens + piece_tokens > budget_tokens:
+                chunks.append(current)
+                current, current_tokens = [], 0
+                piece_tokens = estimate_tokens(piece)
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _plan_round(instruction: str, texts: list[str], budget_tokens: int, map_instruction: str,
+                separator: str, depth: int) -> tuple[str | None, list[str]]:
+    """
+    One round of map-reduce planning. Returns (final_prompt, []) when the prompt fits the budget
+    (or must be truncated to fit), otherwise (None, map_prompts) for the chunks to summarize first.
+    """
+    joined = separator.join(texts)
+    if fits_budget(instruction + joined, budget_tokens):
+        return instruction + joined, []
+
+    available = budget_tokens - estimate_tokens(instruction)
+    map_budget = budget_tokens - estimate_tokens(_format_map_instruction(map_instruction, len(texts), len(texts)))
+    if depth >= MAX_REDUCE_DEPTH or available <= 0 or map_budget <= 0:
+        # Map outputs are not shrinking (or the instructions alone use up the budget);
+        # keep as much as fits rather than overflowing the context.
+        max_chars = max(0, int(available * CHARS_PER_TOKEN))
+        return instruction + joined[:max_chars], []
+
+    chunks = chunk_texts(texts, map_budget, separator)
+    return None, [
+        _format_map_instruction(map_instruction, i + 1, len(chunks)) + separator.join(chunk)
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def build_reduced_prompt(
+    instruction: str,
+    texts: list[str],
+    invoke: Callable[[str], str],
+    budget_tokens: int = PROMPT_TOKEN_BUDGET,
+    max_workers: int = PROMPT_MAP_CONCURRENCY,
+    map_instruction: str = MAP_INSTRUCTION,
+    separator: str = SEPARATOR,
+) -> str:
+    """
+    Returns the final prompt for `instruction` over `texts` that fits the token budget.
+
+    That is `instruction + separator.join(texts)` when it fits. Otherwise the texts are split
+    into chunks that fit, each chunk is summarized with `map_instruction` through `invoke`
+    (the "map" calls run concurrently, up to `max_workers` at a time), and the prompt is built
+    over the chunk summaries instead, repeating if they still do not fit.
+    """
+    depth = 0
+    while True:
+        final_prompt, map_prompts = _plan_round(instruction, texts, budget_tokens, map_instruction, separator, depth)
+        if final_prompt is not None:
+            return final_prompt
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(map_prompts)))) as executor:
+            chunk_summaries = list(executor.map(invoke, map_prompts))  # map() keeps chunk order
+        # Chunk summaries are free text, so they are always joined with the default separator.
+        texts, separator, depth = [s for s in chunk_summaries if s], SEPARATOR, depth + 1
+
+
+async def abuild_reduced_prompt(
+    instruction: str,
+    texts: list[str],
+    ainvoke: Callable[[str], Awaitable[str]],
+    budget_tokens: int = PROMPT_TOKEN_BUDGET,
+    max_workers: int = PROMPT_MAP_CONCURRENCY,
+    map_instruction: str = MAP_INSTRUCTION,
+    separator: str = SEPARATOR,
+) -> str:
+    """Async version of `build_reduced_prompt`: map calls are awaited concurrently on the event loop."""
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+
+    async def summarize_chunk(prompt: str) -> str:
+        async with semaphore:
+            return await ainvoke(prompt)
+
+    depth = 0
+    while True:
+        final_prompt, map_prompts = _plan_round(instruction, texts, budget_tokens, map_instruction, separator, depth)
+        if final_prompt is not None:
+            return final_prompt
+        chunk_summaries = await asyncio.gather(*(summarize_chunk(p) for p in map_prompts))  # keeps chunk order
+        texts, separator, depth = [s for s in chunk_summaries if s], SEPARATOR, depth + 1
+
+
+def map_reduce_prompt(
+    instruction: str,
+    texts: list[str],
+    invoke: Callable[[str], str],
+    budget_tokens: int = PROMPT_TOKEN_BUDGET,
+    max_workers: int = PROMPT_MAP_CONCURRENCY,
+    map_instruction: str = MAP_INSTRUCTION,
+    separator: str = SEPARATOR,
+) -> str:
+    """
+    Returns `invoke(instruction + separator.join(texts))` when that prompt fits the token budget,
+    otherwise map-reduces the texts first (see `build_reduced_prompt`) and invokes the reduce prompt.
+    """
+    return invoke(build_reduced_prompt(instruction, texts, invoke, budget_tokens, max_workers, map_instruction, separator))
+
+
+async def amap_reduce_prompt(
+    instruction: str,
+    texts: list[str],
+    ainvoke: Callable[[str], Awaitable[str]],
+    budget_tokens: int = PROMPT_TOKEN_BUDGET,
+    max_workers: int = PROMPT_MAP_CONCURRENCY,
+    map_instruction: str = MAP_INSTRUCTION,
+    separator: str = SEPARATOR,
+) -> str:
+    """Async version of `map_reduce_prompt`."""
+    prompt = await abuild_reduced_prompt(instruction, texts, ainvoke, budget_tokens, max_workers, map_instruction, separator)
+    return await ainvoke(prompt)
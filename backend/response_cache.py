@@ -0,0 +1,58 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# Serialized responses kept per cache, least recently used evicted first.
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+# Bodies smaller than this are sent uncompressed (gzip would not save a packet).
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "512"))
+
+
+class SerializedResponse:
+    """A JSON body serialized once, its gzip encoding (if worth it), ETag and extra headers."""
+    __slots__ = ("body", "gzipped", "etag", "headers")
+
+    def __init__(self, payload: Any, headers: dict | None = None):
+        self.body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, compresslevel=6, mtime=0) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.headers = headers or {}
+
+
+class ResponseCache:
+    """
+    Serialized (and pre-compressed) JSON responses keyed by request parameters. `invalidate()`
+    drops every entry; call it whenever the data behind the responses changes. An entry built
+    while an invalidation happens is not stored, so a stale page is never cached.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, SerializedResponse]" = OrderedDict()
+        self._max_entries = max_entries
+        self.version = 0
+
+    def get(self, key: Hashable, build: Callable[[], tuple[Any, dict]]) -> SerializedResponse:
+        """The cached response for `key`, or one serialized from `build()`, which returns (payload, headers)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            version = self.version
+        entry = SerializedResponse(*build())
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = entry
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
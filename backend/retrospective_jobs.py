@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Hashable
+
+# Worker threads that run retrospective jobs (each one mostly waits on the LLM).
+RETROSPECTIVE_JOB_WORKERS = int(os.getenv("RETROSPECTIVE_JOB_WORKERS", "4"))
+# How long finished jobs can still be polled, and how many are remembered at most.
+RETROSPECTIVE_JOB_TTL_SECONDS = float(os.getenv("RETROSPECTIVE_JOB_TTL_SECONDS", "600"))
+MAX_FINISHED_JOBS = 1000
+
+
+class RetrospectiveJob:
+    """One background retrospective generation for a (thread, state version) key."""
+
+    def __init__(self, key: Hashable, thread_id: str, version):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.thread_id = thread_id
+        self.version = version
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.created_at = time.time()
+        self.finished_at = None
+        self.future: Future | None = None
+
+    def result(self, timeout: float | None = None):
+        """Waits up to `timeout` seconds for the job. Raises TimeoutError, or the job's exception."""
+        return self.future.result(timeout)
+
+    async def aresult(self, timeout: float | None = None):
+        """Async version of `result`."""
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.future)), timeout)
+
+    def to_dict(self) -> dict:
+        job = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "version": self.version,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == "succeeded":
+            job["result"] = self.future.result()
+        elif self.status == "failed":
+            job["error"] = str(self.future.exception())
+        return job
+
+
+class RetrospectiveJobQueue:
+    """
+    Runs retrospective generation in the background with single-flight coalescing:
+    while a job for a (thread_id, version) key is queued or running, submitting the same
+    key again returns that job instead of starting another, so any number of concurrent
+    viewers of one state version cost one generation (one set of LLM calls).
+    """
+
+    def __init__(self, max_workers: int = RETROSPECTIVE_JOB_WORKERS, ttl_seconds: float = RETROSPECTIVE_JOB_TTL_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="retrospective-job")
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._jobs: dict[str, RetrospectiveJob] = {}  # job_id -> job, in creation order
+        self._in_flight: dict[Hashable, RetrospectiveJob] = {}  # key -> unfinished job
+
+    def _join_or_create(self, thread_id: str, version) -> tuple[RetrospectiveJob, bool]:
+        key = (thread_id, version)
+        job = self._in_flight.get(key)
+        if job is not None:
+            return job, False
+        self._prune_locked()
+        job = RetrospectiveJob(key, thread_id, version)
+        self._jobs[job.job_id] = job
+        self._in_flight[key] = job
+        return job, True
+
+    def submit(self, thread_id: str, version, func: Callable[[], Any]) -> tuple[RetrospectiveJob, bool]:
+        """
+        Returns (job, created). `func` runs on a worker thread only if no job for
+        (thread_id, version) is in flight; otherwise the existing job is returned.
+        """
+        with self._lock:
+            job, created = self._join_or_create(thread_id, version)
+            if created:
+                job.future = self._executor.submit(self._run, job, func)
+            return job, created
+
+    def submit_coroutine(self, thread_id: str, version, coro_func: Callable[[], Awaitable[Any]],
+                         loop: asyncio.AbstractEventLoop) -> tuple[RetrospectiveJob, bool]:
+        """Like `submit`, but runs `coro_func()` as a task on `loop` instead of a worker thread."""
+        with self._lock:
+            job, created = self._join_or_create(thread_id, version)
+            if created:
+                job.future = asyncio.run_coroutine_threadsafe(self._arun(job, coro_func), loop)
+            return job, created
+
+    def get(self, job_id: str) -> RetrospectiveJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: RetrospectiveJob, func: Callable[[], Any]):
+        job.status = "running"
+        try:
+            result = func()
+        except BaseException:
+            self._finish(job, "failed")
+            raise
+        self._finish(job, "succeeded")
+        return result
+
+    async def _arun(self, job: RetrospectiveJob, coro_func: Callable[[], Awaitable[Any]]):
+        job.status = "running"
+        try:
+            result = await coro_func()
+        except BaseException:
+            self._finish(job, "failed")
+            raise
+        self._finish(job, "succeeded")
+        return result
+
+    def _finish(self, job: RetrospectiveJob, status: str):
+        with self._lock:
+            job.finished_at = time.time()
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+        # The future resolves right after this returns; to_dict() waits for it if polled in between.
+        job.status = status
+
+    def _prune_locked(self):
+        """Forgets finished jobs older than the TTL, or the oldest ones beyond MAX_FINISHED_JOBS."""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for job in finished:
+            if excess > 0 or now - job.finished_at > self._ttl_seconds:
+                del self._jobs[job.job_id]
+                excess -= 1
+
+
+def retrospective_etag(thread_id: str, version, summary: str) -> str:
+    """ETag for a thread's retrospective at a summaries version (unquoted)."""
+    digest = hashlib.sha256(f"{thread_id}\0{version}\0{summary}".encode("utf-8")).hexdigest()[:32]
+    return f"{version}-{digest}"
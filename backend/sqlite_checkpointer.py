@@ -0,0 +1,480 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".checkpoints.sqlite3")
+
+# Blob type used in place of a serialized value for append-only channels; the blob data is the list length.
+APPEND_ONLY_MARKER = "__append_only__"
+# Append-only list versions kept in memory per thread (the latest ones are the ones read again).
+CACHED_VERSIONS_PER_THREAD = 8
+# SQLite's default limit on host parameters is 999; stay well below it for IN (...) lists.
+_MAX_IN_PARAMS = 500
+
+
+class AppendOnlySqliteSaver(BaseCheckpointSaver[str]):
+    """
+    Persistent LangGraph checkpointer backed by SQLite in WAL mode.
+
+    Like the in-memory saver, a channel's value is only stored when its version changes.
+    Channels listed in `append_only_channels` (lists that are only ever appended to, such as
+    `daily_summaries`) are not re-serialized in full on every checkpoint. A new version of such a
+    list is stored as a reference to the version it extends (the channel's version in the parent
+    checkpoint) plus the items added since, one row per item, so saving a checkpoint is
+    O(new items) rather than O(history). Versions form a tree, so forks (update_state from an
+    earlier checkpoint) and time travel keep their own items. A value that does not extend its
+    parent's value (the list shrank or an earlier item changed) is stored as a new base with all
+    of its items.
+
+    Append-only lists are rebuilt lazily when a checkpoint is read by following that chain of
+    versions, and the latest versions read or written are kept in memory so later reads only
+    fetch rows added since. That in-memory state is bounded: at most `max_cached_threads` threads
+    are kept, least recently used first out, and threads idle for longer than `cache_idle_seconds`
+    are dropped. Everything is already on disk, so an evicted thread is simply reloaded from
+    SQLite the next time it is read.
+
+    Every `put` runs in a single transaction, so after a crash the database holds exactly the
+    checkpoints that were committed and state resumes from the latest of them on restart.
+    """
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, append_only_channels: Sequence[str] = ("daily_summaries",), *,
+                 max_cached_threads: int = 256, cache_idle_seconds: float | None = 1800, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.append_only_channels = set(append_only_channels)
+        self.max_cached_threads = max_cached_threads
+        self.cache_idle_seconds = cache_idle_seconds
+        self._local = threading.local()  # one sqlite3 connection per thread
+        # thread_id -> (last access time, {(checkpoint_ns, channel, version): items}), least recently used first.
+        # Versions are immutable, so a cached list stays valid until the thread is deleted.
+        self._append_cache: OrderedDict[str, tuple[float, OrderedDict[tuple[str, str, str], list]]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._create_schema()
+
+    # --- Storage helpers ---
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                checkpoint_type TEXT NOT NULL,
+                checkpoint BLOB NOT NULL,
+                metadata_type TEXT NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                data BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS append_versions (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                base_version TEXT,
+                length INTEGER NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS append_segments (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                data BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version, seq)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT NOT NULL,
+                data BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+        """)
+
+    def _write_transaction(self, fn, *args):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn, *args)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _parent_versions(self, conn, thread_id: str, checkpoint_ns: str, parent_checkpoint_id: str | None) -> ChannelVersions:
+        """Channel versions of the checkpoint a new checkpoint is written on top of."""
+        if not parent_checkpoint_id:
+            return {}
+        row = conn.execute(
+            "SELECT checkpoint_type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, parent_checkpoint_id),
+        ).fetchone()
+        return self.serde.loads_typed(row)["channel_versions"] if row else {}
+
+    def _dump_append_only(self, conn, thread_id: str, checkpoint_ns: str, channel: str, version: str,
+                          value: list, base_version: str | None) -> tuple[str, bytes]:
+        base = None if base_version is None else self._load_append_only(thread_id, checkpoint_ns, channel, base_version, conn)
+        # Items are usually the very objects of the parent's list, so this mostly compares identities.
+        if base is None or len(value) < len(base) or value[:len(base)] != base:
+            base_version, base = None, []  # not an append to the parent's value: store a new base
+        conn.execute(
+            "INSERT OR REPLACE INTO append_versions (thread_id, checkpoint_ns, channel, version, base_version, length) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (thread_id, checkpoint_ns, channel, version, base_version, len(value)),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO append_segments (thread_id, checkpoint_ns, channel, version, seq, type, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(thread_id, checkpoint_ns, channel, version, seq, *self.serde.dumps_typed(item))
+             for seq, item in enumerate(value[len(base):], start=len(base))],
+        )
+        return APPEND_ONLY_MARKER, str(len(value)).encode()
+
+    def _evict_locked(self, now: float):
+        while self._append_cache and len(self._append_cache) > self.max_cached_threads:
+            self._append_cache.popitem(last=False)
+        if self.cache_idle_seconds is not None:
+            while self._append_cache:
+                last_access, _ = next(iter(self._append_cache.values()))
+                if now - last_access <= self.cache_idle_seconds:
+                    break
+                self._append_cache.popitem(last=False)
+
+    def evict_idle_threads(self):
+        """Drops cached state of threads idle for longer than `cache_idle_seconds`."""
+        with self._cache_lock:
+            self._evict_locked(time.monotonic())
+
+    def cached_thread_count(self) -> int:
+        with self._cache_lock:
+            return len(self._append_cache)
+
+    def _thread_cache_locked(self, thread_id: str) -> OrderedDict:
+        now = time.monotonic()
+        _, thread_cache = self._append_cache.pop(thread_id, (now, OrderedDict()))
+        self._append_cache[thread_id] = (now, thread_cache)  # (re)insert as most recently used
+        self._evict_locked(now)
+        return thread_cache
+
+    def _cache_version(self, thread_id: str, key: tuple[str, str, str], items: list):
+        with self._cache_lock:
+            thread_cache = self._thread_cache_locked(thread_id)
+            thread_cache[key] = items
+            thread_cache.move_to_end(key)
+            while len(thread_cache) > CACHED_VERSIONS_PER_THREAD:
+                thread_cache.popitem(last=False)
+
+    def _load_append_only(self, thread_id: str, checkpoint_ns: str, channel: str, version: str, conn=None) -> list | None:
+        """Rebuilds the list stored for `version` (a copy), or returns None if that version is unknown."""
+        conn = conn or self._connection()
+        with self._cache_lock:
+            thread_cache = self._thread_cache_locked(thread_id)
+            cached = {v: items for (ns, ch, v), items in thread_cache.items() if ns == checkpoint_ns and ch == channel}
+        if version in cached:
+            self._cache_version(thread_id, (checkpoint_ns, channel, version), cached[version])
+            return list(cached[version])
+
+        # Follow the chain of base versions back to a cached version or to a stored base.
+        segments: list[str] = []
+        prefix: list = []
+        next_version = version
+        while next_version is not None:
+            if next_version in cached:
+                prefix = cached[next_version]
+                break
+            row = conn.execute(
+                "SELECT base_version FROM append_versions WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, next_version),
+            ).fetchone()
+            if row is None:
+                if next_version == version:
+                    return None
+                raise ValueError(f"Checkpoint data of channel '{channel}' in thread '{thread_id}' is missing version {next_version}.")
+            segments.append(next_version)
+            next_version = row[0]
+
+        # Each version in the chain holds the items from its base's length up to its own length,
+        # so ordering the rows of all of them by seq rebuilds the list.
+        rows = []
+        for i in range(0, len(segments), _MAX_IN_PARAMS):
+            batch = segments[i:i + _MAX_IN_PARAMS]
+            rows.extend(conn.execute(
+                "SELECT seq, type, data FROM append_segments WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? "
+                f"AND version IN ({', '.join('?' * len(batch))})",
+                (thread_id, checkpoint_ns, channel, *batch),
+            ).fetchall())
+        rows.sort(key=lambda row: row[0])
+        items = list(prefix)
+        items.extend(self.serde.loads_typed((type_, data)) for _, type_, data in rows)
+        self._cache_version(thread_id, (checkpoint_ns, channel, version), items)
+        return list(items)
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        conn = self._connection()
+        values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT type, data FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                continue
+            if row[0] == APPEND_ONLY_MARKER:
+                values[channel] = self._load_append_only(thread_id, checkpoint_ns, channel, str(version))
+            else:
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _make_tuple(self, thread_id: str, checkpoint_ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint_data, metadata_type, metadata_data = row
+        checkpoint: Checkpoint = self.serde.loads_typed((checkpoint_type, checkpoint_data))
+        writes = self._connection().execute(
+            "SELECT task_id, channel, type, data FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"])},
+            metadata=self.serde.loads_typed((metadata_type, metadata_data)),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((type_, data))) for task_id, channel, type_, data in writes],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+                if parent_checkpoint_id else None
+            ),
+        )
+
+    def _checkpoint_row(self, config: RunnableConfig):
+        """The checkpoints row for `config`'s checkpoint id, or the thread's latest one without an id."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata"
+        if checkpoint_id := get_checkpoint_id(config):
+            return self._connection().execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        return self._connection().execute(
+            f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+            (thread_id, checkpoint_ns),
+        ).fetchone()
+
+    def get_channel_values(self, config: RunnableConfig, channels: Sequence[str]) -> dict[str, Any] | None:
+        """
+        The values of only `channels` in the checkpoint `get_tuple(config)` returns (None if there is none),
+        e.g. to read a counter without rebuilding a long append-only list.
+        """
+        row = self._checkpoint_row(config)
+        if row is None:
+            return None
+        checkpoint: Checkpoint = self.serde.loads_typed((row[2], row[3]))
+        versions = {channel: version for channel, version in checkpoint["channel_versions"].items() if channel in channels}
+        return self._load_blobs(config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""), versions)
+
+    # --- BaseCheckpointSaver interface ---
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        row = self._checkpoint_row(config)
+        if row is None:
+            return None
+        return self._make_tuple(config["configurable"]["thread_id"], config["configurable"].get("checkpoint_ns", ""), row)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints")
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        for thread_id, checkpoint_ns, *row in self._connection().execute(query, params).fetchall():
+            if limit is not None and limit <= 0:
+                break
+            checkpoint_tuple = self._make_tuple(thread_id, checkpoint_ns, row)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored_checkpoint = checkpoint.copy()
+        values: dict[str, Any] = stored_checkpoint.pop("channel_values")  # type: ignore[misc]
+
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        appended: dict[tuple[str, str, str], list] = {}
+
+        def write(conn):
+            parent_versions = None
+            for channel, version in new_versions.items():
+                value = values.get(channel)
+                if channel not in values:
+                    type_, data = "empty", None
+                elif channel in self.append_only_channels and isinstance(value, list):
+                    if parent_versions is None:
+                        parent_versions = self._parent_versions(conn, thread_id, checkpoint_ns, parent_checkpoint_id)
+                    base_version = parent_versions.get(channel)
+                    type_, data = self._dump_append_only(conn, thread_id, checkpoint_ns, channel, str(version), value,
+                                                         None if base_version is None else str(base_version))
+                    appended[(checkpoint_ns, channel, str(version))] = list(value)
+                else:
+                    type_, data = self.serde.dumps_typed(value)
+                conn.execute(
+                    "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, type, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), type_, data),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], parent_checkpoint_id,
+                 *self.serde.dumps_typed(stored_checkpoint),
+                 *self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))),
+            )
+
+        self._write_transaction(write)
+        # The next checkpoint usually extends this one, so keep the lists just written in memory.
+        for key, items in appended.items():
+            self._cache_version(thread_id, key, items)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        def write(conn):
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                # Regular writes are idempotent per (task, idx); special writes (negative idx) are replaced.
+                verb = "INSERT OR IGNORE" if write_idx >= 0 else "INSERT OR REPLACE"
+                conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, data, task_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel, *self.serde.dumps_typed(value), task_path),
+                )
+
+        self._write_transaction(write)
+
+    def delete_thread(self, thread_id: str) -> None:
+        def delete(conn):
+            for table in ("checkpoints", "blobs", "append_versions", "append_segments", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+        self._write_transaction(delete)
+        with self._cache_lock:
+            self._append_cache.pop(thread_id, None)
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same scheme as the in-memory saver: zero-padded counter plus a random tie-breaker.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- Async interface: run the sync implementation off the event loop ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Mapping
+
+from tag_index import TagIndex, day_key
+
+# Item types of the statistics view (ItemType in types.ts); entries submitted without one are notes.
+ITEM_TYPES = ("Incidents", "Alerts", "Tasks", "Notes")
+DEFAULT_ITEM_TYPE = "Notes"
+UNTAGGED = "Uncategorized"
+# Pie chart colours of the oncall load categories, in order of load.
+LOAD_COLORS = ("#8b5cf6", "#f97316", "#3b82f6", "#10b981", "#ef4444")
+OTHER_LOAD_COLOR = "#94a3b8"
+
+_TYPE_ALIASES = {alias: item_type for item_type in ITEM_TYPES
+                 for alias in (item_type.lower(), item_type.lower()[:-1])}  # "incidents", "incident", ...
+
+
+def entry_fields(data: dict, today: date | None = None) -> dict:
+    """
+    The optional statistics fields of a submitted daily entry, validated and normalized:
+    "date" (YYYY-MM-DD, default today), "type" (one of ITEM_TYPES, singular or any case),
+    "tags" (list of strings) and "duration_minutes" (time spent, >= 0).
+    The date is always filled in so that statistics rebuilt from stored entries match.
+    Raises ValueError for invalid values.
+    """
+    fields = {}
+    raw_date = data.get("date") or (today or date.today())
+    try:
+        fields["date"] = day_key(raw_date if isinstance(raw_date, (date, datetime)) else date.fromisoformat(day_key(raw_date)))
+    except (TypeError, ValueError):
+        raise ValueError("'date' must be an ISO date (YYYY-MM-DD).")
+    if data.get("type") is not None:
+        item_type = _TYPE_ALIASES.get(str(data["type"]).lower())
+        if item_type is None:
+            raise ValueError(f"'type' must be one of {', '.join(ITEM_TYPES)}.")
+        fields["type"] = item_type
+    if data.get("tags") is not None:
+        if not isinstance(data["tags"], list) or not all(isinstance(tag, str) and tag for tag in data["tags"]):
+            raise ValueError("'tags' must be a list of non-empty strings.")
+        fields["tags"] = list(dict.fromkeys(data["tags"]))
+    if data.get("duration_minutes") is not None:
+        duration = data["duration_minutes"]
+        if not isinstance(duration, (int, float)) or isinstance(duration, bool) or not 0 <= duration < float("inf"):
+            raise ValueError("'duration_minutes' must be a non-negative number.")
+        fields["duration_minutes"] = duration
+    return fields
+
+
+def entry_scope(args: Mapping) -> dict | None:
+    """
+    The window and tags of a scoped request (query parameters `start` and `end`, inclusive
+    YYYY-MM-DD days, either may be omitted; `tags`, comma-separated; `match`, "any" (default)
+    or "all" of the tags), or None if the request has none of them. Raises ValueError.
+    """
+    start, end, tags = args.get("start") or None, args.get("end") or None, args.get("tags") or ""
+    if start is None and end is None and not tags:
+        return None
+    for name, value in (("start", start), ("end", end)):
+        if value is not None:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"'{name}' must be an ISO date (YYYY-MM-DD).")
+    if start is not None and end is not None and start > end:
+        raise ValueError("'start' must not be after 'end'.")
+    match = args.get("match", "any")
+    if match not in ("any", "all"):
+        raise ValueError("'match' must be 'any' or 'all'.")
+    return {"start": start, "end": end, "tags": [tag for tag in dict.fromkeys(tags.split(",")) if tag], "match": match}
+
+
+def scope_filters(scope: dict) -> dict:
+    """TagIndex query filters for an entry_scope."""
+    tags = scope["tags"] or None
+    return {"start": scope["start"], "end": scope["end"],
+            "any_tags": tags if scope["match"] == "any" else None,
+            "all_tags": tags if scope["match"] == "all" else None}
+
+
+def scope_key(scope: dict) -> str:
+    """Short stable key of a scope, for job coalescing and ETags."""
+    return hashlib.sha256(json.dumps(scope, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class SummaryStats:
+    """
+    Counters over a thread's daily entries: per tag, per type, per day and type, and oncall
+    minutes per primary (first) tag. Adding an entry updates a few counters; reading walks
+    the buckets (tags, types, the requested days), never the entries themselves.
+    `index` is a TagIndex of the entries (id = position in daily_summaries) by tag and date,
+    for selecting the entries of a window and tags without scanning the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entry_count = 0
+        self._tag_counts: Counter = Counter()
+        self._type_counts: Counter = Counter()
+        self._day_type_counts: dict[str, Counter] = {}
+        self._tag_minutes: Counter = Counter()
+        self._total_minutes = 0.0
+        self.index = TagIndex()
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[dict]) -> "SummaryStats":
+        stats = cls()
+        stats.add_entries(entries)
+        return stats
+
+    def add_entries(self, entries: Iterable[dict]):
+        """Counts stored daily entries; entries without a date (stored before dates were recorded) count under their type only."""
+        with self._lock:
+            for entry in entries:
+                tags = entry.get("tags") or [UNTAGGED]
+                item_type = entry.get("type", DEFAULT_ITEM_TYPE)
+                self.index.add(self.entry_count, tags, entry.get("date") or "", entry)  # undated: only in unbounded queries
+                self._tag_counts.update(tags)
+                self._type_counts[item_type] += 1
+                if entry.get("date"):
+                    self._day_type_counts.setdefault(entry["date"], Counter())[item_type] += 1
+                minutes = entry.get("duration_minutes") or 0
+                if minutes:
+                    self._tag_minutes[tags[0]] += minutes
+                    self._total_minutes += minutes
+                self.entry_count += 1
+
+    def to_dict(self, today: date | None = None, top_tags: int = 5, trend_days: int = 7, load_categories: int = 5) -> dict:
+        """The counters in the shape of StatisticalInsightsData (types.ts), without presentation fields."""
+        today = today or date.today()
+        with self._lock:
+            weekly_trend = []
+            for offset in range(trend_days - 1, -1, -1):
+                day = today - timedelta(days=offset)
+                counts = self._day_type_counts.get(day.isoformat(), Counter())
+                weekly_trend.append({"day": day.strftime("%a"), "date": day.isoformat(),
+                                     **{item_type.lower(): counts[item_type] for item_type in ITEM_TYPES}})
+            load = self._tag_minutes.most_common()
+            oncall_load = [{"name": tag, "value": round(minutes / 60, 1), "color": color}
+                           for (tag, minutes), color in zip(load[:load_categories], LOAD_COLORS)]
+            other_minutes = sum(minutes for _, minutes in load[load_categories:])
+            if other_minutes:
+                oncall_load.append({"name": "Other", "value": round(other_minutes / 60, 1), "color": OTHER_LOAD_COLOR})
+            return {
+                "topTagsByCount": [{"tag": tag, "count": count} for tag, count in self._tag_counts.most_common(top_tags)],
+                "itemCountsByType": [{"type": item_type, "count": self._type_counts[item_type]} for item_type in ITEM_TYPES],
+                "weeklyTrend": weekly_trend,
+                "oncallLoadDistribution": oncall_load,
+                "totalOncallTime": round(self._total_minutes / 60, 1),
+                "entryCount": self.entry_count,
+            }
+
+
+class SummaryStatsRegistry:
+    """
+    SummaryStats (counters and entry index) per graph thread. Submits record their entries as they are appended; a thread
+    whose counters are missing (e.g. after a restart) or behind its stored entries (written by
+    another process) is rebuilt or caught up from the stored daily_summaries when read. Reads
+    compare the counters with the thread's summaries_version, so the stored entries are only
+    loaded when they don't match.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, SummaryStats] = {}
+
+    def record(self, thread_id: str, entries: list[dict], start_count: int):
+        """
+        Counts `entries`, appended at position `start_count` of the thread's daily_summaries, if the counters are at that position.
+        `start_count` must come from the write itself (the state it produced), not from a later read.
+        """
+        with self._lock:
+            stats = self._stats.get(thread_id)
+            if stats is not None and stats.entry_count == start_count:
+                stats.add_entries(entries)
+
+    def get(self, thread_id: str, stored_count: int, load_entries: Callable[[], list[dict]]) -> SummaryStats:
+        """
+        The thread's counters, brought in line with its stored entries (append-only, so only the tail is new).
+        `stored_count` is the number of stored entries (the thread's summaries_version); `load_entries()`
+        returns the stored entries and is only called when the counters don't match that count.
+        """
+        with self._lock:
+            stats = self._stats.get(thread_id)
+            if stats is not None and stats.entry_count == stored_count:
+                return stats
+            stored_entries = load_entries()
+            if stats is None or stats.entry_count > len(stored_entries):
+                stats = self._stats[thread_id] = SummaryStats.from_entries(stored_entries)
+            elif stats.entry_count < len(stored_entries):
+                stats.add_entries(stored_entries[stats.entry_count:])
+            return stats
@@ -0,0 +1,182 @@
+import bisect
+import re
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Hashable, Iterable, Iterator, List
+
+# Positions of the set bits in each byte value, lowest first.
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+
+def day_key(day: str | date | datetime) -> str:
+    """'YYYY-MM-DD' for a date, datetime or ISO timestamp string (ISO days sort chronologically)."""
+    if isinstance(day, (date, datetime)):
+        return day.isoformat()[:10]
+    return day[:10]
+
+
+class _Bitmap:
+    """
+    A growable bitmap over item positions; set/clear are O(1), algebra goes through Python ints.
+    Bytes before the first set bit are not stored, so a bitmap over a narrow span of positions
+    (e.g. one day's items, which mostly arrive together) stays small however many items precede it.
+    """
+    __slots__ = ("bits", "offset")
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.offset = 0  # byte index of bits[0]
+
+    def set(self, position: int):
+        byte = position >> 3
+        if not self.bits:
+            self.offset = byte
+        elif byte < self.offset:
+            self.bits[:0] = bytes(self.offset - byte)
+            self.offset = byte
+        byte -= self.offset
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(max(byte + 1 - len(self.bits), len(self.bits))))  # grow by doubling
+        self.bits[byte] |= 1 << (position & 7)
+
+    def clear(self, position: int):
+        byte = (position >> 3) - self.offset
+        if 0 <= byte < len(self.bits):
+            self.bits[byte] &= ~(1 << (position & 7)) & 0xFF
+
+    def to_int(self) -> int:
+        return int.from_bytes(self.bits, "little") << (8 * self.offset)
+
+
+def iter_positions(bitmap: int) -> Iterator[int]:
+    """Set bit positions of `bitmap`, ascending. Runs of zero bytes are skipped by the regex engine."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for match in _NONZERO_BYTE.finditer(data):
+        base = match.start() * 8
+        for bit in _BYTE_BITS[data[match.start()]]:
+            yield base + bit
+
+
+class TagIndex:
+    """
+    Inverted index from tag -> bitmap of item positions, plus day -> bitmap, maintained as items
+    are added. Queries ("items with any/all of these tags between these days") combine a handful
+    of bitmaps with big-integer AND/OR, so they cost a few passes over n/8 bytes rather than a
+    per-item scan, and only the matching items are materialized.
+    Items are returned in the order they were added. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items: List[Any] = []
+        self._ids: List[Hashable] = []
+        self._entries: List[tuple[tuple[str, ...], str] | None] = []  # (tags, day) per position; None once discarded
+        self._position_of: Dict[Hashable, int] = {}
+        self._by_tag: Dict[str, _Bitmap] = {}
+        self._by_day: Dict[str, _Bitmap] = {}
+        self._days: List[str] = []  # sorted keys of _by_day
+
+    def __len__(self) -> int:
+        return len(self._position_of)
+
+    def add(self, item_id: Hashable, tags: Iterable[str], day: str | date | datetime, item: Any = None) -> int:
+        """Indexes an item (replacing any earlier item with the same id) and returns its position."""
+        tags, day = tuple(dict.fromkeys(tags)), day_key(day)
+        with self._lock:
+            self.discard(item_id)
+            position = len(self._items)
+            self._items.append(item if item is not None else item_id)
+            self._ids.append(item_id)
+            self._entries.append((tags, day))
+            self._position_of[item_id] = position
+            for tag in tags:
+                self._by_tag.setdefault(tag, _Bitmap()).set(position)
+            if day not in self._by_day:
+                self._by_day[day] = _Bitmap()
+                bisect.insort(self._days, day)
+            self._by_day[day].set(position)
+            return position
+
+    def add_daily_summary(self, summary: dict):
+        """Indexes the items of a daily summary ({"date", "items": [{"id", "tags", ...}]}) under its date."""
+        with self._lock:
+            for item in summary["items"]:
+                self.add(item["id"], item.get("tags", ()), summary["date"], item)
+
+    def discard(self, item_id: Hashable):
+        """Removes an item from the index if present. Its position is not reused."""
+        with self._lock:
+            position = self._position_of.pop(item_id, None)
+            if position is None:
+                return
+            tags, day = self._entries[position]
+            for tag in tags:
+                self._by_tag[tag].clear(position)
+            self._by_day[day].clear(position)
+            self._items[position] = None
+            self._entries[position] = None
+
+    def tags(self) -> List[str]:
+        with self._lock:
+            return sorted(self._by_tag)
+
+    def days(self, start: str | date | datetime | None = None, end: str | date | datetime | None = None) -> List[str]:
+        """Days (inclusive range, either end open) that have had items, ascending."""
+        with self._lock:
+            lo = bisect.bisect_left(self._days, day_key(start)) if start is not None else 0
+            hi = bisect.bisect_right(self._days, day_key(end)) if end is not None else len(self._days)
+            return self._days[lo:hi]
+
+    def bitmap(self, any_tags: Iterable[str] | None = None, all_tags: Iterable[str] | None = None,
+               start: str | date | datetime | None = None, end: str | date | datetime | None = None) -> int:
+        """
+        Positions (as an int bitmap) of items that have at least one of `any_tags` and every one
+        of `all_tags`, on a day between `start` and `end` inclusive. Omitted filters match all.
+        """
+        with self._lock:
+            result = None
+            if any_tags is not None:
+                result = 0
+                for tag in set(any_tags):
+                    if tag in self._by_tag:
+                        result |= self._by_tag[tag].to_int()
+            for tag in set(all_tags or ()):
+                if tag not in self._by_tag:
+                    return 0
+                bits = self._by_tag[tag].to_int()
+                result = bits if result is None else result & bits
+            if start is not None or end is not None:
+                in_range = 0
+                for day in self.days(start, end):
+                    in_range |= self._by_day[day].to_int()
+                result = in_range if result is None else result & in_range
+            if result is None:  # no filters: every live item
+                result = 0
+                for day_bitmap in self._by_day.values():
+                    result |= day_bitmap.to_int()
+            return result
+
+    def count(self, **filters) -> int:
+        """Number of items matching `filters` (see bitmap)."""
+        return self.bitmap(**filters).bit_count()
+
+    def items(self, **filters) -> List[Any]:
+        """Items matching `filters` (see bitmap), in the order they were added."""
+        bitmap = self.bitmap(**filters)
+        with self._lock:
+            return [self._items[position] for position in iter_positions(bitmap)]
+
+    def items_by_day(self, **filters) -> Dict[str, List[Any]]:
+        """Items matching `filters` (see bitmap) grouped by day, days ascending, items in the order they were added."""
+        bitmap = self.bitmap(**filters)
+        with self._lock:
+            by_day: Dict[str, List[Any]] = {}
+            for position in iter_positions(bitmap):
+                by_day.setdefault(self._entries[position][1], []).append(self._items[position])
+            return dict(sorted(by_day.items()))
+
+    def item_ids(self, **filters) -> List[Hashable]:
+        bitmap = self.bitmap(**filters)
+        with self._lock:
+            return [self._ids[position] for position in iter_positions(bitmap)]
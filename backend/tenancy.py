@@ -0,0 +1,39 @@
+import re
+import threading
+from typing import Mapping
+
+# Each tenant (team, rotation or session) gets its own graph thread. The key is taken from the
+# X-Tenant-ID header or the tenant/team/session query parameter; requests without one share
+# DEFAULT_THREAD_ID, which is where all data lived before per-tenant threads existed.
+# Shared by the Flask (app.py) and ASGI (asgi_app.py) servers.
+DEFAULT_THREAD_ID = "global_retro_thread"
+TENANT_HEADER = "X-Tenant-ID"
+TENANT_QUERY_PARAMS = ("tenant", "team", "session")
+TENANT_KEY_PATTERN = re.compile(r"^[A-Za-z0-9_.:-]{1,128}$")
+
+class InvalidTenantKey(ValueError):
+    pass
+
+def thread_id_for_request(headers: Mapping, args: Mapping) -> str:
+    """Returns the graph thread id for the tenant key in a request's headers or query parameters."""
+    tenant_key = headers.get(TENANT_HEADER)
+    for param in TENANT_QUERY_PARAMS:
+        tenant_key = tenant_key or args.get(param)
+    if not tenant_key:
+        return DEFAULT_THREAD_ID
+    if not TENANT_KEY_PATTERN.match(tenant_key):
+        raise InvalidTenantKey("Tenant key must be 1-128 characters of letters, digits, '_', '.', ':' or '-'.")
+    return f"tenant:{tenant_key}"
+
+class ThreadLocks:
+    """
+    Serializes read-modify-write sequences on a graph thread's state within this process, such as
+    appending daily summaries and reporting their positions. Thread ids are hashed onto a fixed set
+    of locks, so memory stays bounded however many tenants there are. `factory` makes the locks
+    (asyncio.Lock for the ASGI server).
+    """
+    def __init__(self, stripes: int = 64, factory=threading.Lock):
+        self._locks = [factory() for _ in range(stripes)]
+
+    def __call__(self, thread_id: str):
+        return self._locks[hash(thread_id) % len(self._locks)]
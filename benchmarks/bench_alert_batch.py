@@ -0,0 +1,63 @@
+"""
+Benchmark: memory and enrich/group time for a list of AlertItems vs an AlertBatch.
+
+Generates --alerts mock alerts, measures the memory each representation holds per
+alert (tracemalloc), then times enrich_alert_items + group_alerts_into_summaries on both.
+
+Run from the repository root:
+    python benchmarks/bench_alert_batch.py --alerts 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data_generator import generate_random_alert_item, enrich_alert_items, group_alerts_into_summaries
+from src.models import AlertBatch
+
+
+def traced_bytes(build):
+    """Returns (result, bytes still allocated by build())."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=200000, help="Number of mock alerts.")
+    parser.add_argument("--max-per-summary", type=int, default=50, help="max_alerts_per_summary for grouping.")
+    args = parser.parse_args()
+
+    random.seed(0)
+    alerts, list_bytes = traced_bytes(lambda: [generate_random_alert_item() for _ in range(args.alerts)])
+    # The batch is built from its own items (freed afterwards), so its id strings are counted too.
+    random.seed(0)
+    batch, batch_bytes = traced_bytes(lambda: AlertBatch.from_items([generate_random_alert_item() for _ in range(args.alerts)]))
+
+    start = time.perf_counter()
+    list_summaries = group_alerts_into_summaries(enrich_alert_items(alerts), args.max_per_summary)
+    list_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_summaries = group_alerts_into_summaries(enrich_alert_items(batch), args.max_per_summary)
+    batch_elapsed = time.perf_counter() - start
+
+    n = args.alerts
+    print(f"Alerts:                    {n}")
+    print(f"Memory per alert (list):   {list_bytes / n:,.0f} bytes")
+    print(f"Memory per alert (batch):  {batch_bytes / n:,.0f} bytes ({list_bytes / batch_bytes:.1f}x smaller)")
+    print(f"Enrich + group (list):     {list_elapsed:.3f}s, {len(list_summaries)} summaries")
+    print(f"Enrich + group (batch):    {batch_elapsed:.3f}s, {len(batch_summaries)} summaries ({list_elapsed / batch_elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark: ingest throughput of /api/submit_daily vs /api/submit_daily/batch.
+
+Posts the same entries once through the single-item endpoint (one request each)
+and once through the batch endpoint (JSON array and NDJSON), each into its own
+tenant thread of a throwaway SQLite checkpoint database, using Flask's test client.
+
+Run from the repository root:
+    python benchmarks/bench_batch_ingest.py --entries 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))  # app.py imports graph.py as a top-level module
+
+_tmp_dir = tempfile.mkdtemp(prefix="bench-ingest-")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder-key")
+os.environ["LLM_CACHE_ENABLED"] = "0"
+os.environ["CHECKPOINT_DB_PATH"] = os.path.join(_tmp_dir, "checkpoints.sqlite3")
+
+from backend.app import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2000, help="Number of daily summaries to ingest per run.")
+    args = parser.parse_args()
+
+    client = app.test_client()
+    entries = [{"text": f"Day {i}: handled pages for the payment gateway, no customer impact."} for i in range(args.entries)]
+
+    start = time.perf_counter()
+    for entry in entries:
+        client.post("/api/submit_daily", json=entry, headers={"X-Tenant-ID": "bench-single"})
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post("/api/submit_daily/batch", json=entries, headers={"X-Tenant-ID": "bench-batch-json"})
+    batch_json = time.perf_counter() - start
+    assert response.json["accepted_count"] == len(entries), response.json
+
+    body = "\n".join(json.dumps(entry) for entry in entries)
+    start = time.perf_counter()
+    response = client.post("/api/submit_daily/batch", data=body, content_type="application/x-ndjson",
+                           headers={"X-Tenant-ID": "bench-batch-ndjson"})
+    batch_ndjson = time.perf_counter() - start
+    assert response.json["accepted_count"] == len(entries), response.json
+
+    n = len(entries)
+    print(f"Entries per run:          {n}")
+    print(f"Single-item endpoint:     {single:.3f}s ({n / single:,.0f} entries/s)")
+    print(f"Batch endpoint (JSON):    {batch_json:.3f}s ({n / batch_json:,.0f} entries/s, {single / batch_json:.0f}x)")
+    print(f"Batch endpoint (NDJSON):  {batch_ndjson:.3f}s ({n / batch_ndjson:,.0f} entries/s, {single / batch_ndjson:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
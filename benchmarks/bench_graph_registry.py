@@ -0,0 +1,92 @@
+"""
+Benchmark: per-summary overhead of running the insights graph.
+
+Compares the old behaviour of `process_summary_with_langgraph` (build a new
+StateGraph and compile it for every summary) against the compiled graph
+registry in `backend/graph.py`. Both paths run the same graph the same way:
+without a checkpointer or thread config, as the registry's insights graph does,
+so the difference is the per-summary compile alone. The LLM is replaced with
+an instant fake so only the graph setup/execution overhead is measured.
+
+Run from the repository root:
+    python benchmarks/bench_graph_registry.py --summaries 300
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder-key")
+os.environ["LLM_CACHE_ENABLED"] = "0"  # measure graph overhead, not cache lookups
+
+from langgraph.graph import StateGraph, END
+
+import backend.graph as graph_module
+from backend.graph import GraphState, generate_actionable_insights_node, get_compiled_graph, reset_registry, warm_up
+from src.data_generator import generate_random_alert_item, enrich_alert_items, group_alerts_into_summaries
+from src.main import format_summary_for_langgraph
+
+
+class _InstantResponse:
+    content = "benchmark insight"
+
+
+class _InstantLLM:
+    """Stands in for the Gemini client so the benchmark measures graph overhead only."""
+    def invoke(self, prompt):
+        return _InstantResponse()
+
+
+def run_uncached(payloads):
+    """The pre-registry path: build and compile a graph per summary."""
+    for payload in payloads:
+        insights_workflow = StateGraph(GraphState)
+        insights_workflow.add_node("generate_actionable_insights",
+                                   lambda state: generate_actionable_insights_node(state, state.get("retrospective_summary_input")))
+        insights_workflow.set_entry_point("generate_actionable_insights")
+        insights_workflow.add_edge("generate_actionable_insights", END)
+        insights_graph = insights_workflow.compile()
+        insights_graph.invoke({"retrospective_summary_input": payload})
+
+
+def run_registry(payloads):
+    """The registry path: one compiled (checkpointer-free) graph shared by every summary."""
+    insights_graph = get_compiled_graph("insights")
+    for payload in payloads:
+        insights_graph.invoke({"retrospective_summary_input": payload})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--summaries", type=int, default=300, help="Number of summaries to process per run.")
+    args = parser.parse_args()
+
+    graph_module.llm = _InstantLLM()
+
+    alerts = enrich_alert_items([generate_random_alert_item() for _ in range(args.summaries * 5)])
+    summaries = group_alerts_into_summaries(alerts, max_alerts_per_summary=5)[:args.summaries]
+    payloads = [format_summary_for_langgraph(s) for s in summaries]
+
+    start = time.perf_counter()
+    run_uncached(payloads)
+    uncached = time.perf_counter() - start
+
+    reset_registry()
+    start = time.perf_counter()
+    warm_up(["insights"])
+    warm_up_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run_registry(payloads)
+    registry = time.perf_counter() - start
+
+    n = len(payloads)
+    print(f"Summaries processed:        {n}")
+    print(f"Compile per summary:        {uncached:.3f}s total, {uncached / n * 1000:.2f} ms/summary")
+    print(f"Registry (warm-up {warm_up_time * 1000:.1f} ms): {registry:.3f}s total, {registry / n * 1000:.2f} ms/summary")
+    print(f"Speed-up:                   {uncached / registry:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Load test: concurrent /api/retrospective requests against the Flask (WSGI) and Quart (ASGI) apps.
+
+The LLM is replaced with a fake that takes --latency seconds per call (time.sleep for the
+sync path, asyncio.sleep for the async path), so the numbers show how many slow LLM calls
+each server keeps in flight. The Flask app is driven from a pool of --workers threads, like
+a threaded WSGI server; the Quart app serves all requests on a single event loop. Every
+request uses its own tenant thread so nothing is shared between requests.
+
+Run from the repository root:
+    python benchmarks/load_test_async.py --requests 64 --workers 8 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "backend"))  # app.py imports graph.py as a top-level module
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark-placeholder-key")
+os.environ["LLM_CACHE_ENABLED"] = "0"  # every request must reach the (fake) LLM
+os.environ["CHECKPOINTER"] = "memory"
+
+import graph as graph_module
+from backend.app import app as flask_app
+from asgi_app import app as quart_app
+
+
+class _SlowResponse:
+    content = "load test retrospective"
+
+
+class _SlowLLM:
+    """Stands in for the Gemini client: every call takes `latency` seconds."""
+    def __init__(self, latency):
+        self.latency = latency
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return _SlowResponse()
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return _SlowResponse()
+
+
+def seed_tenants(prefix, count):
+    app_graph = graph_module.get_compiled_graph("workflow")
+    for i in range(count):
+        config = {"configurable": {"thread_id": f"tenant:{prefix}-{i}"}}
+        app_graph.update_state(config, {"daily_summaries": [{"text": f"Day {d}: paged twice for disk pressure."} for d in range(5)]},
+                               as_node="add_summary_entry")
+
+
+def run_flask(requests, workers):
+    client = flask_app.test_client()
+
+    def call(i):
+        response = client.get("/api/retrospective", headers={"X-Tenant-ID": f"flask-{i}"})
+        assert response.status_code == 200, response.json
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(call, range(requests)))
+
+
+async def run_quart(requests):
+    client = quart_app.test_client()
+
+    async def call(i):
+        response = await client.get("/api/retrospective", headers={"X-Tenant-ID": f"quart-{i}"})
+        assert response.status_code == 200, await response.get_json()
+
+    await asyncio.gather(*(call(i) for i in range(requests)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64, help="Concurrent retrospective requests per server.")
+    parser.add_argument("--workers", type=int, default=8, help="Worker threads for the Flask app.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per fake LLM call.")
+    args = parser.parse_args()
+
+    graph_module.llm = _SlowLLM(args.latency)
+    seed_tenants("flask", args.requests)
+    seed_tenants("quart", args.requests)
+
+    start = time.perf_counter()
+    run_flask(args.requests, args.workers)
+    flask_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    asyncio.run(run_quart(args.requests))
+    quart_elapsed = time.perf_counter() - start
+
+    n = args.requests
+    print(f"Requests per server:             {n} (fake LLM latency {args.latency:.2f}s)")
+    print(f"Flask, {args.workers} worker threads:        {flask_elapsed:.2f}s ({n / flask_elapsed:.1f} req/s)")
+    print(f"Quart, single event loop:        {quart_elapsed:.2f}s ({n / quart_elapsed:.1f} req/s, {flask_elapsed / quart_elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,19 @@ export interface DailySummaryPayload {
 export interface RetrospectiveResponse {
   summary: string;
   source_summary_count: number;
+  version?: number;
   error?: string;
 }
 
+export interface RetrospectiveJob {
+  job_id: string | null;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  version?: number;
+  result?: RetrospectiveResponse;
+  error?: string;
+  coalesced?: boolean;
+}
+
 export interface SubmitDailyResponse {
   message: string;
   current_summary_count: number;
@@ -46,6 +56,30 @@ export const submitDailySummary = async (summaryPayload: DailySummaryPayload): P
   }
 };
 
+/**
+ * Waits for a background retrospective job and returns its result.
+ * @param jobId - The id returned by /retrospective or /retrospective/jobs.
+ */
+export const waitForRetrospectiveJob = async (jobId: string): Promise<RetrospectiveResponse> => {
+  for (;;) {
+    const response = await fetch(`${BASE_URL}/retrospective/jobs/${jobId}?wait=30`);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({ error: 'Network response was not ok' }));
+      throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
+    }
+    const job = await response.json() as RetrospectiveJob;
+    if (job.status === 'succeeded') {
+      return job.result as RetrospectiveResponse;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Retrospective job failed');
+    }
+  }
+};
+
+// The last retrospective fetched and its ETag, for If-None-Match revalidation.
+let lastRetrospective: { etag: string; response: RetrospectiveResponse } | null = null;
+
 /**
  * Fetches the retrospective summary from the backend.
  * @returns The retrospective summary and related data.
@@ -54,12 +88,25 @@ export const getRetrospectiveSummary = async (): Promise<RetrospectiveResponse>
   try {
     const response = await fetch(`${BASE_URL}/retrospective`, {
       method: 'GET', // As defined in Flask app
+      // Revalidate the last retrospective; the backend answers 304 while it is still current.
+      headers: lastRetrospective ? { 'If-None-Match': lastRetrospective.etag } : {},
     });
+    if (response.status === 304 && lastRetrospective) {
+      return lastRetrospective.response;
+    }
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({ error: 'Network response was not ok' }));
       throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
     }
-    return await response.json();
+    if (response.status === 202) {
+      // Generation is still running in a background job; wait for it instead.
+      const job = await response.json() as RetrospectiveJob;
+      return await waitForRetrospectiveJob(job.job_id as string);
+    }
+    const result = await response.json() as RetrospectiveResponse;
+    const etag = response.headers.get('ETag');
+    lastRetrospective = etag ? { etag, response: result } : null;
+    return result;
   } catch (error) {
     console.error('Failed to fetch retrospective summary:', error);
     const errorMessage = error instanceof Error ? error.message : 'An unknown error occurred';
@@ -67,6 +114,32 @@ export const getRetrospectiveSummary = async (): Promise<RetrospectiveResponse>
   }
 };
 
+/**
+ * Streams the retrospective summary from the backend using server-sent events.
+ * @param onToken - Called with each chunk of generated text as it arrives.
+ * @returns The complete retrospective summary once generation has finished.
+ */
+export const streamRetrospectiveSummary = (onToken: (text: string) => void): Promise<RetrospectiveResponse> => {
+  return new Promise((resolve) => {
+    const source = new EventSource(`${BASE_URL}/retrospective/stream`);
+    source.addEventListener('token', (event) => {
+      onToken(JSON.parse((event as MessageEvent).data).text);
+    });
+    source.addEventListener('done', (event) => {
+      source.close();
+      resolve(JSON.parse((event as MessageEvent).data) as RetrospectiveResponse);
+    });
+    source.addEventListener('error', (event) => {
+      source.close();
+      // Server-sent "error" events carry a JSON payload; connection errors do not.
+      const data = (event as MessageEvent).data;
+      const errorMessage = data ? JSON.parse(data).error : 'Connection to the backend was lost';
+      console.error('Failed to stream retrospective summary:', errorMessage);
+      resolve({ summary: '', source_summary_count: 0, error: errorMessage });
+    });
+  });
+};
+
 // --- New service functions for mock data ---
 import { DailySummary, GeneratedRetrospectiveSummary } from '../types'; // Adjust path as needed
 
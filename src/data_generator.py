@@ -1,9 +1,15 @@
+import dataclasses
 import random
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Set
+from typing import Iterator, List, Dict, Optional, Set, Union
 
-from src.models import AlertItem, RetrospectiveSummary
+import numpy as np
+
+from src.models import AlertItem, AlertBatch, RetrospectiveSummary, NO_TIMESTAMP
+from src.enrichment import (DEFAULT_MAX_CORRELATED_ALERTS, DEFAULT_NOISY_WINDOW_MINUTES, occurrence_ranks,
+                            overlapping_intervals, windowed_occurrence_counts)
+from src.tag_rules import TagRuleSet, default_tag_rules
 
 def generate_random_alert_item() -> AlertItem:
     """Generates a single mock AlertItem with random data."""
@@ -27,10 +33,12 @@ def generate_random_alert_item() -> AlertItem:
         "metric": random.choice(["CPUUtilization", "MemoryUsage", "DiskReadOps", "Latency"]),
         "value": round(random.uniform(50.0, 100.0), 2)
     }
+    # Correlated alerts are found during enrichment (see enrich_alert_batch)
     graph_analysis = {
-        "correlated_alerts": [str(uuid.uuid4()) for _ in range(random.randint(0, 3))],
         "impact_radius": random.choice(["small", "medium", "large"])
     }
+    # Closed alerts were open for a few minutes to a couple of hours (mean 30 minutes)
+    resolved_date = created_date + timedelta(minutes=random.expovariate(1 / 30)) if status == "closed" else None
 
     return AlertItem(
         id=alert_id,
@@ -38,85 +46,173 @@ def generate_random_alert_item() -> AlertItem:
         status=status,
         created_date=created_date,
         alert_node_analysis=alert_node_analysis,
-        graph_analysis=graph_analysis
+        graph_analysis=graph_analysis,
+        resolved_date=resolved_date
     )
 
-def enrich_alert_items(alerts: List[AlertItem], noisy_threshold_count: int = 3, self_resolved_minutes: int = 10) -> List[AlertItem]:
+def generate_alert_stream(num_alerts: int, start: Optional[datetime] = None,
+                          span: timedelta = timedelta(days=7)) -> Iterator[AlertItem]:
     """
-    Simulates enrichment for a list of AlertItems.
-    - Marks alerts as 'noisy' if similar titles occur frequently.
-    - Marks alerts as 'self_resolved' if they closed quickly after opening (mocked).
+    Yields `num_alerts` mock alerts lazily, in creation order, spread evenly over `span` from
+    `start` (default: `span` ago), as a live alert feed would deliver them.
     """
-    enriched_alerts = []
-    title_counts: Dict[str, int] = {}
+    start = start or datetime.utcnow() - span
+    step = span / max(num_alerts, 1)
+    for i in range(num_alerts):
+        alert = generate_random_alert_item()
+        created_date = start + step * i
+        if alert.resolved_date is not None:
+            alert.resolved_date += created_date - alert.created_date
+        alert.created_date = created_date
+        yield alert
 
-    # Sort alerts by creation date for some temporal logic
-    alerts.sort(key=lambda x: x.created_date)
+def enrich_alert_items(alerts: Union[List[AlertItem], AlertBatch], noisy_threshold_count: int = 3, self_resolved_minutes: int = 10,
+                       noisy_window_minutes: Optional[float] = DEFAULT_NOISY_WINDOW_MINUTES,
+                       max_correlated_alerts: int = DEFAULT_MAX_CORRELATED_ALERTS) -> Union[List[AlertItem], AlertBatch]:
+    """
+    Enriches alerts, returning them sorted by creation date:
+    - Marks alerts as 'noisy' when at least `noisy_threshold_count` alerts with the same title and
+      component (this one included) were created within the last `noisy_window_minutes`, which
+      must be positive. With `noisy_window_minutes=None`, any earlier occurrences of the title count.
+    - Marks alerts as 'self_resolved' if they were resolved within `self_resolved_minutes` of opening.
+    - Sets graph_analysis["correlated_alerts"] to the ids of up to `max_correlated_alerts` alerts
+      on the same component that fired while the alert was open (alerts without a resolved_date
+      count as open until the newest timestamp in the input).
+    The input is not modified: a list gets copies of its AlertItems with only these fields (and
+    the cached tags) changed, an AlertBatch a new batch. Both are enriched column-wise.
+    """
+    if isinstance(alerts, AlertBatch):
+        return enrich_alert_batch(alerts, noisy_threshold_count, self_resolved_minutes, noisy_window_minutes,
+                                  max_correlated_alerts)
+    alerts = list(alerts)
+    batch = AlertBatch.from_items(alerts)
+    order = np.argsort(batch.created_us, kind="stable")
+    enriched = batch.take(order)
+    _enrich_sorted(enriched, noisy_threshold_count, self_resolved_minutes, noisy_window_minutes, max_correlated_alerts)
+    # Copy the results onto the original items rather than materializing the batch's items.
+    return [
+        dataclasses.replace(
+            alerts[k],
+            is_noisy=bool(enriched.is_noisy[j]),
+            is_self_resolved=bool(enriched.is_self_resolved[j]),
+            graph_analysis={**alerts[k].graph_analysis,
+                            "correlated_alerts": enriched.item(j).graph_analysis["correlated_alerts"]},
+            tags=None,  # flags changed, so any cached tags are stale
+        )
+        for j, k in enumerate(order.tolist())
+    ]
 
-    for alert in alerts:
-        # Noisy check (simplified: count occurrences of the same title)
-        title_counts[alert.title] = title_counts.get(alert.title, 0) + 1
-        if title_counts[alert.title] >= noisy_threshold_count:
-            alert.is_noisy = True
+def enrich_alert_batch(batch: AlertBatch, noisy_threshold_count: int = 3, self_resolved_minutes: int = 10,
+                       noisy_window_minutes: Optional[float] = DEFAULT_NOISY_WINDOW_MINUTES,
+                       max_correlated_alerts: int = DEFAULT_MAX_CORRELATED_ALERTS) -> AlertBatch:
+    """
+    Column-wise implementation of enrich_alert_items. Returns a new batch sorted by created date;
+    the input batch is not modified.
+    """
+    enriched = batch.take(np.argsort(batch.created_us, kind="stable"))
+    _enrich_sorted(enriched, noisy_threshold_count, self_resolved_minutes, noisy_window_minutes, max_correlated_alerts)
+    return enriched
+
+def _enrich_sorted(enriched: AlertBatch, noisy_threshold_count: int, self_resolved_minutes: int,
+                   noisy_window_minutes: Optional[float], max_correlated_alerts: int):
+    """Enriches a batch sorted by created date in place (see enrich_alert_items)."""
+    if noisy_window_minutes is not None and noisy_window_minutes <= 0:
+        raise ValueError(f"noisy_window_minutes must be positive (or None), got {noisy_window_minutes}.")
+    enriched.cached_tags = {}  # tag rules may read the flags set below
+    if noisy_window_minutes is None:
+        occurrences = occurrence_ranks(enriched.title_codes) + 1
+    else:
+        keys = enriched.title_codes.astype(np.int64) * (len(enriched.components) + 1) + enriched.component_codes + 1
+        window_us = max(1, round(noisy_window_minutes * 60_000_000))
+        occurrences = windowed_occurrence_counts(keys, enriched.created_us, window_us)
+    enriched.is_noisy = enriched.is_noisy | (occurrences >= noisy_threshold_count)
 
-        # Self-resolved check (simplified: 10% chance if status is 'closed')
-        # A more realistic check would compare open and close times.
-        # For now, we'll randomly mark some closed alerts as self_resolved.
-        if alert.status == "closed" and random.random() < 0.25: # 25% chance for a closed alert
-            # Simulate it resolved within X minutes (not strictly based on created_date vs resolved_date here)
-            alert.is_self_resolved = True
+    resolved = enriched.resolved_us != NO_TIMESTAMP
+    open_for = enriched.resolved_us - enriched.created_us
+    enriched.is_self_resolved = enriched.is_self_resolved | (resolved & (open_for <= self_resolved_minutes * 60_000_000))
 
-        enriched_alerts.append(alert)
+    _correlate_alerts(enriched, resolved, max_correlated_alerts)
 
-    return enriched_alerts
+def _correlate_alerts(batch: AlertBatch, resolved: np.ndarray, max_correlated_alerts: int):
+    """Replaces the batch's correlated alerts with those found by overlapping_intervals, per component."""
+    n = len(batch)
+    if n == 0:
+        return
+    as_of = max(int(batch.created_us.max()), int(batch.resolved_us[resolved].max(initial=NO_TIMESTAMP)))
+    ends = np.where(resolved, batch.resolved_us, as_of)
+    with_component = np.flatnonzero(batch.component_codes >= 0)  # alerts without one are not correlated
+    _, partner_offsets, partners = overlapping_intervals(
+        batch.component_codes[with_component], batch.created_us[with_component], ends[with_component],
+        max_correlated_alerts)
+    lengths = np.zeros(n, dtype=np.int64)
+    lengths[with_component] = np.diff(partner_offsets)
+    batch.correlated_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=batch.correlated_offsets[1:])
+    batch.correlated_ids = batch.ids[with_component[partners]]
+    batch.has_correlated = np.ones(n, dtype=bool)
 
-def group_alerts_into_summaries(alerts: List[AlertItem], max_alerts_per_summary: int = 10) -> List[RetrospectiveSummary]:
+def group_alert_batch(batch: AlertBatch, max_alerts_per_summary: int = 10,
+                      rules: Optional[TagRuleSet] = None) -> List[RetrospectiveSummary]:
+    """
+    Column-wise version of group_alerts_into_summaries; each summary's items are an AlertBatch.
+    Tags depend only on the fields the rules read, so they are evaluated once per distinct
+    combination of those fields rather than once per alert (see TagRuleSet.tag_batch).
+    """
+    if len(batch) == 0:
+        return []
+    rules = rules or default_tag_rules()
+    combo_of_alert, tags_of_combo = rules.tag_batch(batch)
+
+    primary_tags: List[str] = []
+    primary_index: Dict[str, int] = {}
+    primary_of_combo = np.empty(len(tags_of_combo), dtype=np.int64)
+    for c, tags_for_alert in enumerate(tags_of_combo):
+        primary_tag = min(tags_for_alert)
+        if primary_tag not in primary_index:
+            primary_index[primary_tag] = len(primary_tags)
+            primary_tags.append(primary_tag)
+        primary_of_combo[c] = primary_index[primary_tag]
+
+    primary_of_alert = primary_of_combo[combo_of_alert]
+    # Groups in order of their first alert, alerts within a group in batch order (as for lists).
+    by_primary = np.argsort(primary_of_alert, kind="stable")
+    group_codes, group_starts, group_sizes = np.unique(primary_of_alert[by_primary], return_index=True, return_counts=True)
+    first_alert = by_primary[group_starts]
+
+    summaries: List[RetrospectiveSummary] = []
+    for g in np.argsort(first_alert, kind="stable").tolist():
+        primary_tag = primary_tags[group_codes[g]]
+        members = by_primary[group_starts[g]:group_starts[g] + group_sizes[g]]
+        for i in range(0, len(members), max_alerts_per_summary):
+            chunk = members[i:i + max_alerts_per_summary]
+            chunk_tags: Set[str] = {primary_tag}
+            for c in np.unique(combo_of_alert[chunk]).tolist():
+                chunk_tags |= tags_of_combo[c]
+            summaries.append(RetrospectiveSummary(summary_id=str(uuid.uuid4()), tags=chunk_tags, items=batch.take(chunk)))
+    return summaries
+
+def group_alerts_into_summaries(alerts: Union[List[AlertItem], AlertBatch], max_alerts_per_summary: int = 10,
+                                rules: Optional[TagRuleSet] = None) -> List[RetrospectiveSummary]:
     """
     Groups enriched AlertItems into RetrospectiveSummary objects.
-    Grouping is based on mock tags (e.g., component from node_analysis or 'noisy').
+    Alerts are tagged by `rules` (default: default_tag_rules(), see src/tag_rules.py) and grouped
+    by their primary tag; a summary carries every tag of its alerts.
+    An AlertBatch is grouped column-wise (see group_alert_batch).
     """
+    if isinstance(alerts, AlertBatch):
+        return group_alert_batch(alerts, max_alerts_per_summary, rules)
+
+    rules = rules or default_tag_rules()
     summaries: List[RetrospectiveSummary] = []
     # Group by a primary tag, e.g., 'component' or 'noisy' status
-
-    # Potential tags: component, noisy, self_resolved, high_cpu, specific services
     grouped_by_tag: Dict[str, List[AlertItem]] = {}
 
     for alert in alerts:
-        tags_for_alert: Set[str] = set()
-
-        # Tag by component
-        component = alert.alert_node_analysis.get("component")
-        if component:
-            tags_for_alert.add(f"component:{component}")
-
-        # Tag if noisy
-        if alert.is_noisy:
-            tags_for_alert.add("status:noisy")
-
-        # Tag if self-resolved
-        if alert.is_self_resolved:
-            tags_for_alert.add("status:self-resolved")
-
-        # Tag by a part of the title if relevant
-        if "CPU" in alert.title.upper():
-            tags_for_alert.add("type:cpu")
-        if "MEMORY" in alert.title.upper():
-            tags_for_alert.add("type:memory")
-        if "DISK" in alert.title.upper():
-            tags_for_alert.add("type:disk")
-        if "NETWORK" in alert.title.upper() or "LATENCY" in alert.title.upper():
-            tags_for_alert.add("type:network")
-        if "DATABASE" in alert.title.upper():
-            tags_for_alert.add("type:database")
-        if "SECURITY" in alert.title.upper():
-            tags_for_alert.add("type:security")
-
-        if not tags_for_alert:
-            tags_for_alert.add("general") # Default tag if no other applies
+        tags_for_alert = rules.tags_for(alert)  # evaluated once, then cached on the alert
 
         # For simplicity, let's use the first applicable tag as the primary grouping key
         # A more complex strategy could create summaries for intersections of tags
-        primary_tag_for_grouping = sorted(list(tags_for_alert))[0]
+        primary_tag_for_grouping = min(tags_for_alert)
 
         if primary_tag_for_grouping not in grouped_by_tag:
             grouped_by_tag[primary_tag_for_grouping] = []
@@ -124,39 +220,19 @@ def group_alerts_into_summaries(alerts: List[AlertItem], max_alerts_per_summary:
 
     # Create summaries from these groups
     for primary_tag, alert_group in grouped_by_tag.items():
-        # Collect all unique tags for this group of alerts
-        all_tags_in_group: Set[str] = set()
-        for alert_in_group in alert_group:
-            # Re-evaluate tags for the summary context (could be broader)
-            # For now, just using the primary_tag and specific alert properties
-            all_tags_in_group.add(primary_tag) # The key used for grouping
-            if alert_in_group.is_noisy: all_tags_in_group.add("status:noisy")
-            if alert_in_group.is_self_resolved: all_tags_in_group.add("status:self-resolved")
-            component = alert_in_group.alert_node_analysis.get("component")
-            if component: all_tags_in_group.add(f"component:{component}")
-
-
         # Split into multiple summaries if a group is too large
         for i in range(0, len(alert_group), max_alerts_per_summary):
             chunk = alert_group[i:i + max_alerts_per_summary]
             summary_id = str(uuid.uuid4())
-            # Use all tags derived for the items in this specific chunk for the summary
-            chunk_tags: Set[str] = set()
+            # The primary tag that formed this group, plus all tags of the items in this chunk
+            chunk_tags: Set[str] = {primary_tag}
             for alert_in_chunk in chunk:
-                if alert_in_chunk.is_noisy: chunk_tags.add("status:noisy")
-                if alert_in_chunk.is_self_resolved: chunk_tags.add("status:self-resolved")
-                component = alert_in_chunk.alert_node_analysis.get("component")
-                if component: chunk_tags.add(f"component:{component}")
-                if "CPU" in alert_in_chunk.title.upper(): chunk_tags.add("type:cpu")
-                if "MEMORY" in alert_in_chunk.title.upper(): chunk_tags.add("type:memory")
-                # Add the primary tag that formed this group
-                chunk_tags.add(primary_tag)
-
+                chunk_tags |= rules.tags_for(alert_in_chunk)
 
             summaries.append(
                 RetrospectiveSummary(
                     summary_id=summary_id,
-                    tags=chunk_tags if chunk_tags else {primary_tag}, # Ensure at least one tag
+                    tags=chunk_tags,
                     items=chunk
                 )
             )
@@ -0,0 +1,141 @@
+"""
+Alert fingerprinting and de-duplication.
+
+Alerts with the same normalized title, component and metric share a fingerprint; a run of them
+is collapsed into one DedupedAlert (the first occurrence plus counts, first/last seen and the
+metric value range), so a summary sends each distinct problem to the LLM once.
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from src.models import AlertItem, AlertBatch, datetime_from_us
+
+# Variable parts of titles, replaced in this order so e.g. a UUID isn't read as numbers.
+_TITLE_PLACEHOLDERS = (
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), "<id>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b(?:0x)?(?=[0-9a-f]*\d)[0-9a-f]{8,}\b"), "<hex>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+)
+
+
+@lru_cache(maxsize=65536)
+def normalize_title(title: str) -> str:
+    """Lower-cases a title, replaces ids, IPs, hex strings and numbers with placeholders and collapses whitespace."""
+    normalized = title.lower()
+    for pattern, placeholder in _TITLE_PLACEHOLDERS:
+        normalized = pattern.sub(placeholder, normalized)
+    return " ".join(normalized.split())
+
+
+def alert_fingerprint(title: str, component: Optional[str], metric: Optional[str]) -> str:
+    """A short stable hash of the normalized title, component and metric."""
+    key = "\x1f".join((normalize_title(title), component or "", metric or ""))
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+@dataclass
+class DedupedAlert:
+    """One distinct alert: its first occurrence and aggregates over all occurrences."""
+    fingerprint: str
+    representative: AlertItem
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+    value_min: Optional[float] = None
+    value_max: Optional[float] = None
+    noisy_count: int = 0
+    self_resolved_count: int = 0
+
+    def occurrences(self) -> dict:
+        """The aggregates as a JSON-friendly dict (as added to the Langgraph payload)."""
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "value_min": self.value_min,
+            "value_max": self.value_max,
+            "noisy_count": self.noisy_count,
+            "self_resolved_count": self.self_resolved_count,
+        }
+
+
+def deduplicate_alerts(alerts: Union[List[AlertItem], AlertBatch]) -> List[DedupedAlert]:
+    """
+    Collapses alerts with the same fingerprint, in order of each fingerprint's first occurrence.
+    An AlertBatch is collapsed column-wise (see _deduplicate_batch).
+    """
+    if isinstance(alerts, AlertBatch):
+        return _deduplicate_batch(alerts)
+
+    deduped: Dict[str, DedupedAlert] = {}
+    for alert in alerts:
+        fingerprint = alert_fingerprint(alert.title, alert.alert_node_analysis.get("component"),
+                                        alert.alert_node_analysis.get("metric"))
+        value = alert.alert_node_analysis.get("value")
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            value = None
+        entry = deduped.get(fingerprint)
+        if entry is None:
+            deduped[fingerprint] = DedupedAlert(
+                fingerprint, alert, 1, alert.created_date, alert.created_date, value, value,
+                int(alert.is_noisy), int(alert.is_self_resolved))
+            continue
+        entry.count += 1
+        entry.first_seen = min(entry.first_seen, alert.created_date)
+        entry.last_seen = max(entry.last_seen, alert.created_date)
+        if value is not None:
+            entry.value_min = value if entry.value_min is None else min(entry.value_min, value)
+            entry.value_max = value if entry.value_max is None else max(entry.value_max, value)
+        entry.noisy_count += alert.is_noisy
+        entry.self_resolved_count += alert.is_self_resolved
+    return list(deduped.values())
+
+
+def _deduplicate_batch(batch: AlertBatch) -> List[DedupedAlert]:
+    """
+    Titles are normalized once per distinct title; alerts are then grouped by
+    (normalized title, component, metric) codes and aggregated with one sort and reduceat.
+    """
+    if len(batch) == 0:
+        return []
+    normalized_index: Dict[str, int] = {}
+    normalized_of_title = np.array([normalized_index.setdefault(normalize_title(title), len(normalized_index))
+                                    for title in batch.titles], dtype=np.int64)
+    keys = np.stack([normalized_of_title[batch.title_codes], batch.component_codes, batch.metric_codes], axis=1)
+    _, first_alert, group_of = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    group_of = group_of.reshape(-1)
+
+    order = np.argsort(group_of, kind="stable")
+    starts = np.r_[0, np.flatnonzero(np.diff(group_of[order])) + 1]
+    counts = np.diff(np.r_[starts, len(order)])
+    created = batch.created_us[order]
+    values = batch.values[order]
+    first_seen, last_seen = np.minimum.reduceat(created, starts), np.maximum.reduceat(created, starts)
+    value_min, value_max = np.fmin.reduceat(values, starts), np.fmax.reduceat(values, starts)  # NaN-ignoring
+    noisy = np.add.reduceat(batch.is_noisy[order].astype(np.int64), starts)
+    self_resolved = np.add.reduceat(batch.is_self_resolved[order].astype(np.int64), starts)
+
+    deduped = []
+    for g in np.argsort(first_alert, kind="stable").tolist():
+        representative = batch.item(int(first_alert[g]))
+        deduped.append(DedupedAlert(
+            fingerprint=alert_fingerprint(representative.title, representative.alert_node_analysis.get("component"),
+                                          representative.alert_node_analysis.get("metric")),
+            representative=representative,
+            count=int(counts[g]),
+            first_seen=datetime_from_us(int(first_seen[g]), batch.tz),
+            last_seen=datetime_from_us(int(last_seen[g]), batch.tz),
+            value_min=None if np.isnan(value_min[g]) else float(value_min[g]),
+            value_max=None if np.isnan(value_max[g]) else float(value_max[g]),
+            noisy_count=int(noisy[g]),
+            self_resolved_count=int(self_resolved[g]),
+        ))
+    return deduped
@@ -0,0 +1,134 @@
+"""
+Vectorized (NumPy) building blocks for alert enrichment.
+
+Functions here work on plain arrays (category codes, int64 timestamps) so they run in
+a few sorts and searches regardless of the number of alerts; see enrich_alert_batch in
+src/data_generator.py for how they are applied to an AlertBatch.
+"""
+from typing import Tuple
+
+import numpy as np
+
+# Alerts with the same title and component count towards noise only within this window.
+DEFAULT_NOISY_WINDOW_MINUTES = 60.0
+
+# Alerts listed in graph_analysis["correlated_alerts"] at most, per alert.
+DEFAULT_MAX_CORRELATED_ALERTS = 20
+
+# Composite sort keys must stay well inside int64.
+_MAX_COMPOSITE = 2 ** 62
+
+
+def occurrence_ranks(codes: np.ndarray) -> np.ndarray:
+    """Returns, for each position, how many earlier positions hold the same code (0 for the first)."""
+    by_code = np.argsort(codes, kind="stable")  # stable: equal codes keep their order
+    sorted_codes = codes[by_code]
+    run_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    run_lengths = np.diff(np.r_[run_starts, len(codes)])
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[by_code] = np.arange(len(codes)) - np.repeat(run_starts, run_lengths)
+    return ranks
+
+
+def windowed_occurrence_counts(keys: np.ndarray, times: np.ndarray, window: int) -> np.ndarray:
+    """
+    Returns, for each position i, the number of positions j with keys[j] == keys[i] and
+    times[i] - window < times[j] <= times[i], i itself included. Of several alerts with the
+    same key and time, each counts only those before it, so counts grow 1, 2, 3, ...
+    `window` must be positive.
+
+    Runs in O(n log n): one sort by (key, time), then a binary search for every alert's
+    window start. The inputs are not modified.
+    """
+    if window <= 0:
+        raise ValueError(f"window must be positive, got {window}.")
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((times, keys))  # by key, then time; stable for ties
+    sorted_keys = keys[order]
+    sorted_times = times[order].astype(np.int64)
+    group_starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_of = np.cumsum(group_starts) - 1
+
+    window = int(window)
+    t_min = int(sorted_times.min())
+    span = int(sorted_times.max()) - t_min + window + 1
+    if (int(group_of[-1]) + 1) * span < _MAX_COMPOSITE:
+        # Lay the groups end to end on one time axis, each `span` apart, so one searchsorted
+        # finds every window start without ever reaching into the previous group.
+        composite = (sorted_times - t_min) + group_of * span
+        window_starts = np.searchsorted(composite, composite - window, side="right")
+    else:
+        window_starts = np.empty(n, dtype=np.int64)
+        bounds = np.r_[np.flatnonzero(group_starts), n]
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            group_times = sorted_times[start:end]
+            window_starts[start:end] = start + np.searchsorted(group_times, group_times - window, side="right")
+
+    counts = np.empty(n, dtype=np.int64)
+    counts[order] = np.arange(n) - window_starts + 1
+    return counts
+
+
+def overlapping_intervals(keys: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                          max_partners: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sweep over time intervals [starts[i], ends[i]] grouped by key (ends before starts are taken
+    as instantaneous). Returns (counts, partner_offsets, partners):
+    - counts[i]: the number of other intervals with the same key that overlap interval i.
+    - partners[partner_offsets[i]:partner_offsets[i + 1]]: the first `max_partners` intervals
+      with the same key that start while i is open (at or after its start; equal starts count
+      for the later position), soonest first. Every overlapping pair is listed under the one
+      that started first, unless that one already has `max_partners` partners.
+
+    Runs in O(n log n + partners): one sort by (key, start) and one of the ends, then a binary
+    search per interval for where its end falls among the starts and its start among the ends.
+    Intervals are never compared pairwise. The inputs are not modified.
+    """
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    order = np.lexsort((starts, keys))  # by key, then start; stable for ties
+    sorted_keys = keys[order]
+    sorted_starts = starts[order].astype(np.int64)
+    sorted_ends = np.maximum(ends[order].astype(np.int64), sorted_starts)
+    group_starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+    group_of = np.cumsum(group_starts) - 1
+
+    t_min = int(sorted_starts.min())
+    span = int(sorted_ends.max()) - t_min + 1
+    if (int(group_of[-1]) + 1) * span < _MAX_COMPOSITE:
+        # As in windowed_occurrence_counts: groups laid end to end, `span` apart, so a search
+        # never crosses into a neighbouring group (every earlier group ends before a start).
+        offset = group_of * span - t_min
+        composite_starts, composite_ends = sorted_starts + offset, sorted_ends + offset
+        after_end = np.searchsorted(composite_starts, composite_ends, side="right")
+        ended_before = np.searchsorted(np.sort(composite_ends), composite_starts, side="left")
+    else:
+        after_end = np.empty(n, dtype=np.int64)
+        ended_before = np.empty(n, dtype=np.int64)
+        bounds = np.r_[np.flatnonzero(group_starts), n]
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            group_starts_, group_ends = sorted_starts[start:end], sorted_ends[start:end]
+            after_end[start:end] = start + np.searchsorted(group_starts_, group_ends, side="right")
+            ended_before[start:end] = start + np.searchsorted(np.sort(group_ends), group_starts_, side="left")
+
+    positions = np.arange(n)
+    # Later in sort order and starting no later than my end: all overlap me.
+    later = after_end - positions - 1
+    # Earlier in sort order, minus those that ended before I started: the ones still open.
+    earlier = positions - ended_before
+    counts = np.empty(n, dtype=np.int64)
+    counts[order] = later + earlier
+
+    lengths = np.empty(n, dtype=np.int64)
+    lengths[order] = np.minimum(later, max_partners)
+    partner_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=partner_offsets[1:])
+    sorted_position = np.empty(n, dtype=np.int64)
+    sorted_position[order] = positions
+    # Partners of i are the sorted positions right after its own, mapped back through `order`.
+    partner_positions = (np.repeat(sorted_position + 1 - partner_offsets[:-1], lengths)
+                         + np.arange(partner_offsets[-1]))
+    return counts, partner_offsets, order[partner_positions]
@@ -1,9 +1,14 @@
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any, Optional
 import os
 import json # Added for potentially serializing complex objects for langgraph
 
-from src.models import RetrospectiveSummary, AlertItem
-from src.data_generator import generate_random_alert_item, enrich_alert_items, group_alerts_into_summaries
+from src.models import RetrospectiveSummary, AlertItem, AlertBatch
+from src.data_generator import generate_random_alert_item, generate_alert_stream, enrich_alert_items, group_alerts_into_summaries
+from src.enrichment import DEFAULT_NOISY_WINDOW_MINUTES
+from src.parallel import map_bounded, imap_bounded
+from src.streaming import DEFAULT_FLUSH_AFTER_MINUTES, JsonlSink, stream_enrich, stream_group
+from src.alert_files import load_alerts, load_alert_batch
+from src.dedup import deduplicate_alerts
 
 # --- Langgraph Integration ---
 # This section will require specific details about your Langgraph setup.
@@ -13,30 +18,44 @@ from src.data_generator import generate_random_alert_item, enrich_alert_items, g
 # Example: LANGGRAPH_API_KEY = os.environ.get("LANGGRAPH_API_KEY")
 # Example: client = LanggraphClient(api_key=LANGGRAPH_API_KEY)
 
-def format_summary_for_langgraph(summary: RetrospectiveSummary) -> Dict[str, Any]:
+def format_alert_for_langgraph(item: AlertItem) -> Dict[str, Any]:
+    return {
+        "id": item.id,
+        "title": item.title,
+        "status": item.status,
+        "created_date": item.created_date.isoformat(),
+        "resolved_date": item.resolved_date.isoformat() if item.resolved_date else None,
+        "is_noisy": item.is_noisy,
+        "is_self_resolved": item.is_self_resolved,
+        "alert_node_analysis": item.alert_node_analysis,
+        "graph_analysis": item.graph_analysis,
+    }
+
+def format_summary_for_langgraph(summary: RetrospectiveSummary, deduplicate: bool = True) -> Dict[str, Any]:
     """
     Formats a RetrospectiveSummary object into a dictionary suitable for Langgraph input.
     This is a placeholder and will likely need to be adjusted based on the
     specific Langgraph graph's expected input schema.
+
+    With `deduplicate=True`, alerts with the same fingerprint (normalized title, component and
+    metric, see src/dedup.py) are sent once, with an "occurrences" entry holding their count,
+    first/last seen times and metric value range.
     """
-    alerts_data = []
-    for item in summary.items:
-        alerts_data.append({
-            "id": item.id,
-            "title": item.title,
-            "status": item.status,
-            "created_date": item.created_date.isoformat(),
-            "is_noisy": item.is_noisy,
-            "is_self_resolved": item.is_self_resolved,
-            "alert_node_analysis": item.alert_node_analysis,
-            "graph_analysis": item.graph_analysis,
-        })
+    if deduplicate:
+        alerts_data = []
+        for deduped in deduplicate_alerts(summary.items):
+            alert_data = format_alert_for_langgraph(deduped.representative)
+            alert_data["occurrences"] = deduped.occurrences()
+            alerts_data.append(alert_data)
+    else:
+        alerts_data = [format_alert_for_langgraph(item) for item in summary.items]
 
     return {
         "summary_id": summary.summary_id,
         "tags": sorted(list(summary.tags)), # Consistent order for tags
         "alerts": alerts_data,
         "item_count": len(summary.items),
+        "unique_alert_count": len(alerts_data),
         "generated_at": summary.generated_at.isoformat()
     }
 
@@ -80,45 +99,23 @@ def process_summary_with_langgraph(summary: RetrospectiveSummary) -> str:
 
     try:
         # Import graph components from backend
-        from backend.graph import workflow as base_workflow, GraphState, generate_actionable_insights_node
-        from langgraph.graph import StateGraph, END
-        from langgraph.checkpoint.memory import MemorySaver # Using MemorySaver for simplicity
-
-        # We need a graph that can directly run our 'generate_actionable_insights_node'.
-        # We can define a new mini-workflow for this or invoke the node if the main app does.
-        # For this script, let's define a workflow that uses this node as an entry point.
-        insights_workflow = StateGraph(GraphState)
-        # The lambda for add_node now needs to correctly pass the input to the node function.
-        # The key in invoke (e.g. "retrospective_summary_input") must match the parameter name in the lambda.
-        insights_workflow.add_node("generate_actionable_insights",
-                                   lambda state, retrospective_summary_input_arg: generate_actionable_insights_node(state, retrospective_summary_input_arg))
-        insights_workflow.set_entry_point("generate_actionable_insights")
-        insights_workflow.add_edge("generate_actionable_insights", END)
-
-        # Compile this specific workflow
-        # Each thread_id gets its own state. For one-off insights, a unique ID can be used.
-        memory_saver = MemorySaver()
-        insights_graph = insights_workflow.compile(checkpointer=memory_saver)
+        from backend.graph import get_compiled_graph
+
+        # The insights graph (entry point: 'generate_actionable_insights') is compiled once
+        # per process by the backend graph registry and shared across all summaries.
+        insights_graph = get_compiled_graph("insights")
 
         # Prepare input for the langgraph node
         langgraph_input_payload = format_summary_for_langgraph(summary)
 
         # Invoke the graph
-        # The input to invoke must be a dict where the key matches the parameter name in the lambda
-        # used in `insights_workflow.add_node` for the entrypoint node.
-        # So, {"retrospective_summary_input_arg": langgraph_input_payload}
-        thread_id = f"insights-{summary.summary_id}" # Unique thread for this one-off task
-        config = {"configurable": {"thread_id": thread_id}}
+        # The entry node reads its input from the "retrospective_summary_input" state key.
+        # The insights graph has no checkpointer, so nothing is persisted for this one-off task.
 
         print(f"\n[Langgraph] Calling 'generate_actionable_insights' for summary ID: {summary.summary_id}")
         print(f"[Langgraph] Input: {json.dumps(langgraph_input_payload, indent=2, default=str)}")
 
-        # The key in the input dictionary for invoke should match the input argument name expected by the lambda
-        # which wraps our node in the StateGraph definition.
-        # In `insights_workflow.add_node("generate_actionable_insights", lambda state, retrospective_summary_input_arg: ...)`
-        # the second parameter to the lambda is `retrospective_summary_input_arg`.
-        # So, the invoke call should be:
-        graph_output = insights_graph.invoke({"retrospective_summary_input_arg": langgraph_input_payload}, config=config)
+        graph_output = insights_graph.invoke({"retrospective_summary_input": langgraph_input_payload})
 
         print(f"[Langgraph] Raw output: {graph_output}")
 
@@ -144,7 +141,12 @@ def process_summary_with_langgraph(summary: RetrospectiveSummary) -> str:
     return insights
 
 # --- Main Workflow ---
-def run_alert_processing_pipeline(num_alerts_to_generate: int = 20, noisy_alert_threshold: int = 2, max_items_per_summary: int = 5):
+def run_alert_processing_pipeline(num_alerts_to_generate: int = 20, noisy_alert_threshold: int = 2, max_items_per_summary: int = 5,
+                                  parallel: bool = False, max_in_flight: int = 8,
+                                  requests_per_second: Optional[float] = None, call_timeout_seconds: Optional[float] = None,
+                                  columnar: bool = False, noisy_window_minutes: Optional[float] = DEFAULT_NOISY_WINDOW_MINUTES,
+                                  streaming: bool = False, flush_after_minutes: Optional[float] = DEFAULT_FLUSH_AFTER_MINUTES,
+                                  insights_path: Optional[str] = None, alerts_path: Optional[str] = None):
     # Load .env file for GEMINI_API_KEY
     from dotenv import load_dotenv
     load_dotenv()
@@ -154,21 +156,60 @@ def run_alert_processing_pipeline(num_alerts_to_generate: int = 20, noisy_alert_
     2. Enriches the alerts.
     3. Groups alerts into retrospective summaries.
     4. Processes each summary through Langgraph to get actionable insights.
+
+    With `parallel=True`, step 4 runs up to `max_in_flight` Langgraph calls at once,
+    optionally capped at `requests_per_second` and with a per-call `call_timeout_seconds`.
+    Insights are still reported in the same order as the summaries.
+
+    Alerts are noisy when `noisy_alert_threshold` of them share a title and component within
+    `noisy_window_minutes` (None: anywhere in the input).
+
+    With `columnar=True`, the alerts are converted to an AlertBatch after step 1 and
+    enriched and grouped column-wise.
+
+    With `streaming=True`, the steps run as chained generators instead (see
+    run_streaming_alert_pipeline), so insights start arriving before all alerts are generated.
+
+    If `insights_path` is set, each insight is also appended to that file as a JSON line.
+
+    If `alerts_path` is set, alerts are read from that export (JSONL or an alert column file,
+    see src/alert_files.py) instead of being generated in step 1. In columnar mode a column
+    file is memory-mapped rather than parsed.
     """
+    if streaming:
+        alerts = load_alerts(alerts_path) if alerts_path else generate_alert_stream(num_alerts_to_generate)
+        run_streaming_alert_pipeline(
+            alerts, noisy_alert_threshold, max_items_per_summary,
+            parallel=parallel, max_in_flight=max_in_flight, requests_per_second=requests_per_second,
+            call_timeout_seconds=call_timeout_seconds, noisy_window_minutes=noisy_window_minutes,
+            flush_after_minutes=flush_after_minutes, insights_path=insights_path)
+        return
+
     print("Starting alert processing pipeline...")
 
-    # 1. Generate mock alerts
-    print(f"\nStep 1: Generating {num_alerts_to_generate} mock alerts...")
-    mock_alerts = [generate_random_alert_item() for _ in range(num_alerts_to_generate)]
-    print(f"Generated {len(mock_alerts)} alerts.")
+    # 1. Generate mock alerts (or load them from an export)
+    if alerts_path:
+        print(f"\nStep 1: Loading alerts from {alerts_path}...")
+        mock_alerts = load_alert_batch(alerts_path) if columnar else list(load_alerts(alerts_path))
+        print(f"Loaded {len(mock_alerts)} alerts.")
+    else:
+        print(f"\nStep 1: Generating {num_alerts_to_generate} mock alerts...")
+        mock_alerts = [generate_random_alert_item() for _ in range(num_alerts_to_generate)]
+        print(f"Generated {len(mock_alerts)} alerts.")
+        if columnar:
+            mock_alerts = AlertBatch.from_items(mock_alerts)
     # for alert in mock_alerts[:2]:
     #     print(f"  - {alert}")
 
     # 2. Enrich these alerts
     print("\nStep 2: Enriching alerts...")
-    enriched_alerts = enrich_alert_items(mock_alerts, noisy_threshold_count=noisy_alert_threshold)
-    noisy_count = sum(1 for alert in enriched_alerts if alert.is_noisy)
-    self_resolved_count = sum(1 for alert in enriched_alerts if alert.is_self_resolved)
+    enriched_alerts = enrich_alert_items(mock_alerts, noisy_threshold_count=noisy_alert_threshold,
+                                         noisy_window_minutes=noisy_window_minutes)
+    if columnar:
+        noisy_count, self_resolved_count = int(enriched_alerts.is_noisy.sum()), int(enriched_alerts.is_self_resolved.sum())
+    else:
+        noisy_count = sum(1 for alert in enriched_alerts if alert.is_noisy)
+        self_resolved_count = sum(1 for alert in enriched_alerts if alert.is_self_resolved)
     print(f"Enrichment complete. Noisy alerts: {noisy_count}, Self-resolved alerts: {self_resolved_count}.")
     # for alert in enriched_alerts[:2]:
     #     print(f"  - {alert}")
@@ -186,19 +227,123 @@ def run_alert_processing_pipeline(num_alerts_to_generate: int = 20, noisy_alert_
         print("No summaries generated to process.")
         return
 
+    warm_up_insights_graph()
+
+    if parallel:
+        print(f"Running up to {max_in_flight} Langgraph calls in parallel"
+              f" (rate limit: {requests_per_second or 'none'} req/s, timeout: {call_timeout_seconds or 'none'} s).")
+        insights_per_summary = map_bounded(
+            process_summary_with_langgraph,
+            retrospective_summaries,
+            max_in_flight=max_in_flight,
+            requests_per_second=requests_per_second,
+            timeout_seconds=call_timeout_seconds,
+            on_timeout=lambda s: f"Error: Langgraph call for summary {s.summary_id} timed out after {call_timeout_seconds}s.",
+        )
+    else:
+        insights_per_summary = (process_summary_with_langgraph(summary) for summary in retrospective_summaries)
+
     all_insights = []
-    for summary in retrospective_summaries:
-        insights = process_summary_with_langgraph(summary) # This is the call to the (currently mock) Langgraph function
-        all_insights.append({
-            "summary_id": summary.summary_id,
-            "tags": summary.tags,
-            "insight": insights
-        })
-        print(f"Insight for Summary ID {summary.summary_id}: {insights}")
+    sink = JsonlSink(insights_path) if insights_path else None
+    try:
+        for summary, insights in zip(retrospective_summaries, insights_per_summary):
+            all_insights.append({
+                "summary_id": summary.summary_id,
+                "tags": summary.tags,
+                "insight": insights
+            })
+            print(f"Insight for Summary ID {summary.summary_id}: {insights}")
+            if sink:
+                sink.write(insight_record(summary, insights))
+    finally:
+        if sink:
+            sink.close()
 
     print("\n--- Pipeline Complete ---")
     print(f"Processed {len(retrospective_summaries)} summaries and generated {len(all_insights)} insights.")
-    # Optionally, save insights to a file or database here
+    if insights_path:
+        print(f"Insights written to {insights_path}.")
+
+def warm_up_insights_graph():
+    """Compiles the insights graph once, before the first summary needs it."""
+    try:
+        from backend.graph import warm_up
+        warm_up(["insights"])
+    except ImportError as e:
+        print(f"Could not warm up the Langgraph insights graph: {e}")
+
+def insight_record(summary: RetrospectiveSummary, insights: str) -> Dict[str, Any]:
+    """The JSON-serializable record written to an insights sink for one summary."""
+    created = [item.created_date for item in summary.items]
+    return {
+        "summary_id": summary.summary_id,
+        "tags": sorted(summary.tags),
+        "item_count": len(summary.items),
+        "first_alert_at": min(created).isoformat() if created else None,
+        "last_alert_at": max(created).isoformat() if created else None,
+        "insight": insights,
+    }
+
+def run_streaming_alert_pipeline(alerts: Iterable[AlertItem], noisy_alert_threshold: int = 2, max_items_per_summary: int = 5,
+                                 parallel: bool = False, max_in_flight: int = 8,
+                                 requests_per_second: Optional[float] = None, call_timeout_seconds: Optional[float] = None,
+                                 noisy_window_minutes: Optional[float] = DEFAULT_NOISY_WINDOW_MINUTES,
+                                 flush_after_minutes: Optional[float] = DEFAULT_FLUSH_AFTER_MINUTES,
+                                 insights_path: Optional[str] = None) -> int:
+    """
+    Streaming variant of run_alert_processing_pipeline over `alerts` (any iterable, e.g. a feed).
+    Enrichment, grouping and insight generation are chained generators (src/streaming.py): a
+    summary goes to Langgraph as soon as its group holds `max_items_per_summary` alerts or
+    `flush_after_minutes` of alert time have passed since its first alert, and each insight is
+    printed (and appended to `insights_path` as a JSON line) as soon as it is ready. With
+    `parallel=True`, at most `max_in_flight` summaries are being processed at once; the stages
+    upstream are only pulled when a slot frees up. Returns the number of insights produced.
+    """
+    print("Starting streaming alert processing pipeline...")
+    warm_up_insights_graph()
+
+    counts = {"alerts": 0, "noisy": 0, "self_resolved": 0}
+    def counted(enriched_alerts: Iterable[AlertItem]) -> Iterable[AlertItem]:
+        for alert in enriched_alerts:
+            counts["alerts"] += 1
+            counts["noisy"] += alert.is_noisy
+            counts["self_resolved"] += alert.is_self_resolved
+            yield alert
+
+    enriched = counted(stream_enrich(alerts, noisy_threshold_count=noisy_alert_threshold,
+                                     noisy_window_minutes=noisy_window_minutes))
+    summaries = stream_group(enriched, max_alerts_per_summary=max_items_per_summary,
+                             flush_after_minutes=flush_after_minutes)
+    process = lambda summary: (summary, process_summary_with_langgraph(summary))
+    if parallel:
+        results = imap_bounded(
+            process, summaries,
+            max_in_flight=max_in_flight,
+            requests_per_second=requests_per_second,
+            timeout_seconds=call_timeout_seconds,
+            on_timeout=lambda s: (s, f"Error: Langgraph call for summary {s.summary_id} timed out after {call_timeout_seconds}s."),
+        )
+    else:
+        results = map(process, summaries)
+
+    produced = 0
+    sink = JsonlSink(insights_path) if insights_path else None
+    try:
+        for summary, insights in results:
+            produced += 1
+            print(f"Insight for Summary ID {summary.summary_id}: {insights}")
+            if sink:
+                sink.write(insight_record(summary, insights))
+    finally:
+        if sink:
+            sink.close()
+
+    print("\n--- Streaming Pipeline Complete ---")
+    print(f"Processed {counts['alerts']} alerts (noisy: {counts['noisy']}, self-resolved: {counts['self_resolved']})"
+          f" and generated {produced} insights.")
+    if insights_path:
+        print(f"Insights written to {insights_path}.")
+    return produced
 
 if __name__ == "__main__":
     run_alert_processing_pipeline(num_alerts_to_generate=50, noisy_alert_threshold=3, max_items_per_summary=7)
@@ -1,6 +1,9 @@
+import sys
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import List, Set
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Union
+
+import numpy as np
 
 @dataclass
 class AlertItem:
@@ -11,21 +14,315 @@ class AlertItem:
     created_date: datetime
     alert_node_analysis: dict = field(default_factory=dict)
     graph_analysis: dict = field(default_factory=dict)
+    resolved_date: Optional[datetime] = None  # None while the alert is open
     # Enrichment fields
     is_noisy: bool = False
     is_self_resolved: bool = False
+    # Tags from the tag rules (src/tag_rules.py), cached on first evaluation
+    tags: Optional[FrozenSet[str]] = field(default=None, compare=False, repr=False)
     # Additional optional fields can be added here
     # e.g., severity: str, source: str, etc.
 
     def __str__(self):
         return f"Alert(id='{self.id}', title='{self.title}', status='{self.status}', created='{self.created_date.isoformat()}', noisy={self.is_noisy}, self_resolved={self.is_self_resolved})"
 
+# created_date is stored as integer microseconds since this epoch (naive datetimes are taken as UTC).
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = _EPOCH.replace(tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# resolved_us of alerts without a resolved_date.
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+def _to_us(value: datetime) -> int:
+    if value.tzinfo is not None:  # aware datetimes are converted to naive UTC
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+def datetime_from_us(us: int, tz: Optional[tzinfo] = None) -> datetime:
+    """
+    The datetime for microseconds since the Unix epoch (as stored in AlertBatch): naive UTC,
+    or in time zone `tz` if given.
+    """
+    if tz is None:
+        return _EPOCH + timedelta(microseconds=us)
+    return (_EPOCH_UTC + timedelta(microseconds=us)).astimezone(tz)
+
+# Integers up to this size are exact in a float64 column; larger ones are kept in extra_fields.
+_MAX_EXACT_INT = 2 ** 53
+
+def _intern(values: Iterable[Optional[str]], categories: List[str], index: Dict[str, int], dtype) -> np.ndarray:
+    """Returns the category code of each value (-1 for None), adding new values to `categories`."""
+    codes = []
+    for value in values:
+        if value is None:
+            codes.append(-1)
+            continue
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(categories)
+            categories.append(value)
+        codes.append(code)
+    return np.array(codes, dtype=dtype)
+
+# Longest id stored as fixed-width bytes; longer (or non-ASCII) ids are kept as Python strings.
+MAX_FIXED_WIDTH_ID = 64
+
+def _id_array(ids: Sequence[str]) -> np.ndarray:
+    """Ids as fixed-width ASCII bytes (36 bytes per UUID instead of ~90 for a str), else an object array."""
+    if ids and max(map(len, ids)) <= MAX_FIXED_WIDTH_ID:
+        try:
+            return np.array(ids, dtype="S")
+        except UnicodeEncodeError:
+            pass
+    return np.array(ids, dtype=object)
+
+def _id_str(value) -> str:
+    return value.decode("ascii") if isinstance(value, bytes) else value
+
+@dataclass
+class AlertBatch:
+    """
+    Struct-of-arrays form of many AlertItems, for pipelines over large alert volumes.
+
+    Titles, statuses, components, metrics and impact radii are categorical: each is an
+    integer code array into a list of distinct strings (-1 where the field is missing).
+    created_date and resolved_date are int64 arrays of microseconds since the Unix epoch
+    (resolved_us is NO_TIMESTAMP for open alerts), read back in the batch's time zone `tz`
+    (None for naive UTC datetimes). Metric values are a float64 array (NaN where missing;
+    value_is_int marks the ones that were ints), and correlated alert ids are stored CSR-style:
+    the ids of alert i are correlated_ids[correlated_offsets[i]:correlated_offsets[i + 1]].
+    Any other alert_node_analysis/graph_analysis keys are kept per index in `extra_fields`,
+    and tags cached on the items (AlertItem.tags) in `cached_tags`.
+    """
+    ids: np.ndarray                 # fixed-width bytes, or object array of str (see _id_array)
+    title_codes: np.ndarray         # int32 -> titles
+    status_codes: np.ndarray        # int16 -> statuses
+    created_us: np.ndarray          # int64
+    resolved_us: np.ndarray         # int64, NO_TIMESTAMP if unresolved
+    component_codes: np.ndarray     # int32 -> components
+    metric_codes: np.ndarray        # int16 -> metrics
+    values: np.ndarray              # float64
+    value_is_int: np.ndarray        # bool: the value was an int
+    impact_codes: np.ndarray        # int16 -> impacts
+    correlated_offsets: np.ndarray  # int64, len(ids) + 1
+    correlated_ids: np.ndarray      # as ids
+    has_correlated: np.ndarray      # bool: graph_analysis has a "correlated_alerts" key (possibly empty)
+    is_noisy: np.ndarray            # bool
+    is_self_resolved: np.ndarray    # bool
+    titles: List[str] = field(default_factory=list)
+    statuses: List[str] = field(default_factory=list)
+    components: List[str] = field(default_factory=list)
+    metrics: List[str] = field(default_factory=list)
+    impacts: List[str] = field(default_factory=list)
+    # index -> ("alert_node_analysis" | "graph_analysis") -> {key: value} for keys not stored as columns
+    extra_fields: Dict[int, Dict[str, dict]] = field(default_factory=dict)
+    # index -> AlertItem.tags, for items that had them cached
+    cached_tags: Dict[int, FrozenSet[str]] = field(default_factory=dict)
+    tz: Optional[tzinfo] = None
+
+    NODE_COLUMNS = ("component", "metric", "value")
+    GRAPH_COLUMNS = ("correlated_alerts", "impact_radius")
+
+    @classmethod
+    def from_items(cls, items: Iterable[AlertItem]) -> "AlertBatch":
+        """
+        Builds a batch from AlertItems (one pass; the items are not modified). Items read back
+        unchanged, except that dates in more than one time zone (or naive and aware dates mixed)
+        come back as the same instants in UTC.
+        """
+        items = items if isinstance(items, Sequence) else list(items)
+        titles, statuses, components, metrics, impacts = [], [], [], [], []
+        title_index, status_index, component_index, metric_index, impact_index = {}, {}, {}, {}, {}
+        created_us, resolved_us, values, value_is_int, offsets, correlated, has_correlated = [], [], [], [], [0], [], []
+        extra_fields: Dict[int, Dict[str, dict]] = {}
+        cached_tags: Dict[int, FrozenSet[str]] = {}
+        component_values, metric_values, impact_values = [], [], []
+        tz = items[0].created_date.tzinfo if items else None
+        for i, item in enumerate(items):
+            created_us.append(_to_us(item.created_date))
+            resolved_us.append(_to_us(item.resolved_date) if item.resolved_date is not None else NO_TIMESTAMP)
+            if item.created_date.tzinfo != tz or (item.resolved_date is not None and item.resolved_date.tzinfo != tz):
+                tz = timezone.utc
+
+            node, graph = item.alert_node_analysis, item.graph_analysis
+            component_values.append(node.get("component"))
+            metric_values.append(node.get("metric"))
+            value = node.get("value")
+            is_int = isinstance(value, int) and not isinstance(value, bool)
+            if isinstance(value, float) or (is_int and abs(value) <= _MAX_EXACT_INT):
+                values.append(value)
+                value_is_int.append(is_int)
+            else:
+                value_is_int.append(False)
+                values.append(np.nan)
+                if value is not None:
+                    extra_fields.setdefault(i, {}).setdefault("alert_node_analysis", {})["value"] = value
+            impact_values.append(graph.get("impact_radius"))
+            has_correlated.append("correlated_alerts" in graph)
+            correlated.extend(graph.get("correlated_alerts", ()))
+            offsets.append(len(correlated))
+
+            node_extra = {k: v for k, v in node.items() if k not in cls.NODE_COLUMNS}
+            graph_extra = {k: v for k, v in graph.items() if k not in cls.GRAPH_COLUMNS}
+            if node_extra:
+                extra_fields.setdefault(i, {}).setdefault("alert_node_analysis", {}).update(node_extra)
+            if graph_extra:
+                extra_fields.setdefault(i, {})["graph_analysis"] = graph_extra
+            if item.tags is not None:
+                cached_tags[i] = item.tags
+
+        return cls(
+            ids=_id_array([item.id for item in items]),
+            title_codes=_intern((item.title for item in items), titles, title_index, np.int32),
+            status_codes=_intern((item.status for item in items), statuses, status_index, np.int16),
+            created_us=np.array(created_us, dtype=np.int64),
+            resolved_us=np.array(resolved_us, dtype=np.int64),
+            component_codes=_intern(component_values, components, component_index, np.int32),
+            metric_codes=_intern(metric_values, metrics, metric_index, np.int16),
+            values=np.array(values, dtype=np.float64),
+            value_is_int=np.array(value_is_int, dtype=bool),
+            impact_codes=_intern(impact_values, impacts, impact_index, np.int16),
+            correlated_offsets=np.array(offsets, dtype=np.int64),
+            correlated_ids=_id_array(correlated),
+            has_correlated=np.array(has_correlated, dtype=bool),
+            is_noisy=np.fromiter((item.is_noisy for item in items), dtype=bool, count=len(items)),
+            is_self_resolved=np.fromiter((item.is_self_resolved for item in items), dtype=bool, count=len(items)),
+            titles=titles, statuses=statuses, components=components, metrics=metrics, impacts=impacts,
+            extra_fields=extra_fields,
+            cached_tags=cached_tags,
+            tz=tz,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def item(self, i: int) -> AlertItem:
+        """Materializes alert `i` as an AlertItem."""
+        node, graph = {}, {}
+        if self.component_codes[i] >= 0:
+            node["component"] = self.components[self.component_codes[i]]
+        if self.metric_codes[i] >= 0:
+            node["metric"] = self.metrics[self.metric_codes[i]]
+        if not np.isnan(self.values[i]):
+            node["value"] = int(self.values[i]) if self.value_is_int[i] else float(self.values[i])
+        start, end = self.correlated_offsets[i], self.correlated_offsets[i + 1]
+        if self.has_correlated[i]:
+            graph["correlated_alerts"] = [_id_str(value) for value in self.correlated_ids[start:end]]
+        if self.impact_codes[i] >= 0:
+            graph["impact_radius"] = self.impacts[self.impact_codes[i]]
+        extra = self.extra_fields.get(i)
+        if extra:
+            node.update(extra.get("alert_node_analysis", {}))
+            graph.update(extra.get("graph_analysis", {}))
+        return AlertItem(
+            id=_id_str(self.ids[i]),
+            title=self.titles[self.title_codes[i]],
+            status=self.statuses[self.status_codes[i]],
+            created_date=datetime_from_us(int(self.created_us[i]), self.tz),
+            resolved_date=(datetime_from_us(int(self.resolved_us[i]), self.tz)
+                           if self.resolved_us[i] != NO_TIMESTAMP else None),
+            alert_node_analysis=node,
+            graph_analysis=graph,
+            is_noisy=bool(self.is_noisy[i]),
+            is_self_resolved=bool(self.is_self_resolved[i]),
+            tags=self.cached_tags.get(i),
+        )
+
+    def __getitem__(self, i: int) -> AlertItem:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("AlertBatch index out of range")
+        return self.item(i)
+
+    def __iter__(self) -> Iterator[AlertItem]:
+        """Yields AlertItems lazily, so a batch can stand in for a list of items."""
+        return (self.item(i) for i in range(len(self)))
+
+    def to_items(self) -> List[AlertItem]:
+        return list(self)
+
+    def take(self, indices: Union[Sequence[int], np.ndarray]) -> "AlertBatch":
+        """Returns a new batch with the alerts at `indices`, in that order. Categories are shared."""
+        indices = np.asarray(indices, dtype=np.int64)
+        starts, ends = self.correlated_offsets[indices], self.correlated_offsets[indices + 1]
+        lengths = ends - starts
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Positions of every selected correlated id: each run starts[k]..ends[k] laid end to end.
+        positions = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+        extra_fields, cached_tags = {}, {}
+        if self.extra_fields or self.cached_tags:
+            for new_i, old_i in enumerate(indices.tolist()):
+                if old_i in self.extra_fields:
+                    extra_fields[new_i] = self.extra_fields[old_i]
+                if old_i in self.cached_tags:
+                    cached_tags[new_i] = self.cached_tags[old_i]
+        return AlertBatch(
+            ids=self.ids[indices],
+            title_codes=self.title_codes[indices],
+            status_codes=self.status_codes[indices],
+            created_us=self.created_us[indices],
+            resolved_us=self.resolved_us[indices],
+            component_codes=self.component_codes[indices],
+            metric_codes=self.metric_codes[indices],
+            values=self.values[indices],
+            value_is_int=self.value_is_int[indices],
+            impact_codes=self.impact_codes[indices],
+            correlated_offsets=offsets,
+            correlated_ids=self.correlated_ids[positions],
+            has_correlated=self.has_correlated[indices],
+            is_noisy=self.is_noisy[indices],
+            is_self_resolved=self.is_self_resolved[indices],
+            titles=self.titles, statuses=self.statuses, components=self.components,
+            metrics=self.metrics, impacts=self.impacts,
+            extra_fields=extra_fields, cached_tags=cached_tags, tz=self.tz,
+        )
+
+    def slice(self, start: int, stop: int) -> "AlertBatch":
+        """Alerts start..stop-1 as a new batch whose columns are views of this one's (no copy, except correlated_offsets)."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        first, last = int(self.correlated_offsets[start]), int(self.correlated_offsets[stop])
+        extra_fields = {i - start: fields for i, fields in self.extra_fields.items() if start <= i < stop}
+        cached_tags = {i - start: tags for i, tags in self.cached_tags.items() if start <= i < stop}
+        return AlertBatch(
+            ids=self.ids[start:stop],
+            title_codes=self.title_codes[start:stop],
+            status_codes=self.status_codes[start:stop],
+            created_us=self.created_us[start:stop],
+            resolved_us=self.resolved_us[start:stop],
+            component_codes=self.component_codes[start:stop],
+            metric_codes=self.metric_codes[start:stop],
+            values=self.values[start:stop],
+            value_is_int=self.value_is_int[start:stop],
+            impact_codes=self.impact_codes[start:stop],
+            correlated_offsets=np.asarray(self.correlated_offsets[start:stop + 1]) - first,
+            correlated_ids=self.correlated_ids[first:last],
+            has_correlated=self.has_correlated[start:stop],
+            is_noisy=self.is_noisy[start:stop],
+            is_self_resolved=self.is_self_resolved[start:stop],
+            titles=self.titles, statuses=self.statuses, components=self.components,
+            metrics=self.metrics, impacts=self.impacts,
+            extra_fields=extra_fields, cached_tags=cached_tags, tz=self.tz,
+        )
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the batch's arrays and id strings (categories are negligible)."""
+        total = sum(getattr(self, name).nbytes for name in (
+            "ids", "title_codes", "status_codes", "created_us", "resolved_us", "component_codes", "metric_codes",
+            "values", "value_is_int", "impact_codes", "correlated_offsets", "correlated_ids", "has_correlated", "is_noisy", "is_self_resolved"))
+        for ids in (self.ids, self.correlated_ids):
+            if ids.dtype == object:
+                total += sum(sys.getsizeof(s) for s in ids)
+        return total
+
 @dataclass
 class RetrospectiveSummary:
     """Represents a retrospective summary of alerts grouped by tags."""
     summary_id: str
     tags: Set[str]
-    items: List[AlertItem]
+    items: Union[List[AlertItem], AlertBatch]  # An AlertBatch iterates as AlertItems
     generated_at: datetime = field(default_factory=datetime.utcnow)
 
     def __str__(self):
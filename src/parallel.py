@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+
+class RateLimiter:
+    """
+    Spaces out acquisitions so that at most `requests_per_second` calls start per second.
+    Each caller reserves the next free slot, so bursts are smoothed rather than rejected.
+    """
+    def __init__(self, requests_per_second: float):
+        if requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive.")
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Reserving the slot happens without awaiting, so it is atomic on the event loop.
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def wait(self):
+        """Blocking version of acquire, for synchronous callers (not to be mixed with acquire)."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def map_bounded(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_in_flight: int = 8,
+    requests_per_second: Optional[float] = None,
+    timeout_seconds: Optional[float] = None,
+    on_timeout: Optional[Callable[[Any], Any]] = None,
+) -> List[Any]:
+    """
+    Calls `func` on every item using a thread pool and returns the results in input order.
+
+    - At most `max_in_flight` calls run at the same time.
+    - If `requests_per_second` is set, call start times are spaced to respect that rate.
+    - If `timeout_seconds` is set, a call that runs longer is abandoned and `on_timeout(item)`
+      is used as its result (a TimeoutError is raised if `on_timeout` is not given).
+      Python threads cannot be killed, so an abandoned call keeps its worker thread until it returns;
+      the timeout of a later call only starts once a worker thread actually runs it.
+
+    Must be called from synchronous code (it runs its own event loop).
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1.")
+    items = list(items)
+    if not items:
+        return []
+    return asyncio.run(_map_bounded_async(func, items, max_in_flight, requests_per_second, timeout_seconds, on_timeout))
+
+
+async def _map_bounded_async(func, items, max_in_flight, requests_per_second, timeout_seconds, on_timeout):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="map-bounded")
+
+    async def run_one(item):
+        async with semaphore:
+            if rate_limiter:
+                await rate_limiter.acquire()
+            if timeout_seconds is None:
+                return await loop.run_in_executor(executor, func, item)
+            started = asyncio.Event()
+
+            def call():
+                loop.call_soon_threadsafe(started.set)
+                return func(item)
+
+            future = loop.run_in_executor(executor, call)
+            # Time spent queued behind abandoned (timed-out) calls doesn't count against the timeout.
+            waiter = asyncio.ensure_future(started.wait())
+            try:
+                await asyncio.wait((future, waiter), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            try:
+                return await asyncio.wait_for(future, timeout_seconds)
+            except asyncio.TimeoutError:
+                if on_timeout is None:
+                    raise
+                return on_timeout(item)
+
+    try:
+        # gather preserves the order of its arguments, so results line up with `items`.
+        return await asyncio.gather(*(run_one(item) for item in items))
+    finally:
+        # Don't block on abandoned (timed-out) calls; they finish in the background.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _CallStart:
+    """Set by the worker thread when a call actually begins running."""
+    __slots__ = ("event", "at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.at = None
+
+    def run(self, func, item):
+        self.at = time.monotonic()
+        self.event.set()
+        return func(item)
+
+
+def imap_bounded(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_in_flight: int = 8,
+    requests_per_second: Optional[float] = None,
+    timeout_seconds: Optional[float] = None,
+    on_timeout: Optional[Callable[[Any], Any]] = None,
+) -> Iterator[Any]:
+    """
+    Lazy version of map_bounded: yields `func(item)` for every item, in input order, as soon as
+    that result and all earlier ones are ready. Items are pulled from `items` only when one of
+    the `max_in_flight` slots is free, so a slow consumer or slow calls hold back the producer
+    instead of letting work pile up. The other arguments behave as in map_bounded.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1.")
+    rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="imap-bounded")
+    pending = deque()  # (item, future, start) in input order
+    items = iter(items)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if rate_limiter:
+                    rate_limiter.wait()
+                if timeout_seconds is None:
+                    pending.append((item, executor.submit(func, item), None))
+                else:
+                    start = _CallStart()
+                    pending.append((item, executor.submit(start.run, func, item), start))
+            if not pending:
+                return
+            item, future, start = pending.popleft()
+            try:
+                if start is None:
+                    result = future.result()
+                else:
+                    # The deadline runs from when a worker thread picks the call up, not from submit:
+                    # threads still busy with abandoned calls would otherwise eat later calls' timeouts.
+                    start.event.wait()
+                    result = future.result(max(0.0, start.at + timeout_seconds - time.monotonic()))
+            except TimeoutError:
+                if future.done() or on_timeout is None:  # done: func itself raised TimeoutError
+                    raise
+                result = on_timeout(item)
+            yield result
+    finally:
+        # Don't block on abandoned (timed-out) calls; they finish in the background.
+        executor.shutdown(wait=False, cancel_futures=True)
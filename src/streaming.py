@@ -0,0 +1,140 @@
+"""
+Streaming (generator) stages for the alert pipeline.
+
+Each stage consumes an iterator and yields as soon as it can, holding only a bounded amount of
+state, so alerts -> enriched alerts -> summaries -> insights flow through without any stage
+materializing the whole input:
+
+    alerts = generate_alert_stream(1_000_000)
+    enriched = stream_enrich(alerts)
+    summaries = stream_group(enriched, max_alerts_per_summary=50)
+    for summary in summaries: ...
+
+Alerts are expected roughly in creation order, as a live feed delivers them. Time windows use
+the alerts' created_date (event time), not the wall clock.
+"""
+import dataclasses
+import json
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.models import AlertItem, RetrospectiveSummary
+from src.enrichment import DEFAULT_NOISY_WINDOW_MINUTES
+from src.tag_rules import TagRuleSet, default_tag_rules
+
+# An open group is flushed once the newest alert is this much younger than the group's first alert.
+DEFAULT_FLUSH_AFTER_MINUTES = 60.0
+# At most this many alerts wait in open groups; beyond it the oldest group is flushed early.
+DEFAULT_MAX_BUFFERED_ALERTS = 10000
+
+
+def stream_enrich(alerts: Iterable[AlertItem], noisy_threshold_count: int = 3, self_resolved_minutes: int = 10,
+                  noisy_window_minutes: Optional[float] = DEFAULT_NOISY_WINDOW_MINUTES) -> Iterator[AlertItem]:
+    """
+    Streaming version of enrich_alert_items: yields an enriched copy of each alert as it arrives.
+    An alert is noisy when at least `noisy_threshold_count` alerts with its title and component
+    (itself included) were created within the last `noisy_window_minutes`; with None, any earlier
+    alert with its title counts. Only the timestamps inside the window are kept per title/component.
+    An alert is self-resolved when its resolved_date is within `self_resolved_minutes` of creation.
+    Correlated alerts are left as they are: the alerts that fire while one is open arrive after it.
+    """
+    if noisy_window_minutes is not None and noisy_window_minutes <= 0:
+        raise ValueError(f"noisy_window_minutes must be positive (or None), got {noisy_window_minutes}.")
+    self_resolved_within = timedelta(minutes=self_resolved_minutes)
+    window = timedelta(minutes=noisy_window_minutes) if noisy_window_minutes is not None else None
+    recent: Dict[Tuple[str, Optional[str]], Deque[datetime]] = {}
+    title_counts: Dict[str, int] = {}
+    seen = 0
+    for alert in alerts:
+        created = alert.created_date
+        if window is None:
+            title_counts[alert.title] = occurrences = title_counts.get(alert.title, 0) + 1
+        else:
+            times = recent.setdefault((alert.title, alert.alert_node_analysis.get("component")), deque())
+            while times and times[0] <= created - window:
+                times.popleft()
+            times.append(created)
+            occurrences = len(times)
+            seen += 1
+            if seen % 10000 == 0:  # forget titles/components not seen within the window
+                recent = {key: times for key, times in recent.items() if times[-1] > created - window}
+        yield dataclasses.replace(
+            alert,
+            is_noisy=alert.is_noisy or occurrences >= noisy_threshold_count,
+            is_self_resolved=alert.is_self_resolved or (alert.resolved_date is not None
+                                                        and alert.resolved_date - created <= self_resolved_within),
+            tags=None,  # flags changed, so any cached tags are stale
+        )
+
+
+def _summary(primary_tag: str, alerts: List[AlertItem], rules: TagRuleSet) -> RetrospectiveSummary:
+    tags: Set[str] = {primary_tag}
+    for alert in alerts:
+        tags |= rules.tags_for(alert)
+    return RetrospectiveSummary(summary_id=str(uuid.uuid4()), tags=tags, items=alerts)
+
+
+def stream_group(alerts: Iterable[AlertItem], max_alerts_per_summary: int = 10,
+                 flush_after_minutes: Optional[float] = DEFAULT_FLUSH_AFTER_MINUTES,
+                 max_buffered_alerts: int = DEFAULT_MAX_BUFFERED_ALERTS,
+                 rules: Optional[TagRuleSet] = None) -> Iterator[RetrospectiveSummary]:
+    """
+    Streaming version of group_alerts_into_summaries. Alerts collect in one open group per
+    primary tag; a group is emitted as a summary as soon as it holds `max_alerts_per_summary`
+    alerts, or once the watermark (the newest created_date seen) is `flush_after_minutes` past
+    its first alert (None: only when full or at the end). If more than `max_buffered_alerts`
+    alerts are waiting, the oldest group is emitted early. The rest is emitted when input ends.
+    """
+    rules = rules or default_tag_rules()
+    flush_after = timedelta(minutes=flush_after_minutes) if flush_after_minutes is not None else None
+    open_groups: "OrderedDict[str, Tuple[datetime, List[AlertItem]]]" = OrderedDict()  # oldest first
+    buffered = 0
+    watermark: Optional[datetime] = None
+    for alert in alerts:
+        primary_tag = min(rules.tags_for(alert))
+        if primary_tag not in open_groups:
+            open_groups[primary_tag] = (alert.created_date, [])
+        group = open_groups[primary_tag][1]
+        group.append(alert)
+        buffered += 1
+        if len(group) >= max_alerts_per_summary:
+            del open_groups[primary_tag]
+            buffered -= len(group)
+            yield _summary(primary_tag, group, rules)
+
+        watermark = alert.created_date if watermark is None else max(watermark, alert.created_date)
+        while open_groups:
+            oldest_tag, (opened_at, oldest) = next(iter(open_groups.items()))
+            if buffered <= max_buffered_alerts and (flush_after is None or watermark - opened_at < flush_after):
+                break
+            del open_groups[oldest_tag]
+            buffered -= len(oldest)
+            yield _summary(oldest_tag, oldest, rules)
+
+    for primary_tag, (_, group) in open_groups.items():
+        yield _summary(primary_tag, group, rules)
+
+
+class JsonlSink:
+    """Appends records as JSON lines, flushing each one so readers see insights as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
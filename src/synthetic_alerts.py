@@ -0,0 +1,229 @@
+"""
+Seeded, high-volume synthetic alerts for load and soak tests.
+
+Alerts are generated straight into AlertBatch columns, a batch at a time, with NumPy's
+vectorized RNG and counter-based ids ("<prefix><12-digit counter>"), so tens of millions of
+alerts take seconds rather than the hours of one generate_random_alert_item() call each.
+The volume is skewed the way real alert feeds are:
+- diurnal: alerts follow a daily cycle (DIURNAL_WEIGHTS), quiet at night, busiest mid-afternoon;
+- bursty: in some windows one component fires many times its usual rate (an alert storm),
+  mostly with one repeated title;
+- repeat titles and hot components: titles and components are drawn from Zipf-like
+  distributions, so a few of each make up most alerts, with a long tail.
+Alerts come out in creation order and are unenriched (see enrich_alert_batch). The same seed
+and batch size always give the same alerts. Write them with
+
+    python -m src.synthetic_alerts alerts.cols --alerts 10000000 --seed 7
+    python -m src.synthetic_alerts alerts.jsonl.gz --alerts 1000000
+"""
+import argparse
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from src.models import AlertBatch, NO_TIMESTAMP
+from src.alert_files import AlertColumnWriter, DEFAULT_BATCH_SIZE, write_jsonl_batches
+
+# Relative alert rate per hour of the day (00:00-01:00 first).
+DIURNAL_WEIGHTS = (0.35, 0.3, 0.25, 0.25, 0.3, 0.4, 0.6, 0.85, 1.1, 1.3, 1.4, 1.45,
+                   1.4, 1.5, 1.6, 1.6, 1.5, 1.35, 1.1, 0.9, 0.75, 0.6, 0.5, 0.4)
+BASE_TITLES = ("CPU Usage High", "Memory Threshold Exceeded", "Disk Space Low", "Network Latency Detected",
+               "Application Error Rate Spike", "Database Connection Failed", "Security Scan Alert")
+BASE_COMPONENTS = ("server-prod-01", "db-primary", "api-gateway", "user-service")
+METRICS = ("CPUUtilization", "MemoryUsage", "DiskReadOps", "Latency")
+STATUSES = ("open", "closed", "acknowledged")
+IMPACTS = ("small", "medium", "large")
+_US_PER_MINUTE = 60_000_000
+_ID_DIGITS = 12
+_SAMPLER_BITS = 16  # categorical draws resolve probabilities to 1 / 2**16
+
+
+@dataclass
+class SyntheticAlertProfile:
+    """Shape of the generated alert volume."""
+    num_titles: int = 200
+    num_components: int = 50
+    zipf_exponent: float = 1.1            # popularity of the rank-k title/component ~ 1 / k**exponent
+    burst_window_minutes: float = 10.0
+    burst_probability: float = 0.05       # share of windows with an alert storm
+    burst_factor: float = 8.0             # alert rate of a storm window relative to a normal one
+    status_probabilities: tuple = (0.2, 0.6, 0.2)   # as STATUSES
+    impact_probabilities: tuple = (0.6, 0.3, 0.1)   # as IMPACTS
+    mean_open_minutes: float = 30.0       # closed alerts stay open this long on average
+    diurnal_weights: tuple = field(default=DIURNAL_WEIGHTS)
+
+
+def _zipf_weights(n: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _categorical_sampler(probabilities) -> np.ndarray:
+    """
+    Lookup table for drawing categories: table[k] for uniform random k < 2**_SAMPLER_BITS is
+    category i with probability ~probabilities[i]. A gather is several times faster than
+    rng.choice(p=...), which binary-searches the cumulative distribution for every draw.
+    """
+    cumulative = np.cumsum(np.asarray(probabilities, dtype=np.float64))
+    grid = (np.arange(1 << _SAMPLER_BITS) + 0.5) / (1 << _SAMPLER_BITS) * cumulative[-1]
+    return np.searchsorted(cumulative, grid, side="right").astype(np.int32)
+
+
+def _draw(table: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    return table[rng.integers(0, len(table), count)]
+
+
+def counter_ids(start: int, count: int, prefix: str = "A") -> np.ndarray:
+    """Ids prefix + zero-padded counter for start..start + count - 1, as a fixed-width bytes array."""
+    counters = np.arange(start, start + count, dtype=np.int64)
+    width = len(prefix) + _ID_DIGITS
+    chars = np.empty((count, width), dtype=np.uint8)
+    chars[:, :len(prefix)] = np.frombuffer(prefix.encode("ascii"), dtype=np.uint8)
+    powers = 10 ** np.arange(_ID_DIGITS - 1, -1, -1, dtype=np.int64)
+    chars[:, len(prefix):] = (counters[:, None] // powers) % 10 + ord("0")
+    return chars.view(f"S{width}").reshape(count)
+
+
+class SyntheticAlertGenerator:
+    """
+    Generates `num_alerts` alerts created between `start` and `start + span` (see the module
+    docstring). The time windows (diurnal rate, storms and their component and title) are drawn
+    up front from `seed`; each batch then draws its alerts from its own seeded stream.
+    """
+
+    def __init__(self, num_alerts: int, seed: int = 0, start: Optional[datetime] = None,
+                 span: timedelta = timedelta(days=7), profile: Optional[SyntheticAlertProfile] = None,
+                 id_prefix: str = "A"):
+        self.num_alerts = num_alerts
+        self.seed = seed
+        self.profile = profile = profile or SyntheticAlertProfile()
+        self.id_prefix = id_prefix
+        start = start or datetime(2024, 1, 1)
+        rng = np.random.default_rng([seed, 0])
+
+        self.titles: List[str] = list(BASE_TITLES[:profile.num_titles]) + [
+            f"Synthetic Check {k:03d} Failed" for k in range(max(profile.num_titles - len(BASE_TITLES), 0))]
+        self.components: List[str] = list(BASE_COMPONENTS[:profile.num_components]) + [
+            f"service-{k:03d}" for k in range(max(profile.num_components - len(BASE_COMPONENTS), 0))]
+        # Popularity ranks are shuffled so the hottest title/component isn't always the first one.
+        self._title_table = _categorical_sampler(rng.permutation(_zipf_weights(len(self.titles), profile.zipf_exponent)))
+        self._component_table = _categorical_sampler(rng.permutation(_zipf_weights(len(self.components), profile.zipf_exponent)))
+        self._status_table = _categorical_sampler(profile.status_probabilities)
+        self._impact_table = _categorical_sampler(profile.impact_probabilities)
+        self._metric_of_title = rng.integers(0, len(METRICS), len(self.titles), dtype=np.int16)
+
+        # Windows of burst_window_minutes, each with a rate (diurnal x storm) and a storm component/title.
+        window_us = int(profile.burst_window_minutes * _US_PER_MINUTE)
+        self._start_us = int(np.datetime64(start, "us").astype(np.int64))  # naive UTC, as in AlertBatch
+        windows = max(1, -(-int(span / timedelta(microseconds=1)) // window_us))
+        self._window_us = window_us
+        window_starts = self._start_us + np.arange(windows, dtype=np.int64) * window_us
+        hour_of_day = (window_starts // (60 * _US_PER_MINUTE)) % 24
+        storm = rng.random(windows) < profile.burst_probability
+        rate = np.asarray(profile.diurnal_weights, dtype=np.float64)[hour_of_day] * np.where(storm, profile.burst_factor, 1.0)
+        self._cumulative_rate = np.concatenate(([0.0], np.cumsum(rate)))
+        self._cumulative_rate /= self._cumulative_rate[-1]
+        # Share of a storm window's alerts that belong to the storm (the rest is the usual traffic).
+        self._storm_share = np.where(storm, 1.0 - 1.0 / profile.burst_factor, 0.0)
+        self._storm_component = _draw(self._component_table, windows, rng)
+        self._storm_title = _draw(self._title_table, windows, rng)
+
+    def _created_us(self, start: int, count: int, rng: np.random.Generator) -> tuple:
+        """Creation times of alerts start..start + count - 1 and their windows, by inverting the cumulative rate."""
+        # Stratified: alert i falls in the i-th of num_alerts equal slices of the rate, so times are ascending.
+        u = (np.arange(start, start + count, dtype=np.float64) + rng.random(count)) / max(self.num_alerts, 1)
+        window = np.searchsorted(self._cumulative_rate, u, side="right") - 1
+        window = np.minimum(window, len(self._cumulative_rate) - 2)
+        lo, hi = self._cumulative_rate[window], self._cumulative_rate[window + 1]
+        within = np.where(hi > lo, (u - lo) / np.where(hi > lo, hi - lo, 1.0), 0.0)
+        created = self._start_us + window * self._window_us + (within * self._window_us).astype(np.int64)
+        return created, window
+
+    def batch(self, index: int, batch_size: int = DEFAULT_BATCH_SIZE) -> AlertBatch:
+        """Alerts index * batch_size up to (index + 1) * batch_size (fewer for the last batch)."""
+        start = index * batch_size
+        count = max(0, min(batch_size, self.num_alerts - start))
+        profile = self.profile
+        rng = np.random.default_rng([self.seed, 1, index])
+
+        created_us, window = self._created_us(start, count, rng)
+        in_storm = rng.random(count) < self._storm_share[window]
+        component_codes = np.where(in_storm, self._storm_component[window], _draw(self._component_table, count, rng))
+        title_codes = np.where(in_storm, self._storm_title[window], _draw(self._title_table, count, rng))
+        status_codes = _draw(self._status_table, count, rng).astype(np.int16)
+        closed = status_codes == STATUSES.index("closed")
+        open_us = rng.exponential(profile.mean_open_minutes * _US_PER_MINUTE, count).astype(np.int64)
+        resolved_us = np.where(closed, created_us + open_us, NO_TIMESTAMP)
+        # Metric values between 50 and 100 (mean ~70), higher during storms (mean ~83).
+        values = np.round(50.0 + 50.0 * rng.random(count) ** np.where(in_storm, 0.5, 1.5), 2)
+
+        return AlertBatch(
+            ids=counter_ids(start, count, self.id_prefix),
+            title_codes=title_codes,
+            status_codes=status_codes,
+            created_us=created_us,
+            resolved_us=resolved_us,
+            component_codes=component_codes,
+            metric_codes=self._metric_of_title[title_codes],
+            values=values,
+            value_is_int=np.zeros(count, dtype=bool),
+            impact_codes=_draw(self._impact_table, count, rng).astype(np.int16),
+            correlated_offsets=np.zeros(count + 1, dtype=np.int64),
+            correlated_ids=np.zeros(0, dtype="S1"),
+            has_correlated=np.zeros(count, dtype=bool),
+            is_noisy=np.zeros(count, dtype=bool),
+            is_self_resolved=np.zeros(count, dtype=bool),
+            titles=self.titles, statuses=list(STATUSES), components=self.components,
+            metrics=list(METRICS), impacts=list(IMPACTS),
+        )
+
+    def batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[AlertBatch]:
+        """All alerts, `batch_size` at a time, in creation order."""
+        for index in range(-(-self.num_alerts // batch_size)):
+            yield self.batch(index, batch_size)
+
+
+def generate_alert_batches(num_alerts: int, seed: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+                           **options) -> Iterator[AlertBatch]:
+    """Yields `num_alerts` synthetic alerts as AlertBatches; `options` go to SyntheticAlertGenerator."""
+    return SyntheticAlertGenerator(num_alerts, seed, **options).batches(batch_size)
+
+
+def write_synthetic_alerts(path: str, num_alerts: int, seed: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+                           columnar: Optional[bool] = None, **options) -> int:
+    """
+    Streams synthetic alerts to an alert column file, or to JSONL (gzipped for .gz) when `path`
+    ends in .jsonl/.jsonl.gz (or `columnar` is False). Memory stays bounded by the batch size.
+    """
+    if columnar is None:
+        columnar = not path.endswith((".jsonl", ".jsonl.gz", ".json", ".ndjson"))
+    batches = generate_alert_batches(num_alerts, seed, batch_size, **options)
+    if not columnar:
+        return write_jsonl_batches(batches, path)
+    with AlertColumnWriter(path) as writer:
+        for batch in batches:
+            writer.append(batch)
+    return writer.count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write seeded synthetic alerts to a column file or JSONL.")
+    parser.add_argument("destination", help="Output path; .jsonl or .jsonl.gz writes JSONL, anything else a column file.")
+    parser.add_argument("--alerts", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=float, default=7.0, help="Time span of the alerts.")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="First creation time (ISO 8601).")
+    parser.add_argument("--titles", type=int, default=SyntheticAlertProfile.num_titles)
+    parser.add_argument("--components", type=int, default=SyntheticAlertProfile.num_components)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    written = write_synthetic_alerts(args.destination, args.alerts, args.seed, args.batch_size,
+                                     start=args.start, span=timedelta(days=args.days),
+                                     profile=SyntheticAlertProfile(num_titles=args.titles, num_components=args.components))
+    elapsed = time.perf_counter() - began
+    print(f"Wrote {written} alerts to {args.destination} in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} alerts/s).")
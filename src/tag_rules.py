@@ -0,0 +1,264 @@
+"""
+Declarative alert tagging rules.
+
+A rule set is a JSON document (see src/tag_rules.json, or point TAG_RULES_PATH at another file):
+
+    {
+      "default_tag": "general",
+      "rules": [
+        {"type": "keyword", "field": "title", "keywords": ["NETWORK", "LATENCY"], "tag": "type:network"},
+        {"type": "regex", "field": "title", "pattern": "(?i)time(d )?out", "tag": "type:timeout"},
+        {"type": "field", "field": "is_noisy", "equals": true, "tag": "status:noisy"},
+        {"type": "field", "field": "component", "tag": "component:{value}"}
+      ]
+    }
+
+- "keyword" rules match when any keyword occurs in the field, ignoring case.
+- "regex" rules match when `pattern` is found in the field (re.search; use (?i) for case-insensitivity).
+- "field" rules match when the field equals `equals` (a value or a list of values), or, without
+  `equals`, when the field is set at all. "{value}" in the tag is replaced by the field's value.
+An alert gets the tags of every matching rule, or `default_tag` if none match.
+
+TagRuleSet compiles all keyword rules on a field into one trie-shaped regex, so a title is scanned
+once however many keywords there are, and it remembers the matches per distinct field value, so
+regex rules also run once per distinct title rather than once per alert. Field rules are dict lookups.
+"""
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.models import AlertItem, AlertBatch
+
+DEFAULT_TAG_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tag_rules.json")
+
+RULE_TYPES = ("keyword", "regex", "field")
+# Fields rules can test, and how to read them from an AlertItem.
+FIELD_GETTERS: Dict[str, Callable[[AlertItem], Any]] = {
+    "title": lambda alert: alert.title,
+    "status": lambda alert: alert.status,
+    "component": lambda alert: alert.alert_node_analysis.get("component"),
+    "metric": lambda alert: alert.alert_node_analysis.get("metric"),
+    "impact_radius": lambda alert: alert.graph_analysis.get("impact_radius"),
+    "is_noisy": lambda alert: alert.is_noisy,
+    "is_self_resolved": lambda alert: alert.is_self_resolved,
+}
+# Distinct values per field whose text matches are remembered before the memo is reset.
+MAX_MEMOIZED_VALUES = 65536
+
+
+@dataclass(frozen=True)
+class TagRule:
+    type: str
+    field: str
+    tag: str
+    keywords: Tuple[str, ...] = ()
+    pattern: Optional[str] = None
+    equals: Optional[Tuple[Any, ...]] = None  # None: the field only has to be set
+
+    @classmethod
+    def from_dict(cls, rule: Mapping[str, Any]) -> "TagRule":
+        rule_type = rule.get("type")
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Tag rule type must be one of {RULE_TYPES}, got {rule_type!r}.")
+        field_name = rule.get("field", "title")
+        if field_name not in FIELD_GETTERS:
+            raise ValueError(f"Tag rule field must be one of {tuple(FIELD_GETTERS)}, got {field_name!r}.")
+        tag = rule.get("tag")
+        if not isinstance(tag, str) or not tag:
+            raise ValueError(f"Tag rule {dict(rule)!r} needs a non-empty 'tag'.")
+
+        if rule_type == "keyword":
+            keywords = rule.get("keywords", [rule["keyword"]] if "keyword" in rule else [])
+            if isinstance(keywords, str):
+                keywords = [keywords]
+            if not keywords or not all(isinstance(k, str) and k for k in keywords):
+                raise ValueError(f"Keyword rule for {tag!r} needs non-empty 'keywords'.")
+            return cls(rule_type, field_name, tag, keywords=tuple(keywords))
+        if rule_type == "regex":
+            pattern = rule.get("pattern")
+            if not isinstance(pattern, str) or not pattern:
+                raise ValueError(f"Regex rule for {tag!r} needs a 'pattern'.")
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Regex rule for {tag!r} has an invalid pattern: {e}") from e
+            return cls(rule_type, field_name, tag, pattern=pattern)
+        if "equals" not in rule:
+            return cls(rule_type, field_name, tag)
+        equals = rule["equals"]
+        return cls(rule_type, field_name, tag, equals=tuple(equals) if isinstance(equals, list) else (equals,))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """A regex matching the longest of `words` at a position, shaped as a trie so matching never backtracks across words."""
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of a word
+
+    def node_pattern(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + node_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A word ending here may also continue into a longer one; the greedy ? tries the longer first.
+        return f"(?:{body})?" if "" in node else body
+
+    return node_pattern(trie)
+
+
+class _TextMatcher:
+    """The keyword and regex rules on one field."""
+    def __init__(self, rules: Sequence[TagRule]):
+        tags_by_keyword: Dict[str, Set[str]] = {}
+        for rule in rules:
+            if rule.type == "keyword":
+                for keyword in rule.keywords:
+                    tags_by_keyword.setdefault(keyword.lower(), set()).add(rule.tag)
+        # The scan reports only the longest keyword starting at each position; every shorter one
+        # starting there is a prefix of it, so a keyword's tags include those of its prefixes.
+        self.keyword_tags: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset().union(*(tags for other, tags in tags_by_keyword.items() if keyword.startswith(other)))
+            for keyword in tags_by_keyword
+        }
+        self.keyword_scan = (re.compile(f"(?=({_trie_pattern(tags_by_keyword)}))", re.IGNORECASE)
+                             if tags_by_keyword else None)
+        self.regexes = [(re.compile(rule.pattern), rule.tag) for rule in rules if rule.type == "regex"]
+        self.memo: Dict[str, FrozenSet[str]] = {}
+
+    def tags(self, text: str) -> FrozenSet[str]:
+        tags = self.memo.get(text)
+        if tags is not None:
+            return tags
+        found: Set[str] = set()
+        if self.keyword_scan is not None:
+            for match in self.keyword_scan.finditer(text):
+                found.update(self.keyword_tags.get(match.group(1).lower(), ()))
+        for regex, tag in self.regexes:
+            if regex.search(text):
+                found.add(tag)
+        if len(self.memo) >= MAX_MEMOIZED_VALUES:
+            self.memo.clear()
+        tags = self.memo[text] = frozenset(found)
+        return tags
+
+
+class TagRuleSet:
+    """A compiled set of TagRules; see the module docstring."""
+    def __init__(self, rules: Iterable[TagRule], default_tag: Optional[str] = "general"):
+        self.rules = list(rules)
+        self.default_tag = default_tag
+        text_rules: Dict[str, List[TagRule]] = {}
+        self._equals: Dict[str, Dict[Any, Set[str]]] = {}
+        self._present: Dict[str, List[str]] = {}
+        for rule in self.rules:
+            if rule.type != "field":
+                text_rules.setdefault(rule.field, []).append(rule)
+            elif rule.equals is None:
+                self._present.setdefault(rule.field, []).append(rule.tag)
+            else:
+                by_value = self._equals.setdefault(rule.field, {})
+                for value in rule.equals:
+                    by_value.setdefault(value, set()).add(rule.tag)
+        self._text = {name: _TextMatcher(field_rules) for name, field_rules in text_rules.items()}
+        # Fields any rule reads; tags depend on nothing else.
+        self.fields: Tuple[str, ...] = tuple(name for name in FIELD_GETTERS
+                                             if name in self._text or name in self._equals or name in self._present)
+
+    @classmethod
+    def from_dict(cls, config: Mapping[str, Any]) -> "TagRuleSet":
+        rules = config.get("rules")
+        if not isinstance(rules, list):
+            raise ValueError("Tag rule config needs a 'rules' list.")
+        return cls((TagRule.from_dict(rule) for rule in rules), config.get("default_tag", "general"))
+
+    def evaluate(self, values: Mapping[str, Any]) -> FrozenSet[str]:
+        """Tags for an alert whose fields (see FIELD_GETTERS) have `values`."""
+        tags: Set[str] = set()
+        for name, matcher in self._text.items():
+            value = values.get(name)
+            if isinstance(value, str) and value:
+                tags |= matcher.tags(value)
+        for name, by_value in self._equals.items():
+            value = values.get(name)
+            if value is not None:
+                tags.update(by_value.get(value, ()))
+        for name, templates in self._present.items():
+            value = values.get(name)
+            if value is not None and value != "" and value is not False:
+                tags.update(template.replace("{value}", str(value)) for template in templates)
+        if not tags and self.default_tag:
+            tags.add(self.default_tag)
+        return frozenset(tags)
+
+    def tags_for(self, alert: AlertItem) -> FrozenSet[str]:
+        """
+        Tags of `alert`, evaluated on first use and cached on alert.tags. Set alert.tags back to
+        None after changing a field the rules read (see `fields`) to have them re-evaluated.
+        """
+        if alert.tags is None:
+            alert.tags = self.evaluate({name: FIELD_GETTERS[name](alert) for name in self.fields})
+        return alert.tags
+
+    def tag_batch(self, batch: AlertBatch) -> Tuple[np.ndarray, List[FrozenSet[str]]]:
+        """
+        Tags for every alert in an AlertBatch, as (combo_of_alert, tags_of_combo): alerts whose
+        rule fields all agree share a combo, and the rules are evaluated once per combo.
+        """
+        columns = [_batch_column(batch, name) for name in self.fields]
+        keys = np.zeros(len(batch), dtype=np.int64)
+        for codes, categories in columns:
+            radix = len(categories) + 1  # +1 for missing (code -1)
+            if keys.size and int(keys.max()) >= np.iinfo(np.int64).max // radix:
+                keys = np.unique(keys, return_inverse=True)[1].astype(np.int64)  # re-number densely
+            keys = keys * radix + codes + 1
+        _, first_alert, combo_of_alert = np.unique(keys, return_index=True, return_inverse=True)
+        tags_of_combo = []
+        for i in first_alert.tolist():
+            values = {}
+            for name, (codes, categories) in zip(self.fields, columns):
+                code = int(codes[i])
+                values[name] = categories[code] if code >= 0 else None
+            tags_of_combo.append(self.evaluate(values))
+        return combo_of_alert.reshape(-1), tags_of_combo
+
+
+_BOOLEAN_CATEGORIES = [False, True]
+
+
+def _batch_column(batch: AlertBatch, name: str) -> Tuple[np.ndarray, list]:
+    """The codes and categories of field `name` in `batch` (booleans as codes into [False, True])."""
+    if name in ("is_noisy", "is_self_resolved"):
+        return getattr(batch, name).astype(np.int64), _BOOLEAN_CATEGORIES
+    codes, categories = {
+        "title": (batch.title_codes, batch.titles),
+        "status": (batch.status_codes, batch.statuses),
+        "component": (batch.component_codes, batch.components),
+        "metric": (batch.metric_codes, batch.metrics),
+        "impact_radius": (batch.impact_codes, batch.impacts),
+    }[name]
+    return codes.astype(np.int64), categories
+
+
+def load_tag_rules(path: Optional[str] = None) -> TagRuleSet:
+    """Loads and compiles a rule set from `path`, else TAG_RULES_PATH, else src/tag_rules.json."""
+    path = path or os.getenv("TAG_RULES_PATH") or DEFAULT_TAG_RULES_PATH
+    with open(path, encoding="utf-8") as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Tag rule config {path} is not valid JSON: {e}") from e
+    return TagRuleSet.from_dict(config)
+
+
+@lru_cache(maxsize=None)
+def default_tag_rules() -> TagRuleSet:
+    """The rule set used when none is passed in, loaded once per process."""
+    return load_tag_rules()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+# Tests import `backend.*` and `src.*` from the repository root, like the benchmarks do. The
+# backend's modules import each other as top-level modules (app.py is run from backend/).
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, "backend"))
+
+# backend.graph reads its settings on import: no API key is needed to build prompts, and the
+# checkpointer and LLM cache are kept off disk.
+os.environ.setdefault("GEMINI_API_KEY", "test-placeholder-key")
+os.environ.setdefault("CHECKPOINTER", "memory")
+os.environ.setdefault("LLM_CACHE_ENABLED", "0")
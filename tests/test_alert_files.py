@@ -0,0 +1,78 @@
+import dataclasses
+import json
+
+import numpy as np
+import pytest
+
+from src.alert_files import (AlertColumnWriter, alert_to_dict, batch_jsonl_lines, is_alert_column_file, iter_alert_batches,
+                             iter_jsonl_alerts, load_alert_batch, load_alerts, open_alert_columns, write_alert_columns,
+                             write_jsonl_alerts)
+from src.data_generator import enrich_alert_batch
+from src.models import NO_TIMESTAMP
+from src.synthetic_alerts import SyntheticAlertGenerator
+
+
+def expected_lines(batch):
+    return [json.dumps(alert_to_dict(batch.item(i)), default=str) + "\n" for i in range(len(batch))]
+
+
+def test_batch_jsonl_lines_match_alert_to_dict():
+    batch = SyntheticAlertGenerator(2000, seed=3).batch(0)
+    # Whole-second timestamps: isoformat() leaves out the zero fraction.
+    batch.created_us[::3] -= batch.created_us[::3] % 1_000_000
+    closed = batch.resolved_us != NO_TIMESTAMP
+    batch.resolved_us[closed] -= batch.resolved_us[closed] % 1_000_000
+    assert batch_jsonl_lines(batch) == expected_lines(batch)
+
+
+def test_enriched_batch_jsonl_lines_match_alert_to_dict():
+    batch = enrich_alert_batch(SyntheticAlertGenerator(5000, seed=7).batch(0))
+    assert np.any(batch.has_correlated)
+    assert batch_jsonl_lines(batch) == expected_lines(batch)
+
+
+def test_jsonl_and_column_files_load_the_same_alerts(tmp_path):
+    alerts = enrich_alert_batch(SyntheticAlertGenerator(1500, seed=2).batch(0)).to_items()
+    alerts[5].graph_analysis["runbook"] = "https://example.invalid/ünïcode"
+    jsonl, cols = str(tmp_path / "alerts.jsonl.gz"), str(tmp_path / "alerts.cols")
+    assert write_jsonl_alerts(alerts, jsonl) == len(alerts)
+    assert write_alert_columns(load_alerts(jsonl), cols, batch_size=400) == len(alerts)
+    assert is_alert_column_file(cols) and not is_alert_column_file(jsonl)
+
+    assert list(load_alerts(jsonl)) == alerts
+    assert list(load_alerts(cols)) == alerts
+    assert load_alert_batch(cols).to_items() == load_alert_batch(jsonl).to_items() == alerts
+    for path in (jsonl, cols):
+        batches = list(iter_alert_batches(path, batch_size=600))
+        assert [len(batch) for batch in batches] == [600, 600, 300]
+        assert [alert for batch in batches for alert in batch.to_items()] == alerts
+
+
+def test_column_writer_merges_categories_and_non_ascii_ids(tmp_path):
+    first = SyntheticAlertGenerator(300, seed=1).batch(0)
+    second = SyntheticAlertGenerator(200, seed=9, id_prefix="B").batch(0)
+    second.titles = [f"Other {title}" for title in second.titles]
+    second_items = [dataclasses.replace(alert, id=f"Ä{alert.id}") for alert in second.to_items()]
+    path = str(tmp_path / "alerts.cols")
+    with AlertColumnWriter(path) as writer:
+        writer.append(first)
+        writer.append(second_items)
+    batch = open_alert_columns(path)
+    assert batch.to_items() == first.to_items() + second_items
+    assert len(set(batch.titles)) == len(batch.titles)  # One file-wide category list
+
+
+def test_invalid_files_raise_value_error(tmp_path):
+    jsonl = tmp_path / "alerts.jsonl"
+    jsonl.write_text(json.dumps(alert_to_dict(SyntheticAlertGenerator(1).batch(0).item(0))) + "\n\n{\"id\": 1}\n")
+    with pytest.raises(ValueError, match=r"alerts.jsonl:3"):
+        list(iter_jsonl_alerts(str(jsonl)))
+
+    cols = str(tmp_path / "alerts.cols")
+    write_alert_columns(SyntheticAlertGenerator(10).batch(0), cols)
+    with open(cols, "rb") as f:
+        data = f.read()
+    with open(cols, "wb") as f:
+        f.write(data[:-4])
+    with pytest.raises(ValueError):
+        open_alert_columns(cols)
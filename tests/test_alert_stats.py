@@ -0,0 +1,56 @@
+from backend import alert_stats
+from backend.alert_stats import compute_alert_stats
+from backend.graph import _insights_prompt_parts
+from backend.prompt_builder import build_reduced_prompt, estimate_tokens
+
+
+def make_alert(i, component="db-primary", value=50.0, occurrences=None, **fields):
+    alert = {"id": f"a{i}", "title": f"Alert {i % 3}", "status": "open", "created_date": f"2024-01-01T00:{i:02d}:00",
+             "alert_node_analysis": {"component": component, "metric": "Latency", "value": value},
+             "graph_analysis": {"impact_radius": "small"}, **fields}
+    if occurrences:
+        alert["occurrences"] = occurrences
+    return alert
+
+
+def summary(alerts):
+    return {"summary_id": "s1", "tags": ["type:latency"], "alerts": alerts, "item_count": len(alerts)}
+
+
+def test_compute_alert_stats_counts_occurrences():
+    alerts = [make_alert(0, value=10.0, is_noisy=True),
+              make_alert(1, value=20.0, occurrences={"count": 4, "value_min": 5.0, "value_max": 40.0}),
+              make_alert(2, component="api-gateway", value=99.0, is_self_resolved=True)]
+    stats = compute_alert_stats(summary(alerts))
+    assert (stats["total_alerts"], stats["distinct_alerts"]) == (6, 3)
+    assert (stats["noisy_ratio"], stats["self_resolved_ratio"]) == (1 / 6, 1 / 6)
+    assert (stats["first_seen"], stats["last_seen"]) == ("2024-01-01T00:00:00", "2024-01-01T00:02:00")
+    db, api = stats["groups"]
+    assert (db["component"], db["count"], db["value_min"], db["value_max"]) == ("db-primary", 5, 5.0, 40.0)
+    # Repeats count at their extremes once each and at the first value otherwise: 5, 10, 20, 20, 40.
+    assert (db["p50"], db["p90"], db["p99"]) == (20.0, 40.0, 40.0)
+    assert (api["component"], api["count"], api["self_resolved_ratio"]) == ("api-gateway", 1, 1.0)
+    assert stats["top_titles"][0] == ("Alert 1", 4)
+    assert [sample["id"] for sample in stats["samples"]] == ["a0", "a2"]
+
+
+def test_stats_prompt_map_instruction_carries_the_chunk_position(monkeypatch):
+    monkeypatch.setattr(alert_stats, "STATS_SAMPLE_COUNT", 20)
+    alerts = [make_alert(i, component=f"component-{i}", value=float(i)) for i in range(20)]
+    instruction, map_instruction, texts = _insights_prompt_parts(summary(alerts))
+    assert "Alert Statistics:" in instruction
+    assert "{index}" in map_instruction and "{total}" in map_instruction
+    assert "Alert Statistics:" not in map_instruction
+
+    map_prompts = []
+
+    def invoke(prompt):
+        map_prompts.append(prompt)
+        return "findings"
+
+    budget = estimate_tokens(instruction) + 10  # too small for the samples: they are map-reduced
+    build_reduced_prompt(instruction, texts, invoke, budget_tokens=budget, map_instruction=map_instruction, separator="")
+    total = int(map_prompts[0].split(" of ", 2)[1])
+    assert total > 1
+    for i, prompt in enumerate(map_prompts[:total]):
+        assert prompt.startswith(f"The following is part {i + 1} of {total} of the representative alerts")
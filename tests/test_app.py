@@ -0,0 +1,276 @@
+import json
+import sys
+from datetime import date
+
+import pytest
+
+import backend.app as app_module
+from backend.summary_stats import SummaryStatsRegistry
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def get_page(client, path, **args):
+    response = client.get(path, query_string=args)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json(), response.headers.get("X-Next-Cursor")
+
+
+@pytest.mark.parametrize("path", ["/api/mock/daily_summaries", "/api/mock/retrospective_summaries"])
+def test_pages_follow_the_next_cursor_through_all_items(client, path):
+    everything, cursor = get_page(client, path)
+    assert len(everything) >= 2 and cursor is None
+
+    collected, cursor = get_page(client, path, limit=1)
+    while cursor is not None:
+        page, cursor = get_page(client, path, limit=1, after=cursor)
+        assert len(page) == 1
+        collected += page
+    assert collected == everything
+
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_empty_pages_have_no_next_cursor(client, count):
+    page, cursor = get_page(client, "/api/mock/daily_summaries", count=count)
+    assert page == [] and cursor is None
+
+
+def test_limits_are_clamped(client, monkeypatch):
+    everything, _ = get_page(client, "/api/mock/daily_summaries")
+    page, cursor = get_page(client, "/api/mock/daily_summaries", limit=0)
+    assert page == everything[:1] and cursor == everything[0]["date"]
+    page, cursor = get_page(client, "/api/mock/daily_summaries", count=len(everything) + 5)
+    assert page == everything and cursor is None
+
+    monkeypatch.setattr(app_module, "MAX_PAGE_LIMIT", 2)
+    page, cursor = get_page(client, "/api/mock/daily_summaries", limit=100)
+    assert page == everything[:2] and cursor == everything[1]["date"]
+
+
+def test_last_page_has_no_next_cursor(client):
+    everything, _ = get_page(client, "/api/mock/daily_summaries")
+    page, cursor = get_page(client, "/api/mock/daily_summaries", limit=2, after=everything[-3]["date"])
+    assert page == everything[-2:] and cursor is None
+    page, cursor = get_page(client, "/api/mock/daily_summaries", limit=2, after=everything[-1]["date"])
+    assert page == [] and cursor is None
+
+
+def test_unknown_retrospective_cursor_is_rejected(client):
+    assert client.get("/api/mock/retrospective_summaries?after=no-such-id").status_code == 400
+
+
+def submit_batch(client, tenant, **kwargs):
+    response = client.post("/api/submit_daily/batch", headers={"X-Tenant-ID": tenant}, **kwargs)
+    return response.status_code, response.get_json()
+
+
+def test_batch_submit_reports_a_result_and_position_per_item(client):
+    entries = [{"text": "Handled a paging storm", "tags": ["db"]}, {"tags": ["no text"]},
+               {"text": "Rotated certificates", "type": "nope"}, {"text": "Quiet day", "date": "2024-01-02"}]
+    status, body = submit_batch(client, "batch-json", json=entries)
+    assert status == 200
+    assert (body["accepted_count"], body["rejected_count"], body["current_summary_count"]) == (2, 2, 2)
+    assert [(r["index"], r["status"], r.get("position")) for r in body["results"]] == [
+        (0, "accepted", 0), (1, "rejected", None), (2, "rejected", None), (3, "accepted", 1)]
+
+    # Positions continue after the entries already in the thread, including single submissions.
+    assert client.post("/api/submit_daily", json={"text": "One more"},
+                       headers={"X-Tenant-ID": "batch-json"}).get_json()["current_summary_count"] == 3
+    status, body = submit_batch(client, "batch-json", json={"entries": [{"text": "Last one"}]})
+    assert [r["position"] for r in body["results"]] == [3]
+    state = app_module.app_graph.get_state({"configurable": {"thread_id": "tenant:batch-json"}}).values
+    assert [entry["text"] for entry in state["daily_summaries"]] == [
+        "Handled a paging storm", "Quiet day", "One more", "Last one"]
+
+
+def test_batch_submit_reads_ndjson(client):
+    body = '{"text": "First"}\n\nnot json\n{"text": "Second"}\n'
+    status, result = submit_batch(client, "batch-ndjson", data=body, content_type="application/x-ndjson")
+    assert status == 200
+    assert [(r["index"], r["status"], r.get("position")) for r in result["results"]] == [
+        (0, "accepted", 0), (1, "rejected", None), (2, "accepted", 1)]
+    assert result["results"][1]["error"].startswith("Invalid JSON line")
+
+
+def test_batch_submit_rejects_bad_bodies_and_oversized_batches(client, monkeypatch):
+    assert submit_batch(client, "batch-bad", json={"text": "not a list"})[0] == 400
+    status, body = submit_batch(client, "batch-bad", json=[])
+    assert status == 200 and body["current_summary_count"] == 0
+
+    monkeypatch.setattr(app_module, "MAX_BATCH_ENTRIES", 2)
+    assert submit_batch(client, "batch-bad", json=[{"text": str(i)} for i in range(3)])[0] == 413
+    assert app_module.app_graph.get_state({"configurable": {"thread_id": "tenant:batch-bad"}}).values.get(
+        "daily_summaries", []) == []
+
+
+def test_save_retrospective_skips_outdated_versions(client):
+    headers = {"X-Tenant-ID": "retro-save"}
+    config = {"configurable": {"thread_id": "tenant:retro-save"}}
+    submit_batch(client, "retro-save", json=[{"text": "First"}, {"text": "Second"}])
+    version = app_module.app_graph.get_state(config).values["summaries_version"]
+
+    assert app_module.save_retrospective(config, version, {"retrospective_summary": "Current",
+                                                           "retrospective_version": version})
+    # A job for the previous version finishing late must not overwrite it.
+    assert not app_module.save_retrospective(config, version - 1, {"retrospective_summary": "Outdated",
+                                                                   "retrospective_version": version - 1})
+    assert app_module.app_graph.get_state(config).values["retrospective_summary"] == "Current"
+
+    # The stored retrospective is served without generating, and revalidates with its ETag.
+    response = client.get("/api/retrospective", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json() == {"summary": "Current", "source_summary_count": 2, "version": version}
+    assert client.get("/api/retrospective", headers={**headers, "If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    # Once a new summary arrives, a retrospective of the old version is no longer saved.
+    client.post("/api/submit_daily", json={"text": "Third"}, headers=headers)
+    assert not app_module.save_retrospective(config, version, {"retrospective_summary": "Late",
+                                                               "retrospective_version": version})
+    assert app_module.app_graph.get_state(config).values["retrospective_summary"] == "Current"
+
+
+def test_tenants_get_separate_threads(client):
+    client.post("/api/submit_daily", json={"text": "Team A"}, headers={"X-Tenant-ID": "tenancy-a"})
+    client.post("/api/submit_daily?team=tenancy-b", json={"text": "Team B"})
+    for tenant, text in (("tenancy-a", "Team A"), ("tenancy-b", "Team B")):
+        state = app_module.app_graph.get_state({"configurable": {"thread_id": f"tenant:{tenant}"}}).values
+        assert [entry["text"] for entry in state["daily_summaries"]] == [text]
+    assert client.post("/api/submit_daily", json={"text": "x"}, headers={"X-Tenant-ID": "bad key"}).status_code == 400
+
+
+def test_stats_count_single_and_batch_submissions(client, monkeypatch):
+    headers = {"X-Tenant-ID": "stats"}
+    today = date.today().isoformat()
+    client.post("/api/submit_daily", json={"text": "Paged", "type": "incident", "tags": ["db"], "duration_minutes": 60},
+                headers=headers)
+    submit_batch(client, "stats", json=[{"text": "Alert", "type": "alert", "tags": ["db", "api"]},
+                                        {"text": "Bad", "duration_minutes": -5}])
+    stats = client.get("/api/stats?days=1", headers=headers).get_json()
+    assert stats["entryCount"] == 2
+    assert stats["topTagsByCount"] == [{"tag": "db", "count": 2}, {"tag": "api", "count": 1}]
+    assert stats["weeklyTrend"] == [{"day": date.today().strftime("%a"), "date": today,
+                                     "incidents": 1, "alerts": 1, "tasks": 0, "notes": 0}]
+    assert stats["totalOncallTime"] == 1.0
+
+    # Counters missing (e.g. after a restart) are rebuilt from the stored entries.
+    monkeypatch.setattr(app_module, "summary_stats", SummaryStatsRegistry())
+    assert client.get("/api/stats?days=1", headers=headers).get_json() == stats
+
+
+def test_scoped_retrospective_summarizes_only_matching_entries(client, monkeypatch):
+    headers = {"X-Tenant-ID": "scoped"}
+    submit_batch(client, "scoped", json=[{"text": "DB failover", "date": "2024-01-02", "tags": ["db"]},
+                                         {"text": "API deploy", "date": "2024-01-03", "tags": ["api"]},
+                                         {"text": "DB vacuum", "date": "2024-01-05", "tags": ["db"]}])
+    summarized = []
+
+    def summarize(state):
+        summarized.append([entry["text"] for entry in state["daily_summaries"]])
+        return {"retrospective_summary": f"{len(state['daily_summaries'])} entries", "error": None}
+
+    monkeypatch.setattr(sys.modules["graph"], "summarize_daily_entries_node", summarize)
+    response = client.get("/api/retrospective?tags=db&end=2024-01-04", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["summary"] == "1 entries" and summarized == [["DB failover"]]
+    assert response.get_json()["scope"] == {"start": None, "end": "2024-01-04", "tags": ["db"], "match": "any"}
+
+    response = client.get("/api/retrospective?start=2024-01-03", headers=headers)
+    assert summarized[-1] == ["API deploy", "DB vacuum"]
+    assert response.headers["ETag"] != client.get("/api/retrospective?start=2024-01-02", headers=headers).headers["ETag"]
+
+    response = client.get("/api/retrospective?tags=security", headers=headers)
+    assert response.get_json()["details"] == [] and len(summarized) == 3
+    assert client.get("/api/retrospective?start=tomorrow", headers=headers).status_code == 400
+    # The thread's own retrospective is left alone.
+    state = app_module.app_graph.get_state({"configurable": {"thread_id": "tenant:scoped"}}).values
+    assert state.get("retrospective_summary") is None
+
+
+def test_mock_daily_summaries_filter_by_dates_and_tags(client):
+    everything, _ = get_page(client, "/api/mock/daily_summaries")
+    dates = [summary["date"] for summary in everything]
+    page, _ = get_page(client, "/api/mock/daily_summaries", start=dates[1], end=dates[3])
+    assert page == everything[1:4]
+
+    tag = everything[0]["items"][0]["tags"][0]
+    page, _ = get_page(client, "/api/mock/daily_summaries", tags=tag)
+    assert page == [{"date": summary["date"], "items": [item for item in summary["items"] if tag in item["tags"]]}
+                    for summary in everything if any(tag in item["tags"] for item in summary["items"])]
+    assert client.get("/api/mock/daily_summaries?tags=x&match=some").status_code == 400
+
+
+def sse_events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_retrospective_stream_sends_tokens_then_saves(client, monkeypatch):
+    headers = {"X-Tenant-ID": "stream"}
+    streamed = []
+
+    def stream_llm(prompt):
+        streamed.append(prompt)
+        yield from ("Busy ", "week.")
+
+    monkeypatch.setattr(app_module, "build_retrospective_prompt", lambda summaries, partials: ("prompt", None, []))
+    monkeypatch.setattr(app_module, "stream_llm", stream_llm)
+    assert sse_events(client.get("/api/retrospective/stream", headers=headers)) == [
+        ("start", {}), ("done", {"summary": "No daily summaries available to generate a retrospective.", "source_summary_count": 0})]
+
+    submit_batch(client, "stream", json=[{"text": "First"}, {"text": "Second"}])
+    response = client.get("/api/retrospective/stream", headers=headers)
+    assert response.mimetype == "text/event-stream" and response.headers["Cache-Control"] == "no-cache"
+    done = {"summary": "Busy week.", "source_summary_count": 2, "version": 2}
+    assert sse_events(response) == [("start", {}), ("token", {"text": "Busy "}), ("token", {"text": "week."}), ("done", done)]
+
+    # Saved to the thread: the next stream (and GET /api/retrospective) serve it without the LLM.
+    assert sse_events(client.get("/api/retrospective/stream", headers=headers)) == [
+        ("start", {}), ("token", {"text": "Busy week."}), ("done", done)]
+    assert client.get("/api/retrospective", headers=headers).get_json() == done
+    assert len(streamed) == 1
+
+
+def test_retrospective_stream_reports_errors_as_events(client, monkeypatch):
+    def stream_llm(prompt):
+        raise RuntimeError("quota exceeded")
+        yield
+
+    monkeypatch.setattr(app_module, "build_retrospective_prompt", lambda summaries, partials: ("prompt", None, []))
+    monkeypatch.setattr(app_module, "stream_llm", stream_llm)
+    submit_batch(client, "stream-error", json=[{"text": "First"}])
+    events = sse_events(client.get("/api/retrospective/stream", headers={"X-Tenant-ID": "stream-error"}))
+    assert events[0] == ("start", {}) and events[-1][0] == "error" and "quota exceeded" in events[-1][1]["error"]
+
+
+def test_retrospective_etags_follow_the_thread_and_version(client, monkeypatch):
+    generated = []
+
+    def summarize(state):
+        generated.append(len(state["daily_summaries"]))
+        return {"retrospective_summary": "Same text", "retrospective_version": state["summaries_version"], "error": None}
+
+    monkeypatch.setattr(sys.modules["graph"], "summarize_daily_entries_node", summarize)
+    etags = {}
+    for tenant in ("etag-a", "etag-b"):
+        submit_batch(client, tenant, json=[{"text": "First"}])
+        response = client.get("/api/retrospective", headers={"X-Tenant-ID": tenant})
+        assert response.headers["Cache-Control"] == "no-cache" and "X-Tenant-ID" in response.headers["Vary"]
+        etags[tenant] = response.headers["ETag"]
+    assert etags["etag-a"] != etags["etag-b"] and generated == [1, 1]
+
+    # Memoized per version: revalidation and repeated reads don't generate again...
+    headers = {"X-Tenant-ID": "etag-a"}
+    assert client.get("/api/retrospective", headers={**headers, "If-None-Match": etags["etag-a"]}).status_code == 304
+    assert client.get("/api/retrospective", headers=headers).headers["ETag"] == etags["etag-a"]
+    assert generated == [1, 1]
+    # ...until a new entry makes the stored retrospective stale.
+    client.post("/api/submit_daily", json={"text": "Second"}, headers=headers)
+    response = client.get("/api/retrospective", headers={**headers, "If-None-Match": etags["etag-a"]})
+    assert response.status_code == 200 and response.headers["ETag"] != etags["etag-a"]
+    assert response.get_json()["version"] == 2 and generated == [1, 1, 2]
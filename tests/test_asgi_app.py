@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+import backend.asgi_app as asgi_module
+
+
+@pytest.fixture
+def summarized(monkeypatch):
+    """Replaces the LLM-bound summarization; records the entry counts it was called with."""
+    calls = []
+
+    async def asummarize(state):
+        calls.append(len(state["daily_summaries"]))
+        await asyncio.sleep(0.05)  # Long enough for concurrent requests to overlap
+        return {"retrospective_summary": f"{len(state['daily_summaries'])} entries",
+                "retrospective_version": state.get("summaries_version", 0), "error": None}
+
+    monkeypatch.setattr(asgi_module, "asummarize_daily_entries_node", asummarize)
+    return calls
+
+
+def run(scenario):
+    return asyncio.run(scenario(asgi_module.app.test_client()))
+
+
+async def submit(client, tenant, text, **fields):
+    response = await client.post("/api/submit_daily", json={"text": text, **fields}, headers={"X-Tenant-ID": tenant})
+    return response.status_code, await response.get_json()
+
+
+def test_submit_and_stats():
+    async def scenario(client):
+        assert await submit(client, "asgi-stats", "Paged", type="incident", tags=["db"]) == (
+            200, {"message": "Daily summary submitted successfully.", "current_summary_count": 1})
+        assert (await submit(client, "asgi-stats", "Bad", duration_minutes=-1))[0] == 400
+        stats = await (await client.get("/api/stats", headers={"X-Tenant-ID": "asgi-stats"})).get_json()
+        assert stats["entryCount"] == 1 and stats["topTagsByCount"] == [{"tag": "db", "count": 1}]
+        assert (await client.get("/api/stats", headers={"X-Tenant-ID": "bad key"})).status_code == 400
+        assert await (await client.get("/api/llm_cache/stats")).get_json() == {"enabled": False}
+
+    run(scenario)
+
+
+def test_concurrent_retrospective_requests_share_one_generation(summarized):
+    async def scenario(client):
+        headers = {"X-Tenant-ID": "asgi-retro"}
+        await submit(client, "asgi-retro", "First")
+        await submit(client, "asgi-retro", "Second")
+        responses = await asyncio.gather(*(client.get("/api/retrospective", headers=headers) for _ in range(5)))
+        bodies = [await response.get_json() for response in responses]
+        assert bodies == [{"summary": "2 entries", "source_summary_count": 2, "version": 2}] * 5
+        assert summarized == [2]
+
+        etag = responses[0].headers["ETag"]
+        response = await client.get("/api/retrospective", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304 and summarized == [2]  # Saved to the thread and revalidated
+
+        scoped = await (await client.get("/api/retrospective?start=2000-01-01", headers=headers)).get_json()
+        assert scoped["summary"] == "2 entries" and scoped["scope"]["start"] == "2000-01-01"
+
+    run(scenario)
+
+
+def test_retrospective_jobs_and_stream(summarized, monkeypatch):
+    async def astream_llm(prompt):
+        for text in ("Quiet ", "week."):
+            yield text
+
+    async def abuild_retrospective_prompt(summaries, partials):
+        return "prompt", None, []
+
+    monkeypatch.setattr(asgi_module, "astream_llm", astream_llm)
+    monkeypatch.setattr(asgi_module, "abuild_retrospective_prompt", abuild_retrospective_prompt)
+
+    async def scenario(client):
+        headers = {"X-Tenant-ID": "asgi-jobs"}
+        await submit(client, "asgi-jobs", "First")
+        first = await (await client.post("/api/retrospective/jobs", headers=headers)).get_json()
+        second = await (await client.post("/api/retrospective/jobs", headers=headers)).get_json()
+        assert second["job_id"] == first["job_id"] and second["coalesced"] and not first["coalesced"]
+        job = await (await client.get(f"/api/retrospective/jobs/{first['job_id']}?wait=5", headers=headers)).get_json()
+        assert job["status"] == "succeeded" and job["result"]["summary"] == "1 entries"
+        assert (await client.get(f"/api/retrospective/jobs/{first['job_id']}",
+                                 headers={"X-Tenant-ID": "other"})).status_code == 404
+
+        await submit(client, "asgi-jobs", "Second")
+        response = await client.get("/api/retrospective/stream", headers=headers)
+        events = [block.split("\n") for block in (await response.get_data(as_text=True)).strip().split("\n\n")]
+        assert [(event, json.loads(data.removeprefix("data: "))) for event, data in events] == [
+            ("event: start", {}), ("event: token", {"text": "Quiet "}), ("event: token", {"text": "week."}),
+            ("event: done", {"summary": "Quiet week.", "source_summary_count": 2, "version": 2})]
+        assert await (await client.get("/api/retrospective", headers=headers)).get_json() == {
+            "summary": "Quiet week.", "source_summary_count": 2, "version": 2}
+
+    run(scenario)
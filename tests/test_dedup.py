@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from src.dedup import alert_fingerprint, deduplicate_alerts, normalize_title
+from src.models import AlertBatch, AlertItem
+from src.synthetic_alerts import SyntheticAlertGenerator
+
+START = datetime(2024, 1, 1, 9)
+
+
+def make_alert(alert_id, title, minutes, value, component="db-1", metric="CPUUtilization", **fields):
+    return AlertItem(id=alert_id, title=title, status="open", created_date=START + timedelta(minutes=minutes),
+                     alert_node_analysis={"component": component, "metric": metric, "value": value},
+                     graph_analysis={}, **fields)
+
+
+def test_normalize_title_replaces_variable_parts():
+    assert normalize_title("Host 10.0.0.12:8080  DOWN after 3.5s") == "host <ip> down after <n>s"
+    assert normalize_title("Job 1b4e28ba-2fa1-11d2-883f-0016d3cca427 failed") == "job <id> failed"
+    assert normalize_title("Commit deadbeef12 broke build 42") == "commit <hex> broke build <n>"
+    assert alert_fingerprint("CPU at 91%", "db-1", "cpu") == alert_fingerprint("cpu at 97%", "db-1", "cpu")
+    assert alert_fingerprint("CPU at 91%", "db-1", "cpu") != alert_fingerprint("CPU at 91%", "db-2", "cpu")
+
+
+def alerts_with_duplicates():
+    return [
+        make_alert("a", "CPU at 91% on db-1", 30, 91.0, is_noisy=True),
+        make_alert("b", "Disk full", 5, 99.0, component="db-2", metric="DiskUsage"),
+        make_alert("c", "CPU at 97% on db-1", 10, 97.0, is_self_resolved=True),
+        make_alert("d", "CPU at 88% on db-1", 50, "n/a", is_noisy=True),
+        make_alert("e", "CPU at 80% on db-1", 20, 80.0, component="db-3"),
+    ]
+
+
+def test_deduplicate_alerts_aggregates_each_fingerprint():
+    alerts = alerts_with_duplicates()
+    deduped = deduplicate_alerts(alerts)
+    assert [d.representative.id for d in deduped] == ["a", "b", "e"]
+    cpu = deduped[0]
+    assert cpu.count == 3
+    assert (cpu.first_seen, cpu.last_seen) == (alerts[2].created_date, alerts[3].created_date)
+    assert (cpu.value_min, cpu.value_max) == (91.0, 97.0)
+    assert (cpu.noisy_count, cpu.self_resolved_count) == (2, 1)
+    assert [d.count for d in deduped[1:]] == [1, 1]
+    assert cpu.occurrences()["first_seen"] == alerts[2].created_date.isoformat()
+
+
+def test_value_range_is_none_without_numeric_values():
+    deduped = deduplicate_alerts([make_alert("a", "Disk full", 0, "n/a"), make_alert("b", "Disk full", 1, None)])
+    assert len(deduped) == 1
+    assert (deduped[0].value_min, deduped[0].value_max) == (None, None)
+
+
+def test_batch_and_list_deduplication_agree():
+    alerts = alerts_with_duplicates()
+    assert [d.occurrences() for d in deduplicate_alerts(AlertBatch.from_items(alerts))] == \
+        [d.occurrences() for d in deduplicate_alerts(alerts)]
+
+    batch = SyntheticAlertGenerator(2000, seed=5).batch(0)
+    from_batch = deduplicate_alerts(batch)
+    from_list = deduplicate_alerts(batch.to_items())
+    assert [d.occurrences() for d in from_batch] == [d.occurrences() for d in from_list]
+    assert [d.representative for d in from_batch] == [d.representative for d in from_list]
+    assert sum(d.count for d in from_batch) == len(batch)
+    assert deduplicate_alerts(batch.slice(0, 0)) == []
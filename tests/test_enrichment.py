@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from src.data_generator import enrich_alert_batch, enrich_alert_items
+from src.enrichment import occurrence_ranks, overlapping_intervals, windowed_occurrence_counts
+from src.models import AlertBatch, AlertItem
+from src.streaming import stream_enrich
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_alert(alert_id, minute, title="CPU Usage High", component="db-primary", open_minutes=None, value=90):
+    created = START + timedelta(minutes=minute)
+    return AlertItem(
+        id=alert_id,
+        title=title,
+        status="closed" if open_minutes is not None else "open",
+        created_date=created,
+        resolved_date=created + timedelta(minutes=open_minutes) if open_minutes is not None else None,
+        alert_node_analysis={"component": component, "metric": "CPUUtilization", "value": value},
+        graph_analysis={"impact_radius": "small", "runbook": f"runbook-{alert_id}"},
+    )
+
+
+def test_windowed_occurrence_counts():
+    keys = np.array([1, 1, 2, 1, 1])
+    times = np.array([0, 5, 5, 10, 10])
+    assert windowed_occurrence_counts(keys, times, 6).tolist() == [1, 2, 1, 2, 3]
+    assert windowed_occurrence_counts(keys, times, 1).tolist() == [1, 1, 1, 1, 2]
+    assert windowed_occurrence_counts(keys[:0], times[:0], 1).tolist() == []
+
+
+@pytest.mark.parametrize("window", [0, -1])
+def test_windowed_occurrence_counts_rejects_non_positive_windows(window):
+    with pytest.raises(ValueError):
+        windowed_occurrence_counts(np.array([1, 1]), np.array([0, 0]), window)
+
+
+def test_occurrence_ranks():
+    assert occurrence_ranks(np.array([3, 1, 3, 3, 1])).tolist() == [0, 0, 1, 2, 1]
+
+
+def test_overlapping_intervals():
+    counts, offsets, partners = overlapping_intervals(
+        np.array([0, 0, 0, 1]), np.array([0, 5, 20, 6]), np.array([10, 8, 30, 7]), max_partners=5)
+    assert counts.tolist() == [1, 1, 0, 0]
+    assert [partners[offsets[i]:offsets[i + 1]].tolist() for i in range(4)] == [[1], [], [], []]
+
+
+@pytest.mark.parametrize("window", [0, -5])
+def test_enrichment_rejects_non_positive_windows(window):
+    alerts = [make_alert("a", 0), make_alert("b", 0)]
+    with pytest.raises(ValueError):
+        enrich_alert_items(alerts, noisy_window_minutes=window)
+    with pytest.raises(ValueError):
+        enrich_alert_items(AlertBatch.from_items(alerts), noisy_window_minutes=window)
+    with pytest.raises(ValueError):
+        list(stream_enrich(alerts, noisy_window_minutes=window))
+
+
+def test_enrich_alert_items_flags():
+    alerts = [make_alert("a", 0, open_minutes=5), make_alert("b", 10), make_alert("c", 20, open_minutes=60),
+              make_alert("d", 100), make_alert("e", 30, component="api-gateway")]
+    enriched = {alert.id: alert for alert in enrich_alert_items(alerts, noisy_threshold_count=3,
+                                                                self_resolved_minutes=10, noisy_window_minutes=60)}
+    assert [enriched[i].is_noisy for i in "abcde"] == [False, False, True, False, False]
+    assert [enriched[i].is_self_resolved for i in "abcde"] == [True, False, False, False, False]
+    # a is open 0-5; b and c never resolve, so they stay open until the newest timestamp (minute 100).
+    assert enriched["a"].graph_analysis["correlated_alerts"] == []
+    assert enriched["b"].graph_analysis["correlated_alerts"] == ["c", "d"]
+    assert enriched["e"].graph_analysis["correlated_alerts"] == []
+
+
+def test_enrich_alert_items_keeps_the_other_fields_of_list_items():
+    alerts = [make_alert("b", 10, value=95), make_alert("a", 0, open_minutes=5, value=80.5)]
+    alerts[0].tags = frozenset({"type:cpu"})
+    alerts[0].alert_node_analysis["threshold"] = 90
+    enriched = enrich_alert_items(alerts)
+    assert [alert.id for alert in enriched] == ["a", "b"]  # sorted by creation date
+    for before, after in zip([alerts[1], alerts[0]], enriched):
+        assert after.alert_node_analysis == before.alert_node_analysis
+        assert type(after.alert_node_analysis["value"]) is type(before.alert_node_analysis["value"])
+        assert after.created_date == before.created_date and after.created_date.tzinfo is timezone.utc
+        assert after.resolved_date == before.resolved_date
+        assert {k: v for k, v in after.graph_analysis.items() if k != "correlated_alerts"} == before.graph_analysis
+        assert after.tags is None
+    assert alerts[0].tags == frozenset({"type:cpu"}) and "correlated_alerts" not in alerts[0].graph_analysis
+
+
+def test_list_and_batch_enrichment_agree():
+    alerts = [make_alert(str(i), (i * 7) % 50, component=f"c{i % 3}", open_minutes=i % 20 or None) for i in range(40)]
+    from_list = enrich_alert_items(alerts)
+    from_batch = enrich_alert_batch(AlertBatch.from_items(alerts)).to_items()
+    assert from_list == from_batch
+
+
+def test_overlapping_intervals_match_pairwise_comparison():
+    rng = np.random.default_rng(8)
+    n = 300
+    keys, starts = rng.integers(0, 4, n), rng.integers(0, 1000, n)
+    ends = starts + rng.integers(-5, 60, n)  # Some end before they start: taken as instantaneous
+    counts, offsets, partners = overlapping_intervals(keys, starts, ends, max_partners=3)
+    closed_ends = np.maximum(ends, starts)
+    for i in range(n):
+        same_key = [j for j in range(n) if j != i and keys[j] == keys[i]]
+        assert counts[i] == sum(starts[j] <= closed_ends[i] and starts[i] <= closed_ends[j] for j in same_key)
+        started_while_open = sorted((starts[j], j) for j in same_key
+                                    if starts[i] <= starts[j] <= closed_ends[i] and (starts[j] > starts[i] or j > i))
+        assert partners[offsets[i]:offsets[i + 1]].tolist() == [j for _, j in started_while_open[:3]]
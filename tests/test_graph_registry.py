@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend import graph
+from backend.graph import get_checkpointer, get_compiled_graph, warm_up
+
+
+def test_graphs_are_compiled_once_and_shared():
+    warm_up()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        compiled = list(executor.map(get_compiled_graph, ["workflow", "insights"] * 8))
+    assert all(c is get_compiled_graph("workflow") for c in compiled[::2])
+    assert all(c is get_compiled_graph("insights") for c in compiled[1::2])
+    assert get_compiled_graph("workflow").checkpointer is get_checkpointer()
+    assert get_compiled_graph("insights").checkpointer is None  # One-off invocations keep no thread
+
+
+def test_unknown_graphs_raise_key_error():
+    with pytest.raises(KeyError):
+        get_compiled_graph("no-such-graph")
+
+
+def test_insights_graph_runs_without_a_thread(monkeypatch):
+    monkeypatch.setattr(graph, "generate_actionable_insights_node",
+                        lambda state, summary: {"actionable_insights": f"insights for {summary['summary_id']}"})
+    result = get_compiled_graph("insights").invoke({"retrospective_summary_input": {"summary_id": "s1"}})
+    assert result["actionable_insights"] == "insights for s1"
@@ -0,0 +1,67 @@
+import sqlite3
+
+import pytest
+
+from backend import llm_cache as llm_cache_module
+from backend.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=1000, ttl_seconds=None)
+
+
+def test_get_and_set(cache):
+    assert cache.get("model", "prompt") is None
+    cache.set("model", "prompt", "response")
+    assert cache.get("model", "prompt") == "response"
+    assert cache.get("other-model", "prompt") is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["hits"], stats["misses"]) == (1, 8, 1, 2)
+
+
+def test_lookups_do_not_write_until_flushed(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "STATS_FLUSH_EVERY", 1000)
+    monkeypatch.setattr(llm_cache_module, "STATS_FLUSH_SECONDS", 1000.0)
+    cache.set("model", "prompt", "response")
+    conn = sqlite3.connect(cache.path)
+    cache.get("model", "prompt")
+    cache.get("model", "missing")
+    assert conn.execute("SELECT value FROM llm_cache_stats WHERE name = 'hits'").fetchone()[0] == 0
+    cache.flush()
+    assert dict(conn.execute("SELECT name, value FROM llm_cache_stats WHERE name IN ('hits', 'misses')")) == {
+        "hits": 1, "misses": 1}
+    conn.close()
+
+
+def test_evicts_least_recently_used_entries_when_full(cache):
+    for i in range(4):
+        cache.set("model", f"prompt-{i}", "x" * 300)
+        cache.get("model", "prompt-0")  # keep the first one in use
+        cache.flush()
+    # 1200 bytes > 1000: evicted down to 900 bytes, oldest access first.
+    assert cache.get("model", "prompt-0") is not None
+    assert cache.get("model", "prompt-1") is None
+    assert cache.stats()["bytes"] == 900
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=-1)
+    cache.set("model", "prompt", "response")
+    assert cache.get("model", "prompt") is None
+
+
+def test_clear_rolls_back_on_failure(cache):
+    cache.set("model", "prompt", "response")
+    cache.clear()
+    assert cache.get("model", "prompt") is None and cache.stats()["bytes"] == 0
+
+    cache.set("model", "prompt", "response")
+    conn = sqlite3.connect(cache.path, isolation_level=None)
+    conn.execute("CREATE TRIGGER fail_clear BEFORE UPDATE ON llm_cache_stats BEGIN SELECT RAISE(ABORT, 'boom'); END")
+    with pytest.raises(sqlite3.Error):
+        cache.clear()
+    assert not cache._connection().in_transaction
+    conn.execute("DROP TRIGGER fail_clear")
+    conn.close()
+    assert cache.get("model", "prompt") == "response"
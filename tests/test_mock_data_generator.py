@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from backend.mock_data_generator import MOCK_NODES_AFFECTED, MOCK_TAGS, MOCK_TITLES, iter_mock_daily_summaries
+
+
+def test_iter_mock_daily_summaries_is_reproducible():
+    first = list(iter_mock_daily_summaries("2024-01-30", 3, items_per_day=20, seed=4))
+    assert first == list(iter_mock_daily_summaries("2024-01-30", 3, items_per_day=20, seed=4))
+    assert first != list(iter_mock_daily_summaries("2024-01-30", 3, items_per_day=20, seed=5))
+
+
+def test_iter_mock_daily_summaries_items():
+    summaries = list(iter_mock_daily_summaries("2024-01-30", 3, items_per_day=30, seed=1, id_prefix="x-"))
+    assert [summary["date"] for summary in summaries] == ["2024-01-30", "2024-01-31", "2024-02-01"]
+    items = [item for summary in summaries for item in summary["items"]]
+    assert [item["id"] for item in items] == [f"x-{i:012d}" for i in range(len(items))]
+    for summary in summaries:
+        timestamps = [item["timestamp"] for item in summary["items"]]
+        assert timestamps == sorted(timestamps)
+        assert all(datetime.fromisoformat(t).strftime("%Y-%m-%d") == summary["date"] for t in timestamps)
+    for item in items:
+        nodes = MOCK_NODES_AFFECTED[MOCK_TITLES.index(item["title"])]
+        assert 1 <= len(item["nodes_affected"]) == len(set(item["nodes_affected"])) <= len(nodes)
+        assert set(item["nodes_affected"]) <= set(nodes)
+        assert 2 <= len(item["tags"]) == len(set(item["tags"])) <= 5
+        assert set(item["tags"]) <= set(MOCK_TAGS)
+
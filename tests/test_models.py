@@ -0,0 +1,78 @@
+import json
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from src.alert_files import alert_to_dict, batch_jsonl_lines, open_alert_columns, write_alert_columns
+from src.models import AlertBatch, AlertItem
+
+
+def make_alert(alert_id, created_date, value=71.5, resolved_after=None, **fields):
+    return AlertItem(
+        id=alert_id,
+        title="CPU Usage High",
+        status="closed" if resolved_after else "open",
+        created_date=created_date,
+        resolved_date=created_date + resolved_after if resolved_after else None,
+        alert_node_analysis={"component": "db-primary", "metric": "CPUUtilization", "value": value},
+        graph_analysis={"impact_radius": "small"},
+        **fields,
+    )
+
+
+def assert_same_items(actual, expected):
+    assert actual == expected
+    for a, e in zip(actual, expected):
+        assert type(a.alert_node_analysis["value"]) is type(e.alert_node_analysis["value"])
+        assert a.created_date.tzinfo == e.created_date.tzinfo
+        assert a.created_date.isoformat() == e.created_date.isoformat()
+        assert a.tags == e.tags
+
+
+def test_round_trip_keeps_value_types_tags_and_extra_fields():
+    created = datetime(2024, 1, 1, 12, 0, 0, 250)
+    alerts = [
+        make_alert("a", created, value=5, tags=frozenset({"type:cpu"})),
+        make_alert("b", created, value=5.0, resolved_after=timedelta(minutes=3)),
+        make_alert("c", created, value=2 ** 60),
+        make_alert("d", created, value="n/a"),
+    ]
+    alerts[3].graph_analysis["runbook"] = "https://example.invalid/runbook"
+    batch = AlertBatch.from_items(alerts)
+    assert_same_items(batch.to_items(), alerts)
+    assert_same_items(batch.take([3, 0]).to_items(), [alerts[3], alerts[0]])
+    assert_same_items(batch.slice(1, 3).to_items(), alerts[1:3])
+
+
+def test_round_trip_keeps_time_zone():
+    paris = ZoneInfo("Europe/Paris")
+    alerts = [make_alert("a", datetime(2024, 1, 1, tzinfo=timezone.utc)),
+              make_alert("b", datetime(2024, 1, 1, 0, 0, 1, tzinfo=timezone.utc), resolved_after=timedelta(hours=1))]
+    assert_same_items(AlertBatch.from_items(alerts).to_items(), alerts)
+
+    in_paris = [make_alert("c", datetime(2024, 7, 1, 9, 30, tzinfo=paris), resolved_after=timedelta(minutes=5))]
+    assert_same_items(AlertBatch.from_items(in_paris).to_items(), in_paris)
+
+
+def test_mixed_time_zones_come_back_as_the_same_instants_in_utc():
+    alerts = [make_alert("a", datetime(2024, 1, 1, 12, tzinfo=timezone(timedelta(hours=1)))),
+              make_alert("b", datetime(2024, 1, 1, 12)),
+              make_alert("c", datetime(2024, 1, 1, 12, tzinfo=timezone.utc))]
+    items = AlertBatch.from_items(alerts).to_items()
+    assert [item.created_date.tzinfo for item in items] == [timezone.utc] * 3
+    assert items[0].created_date == alerts[0].created_date
+    assert items[1].created_date == alerts[1].created_date.replace(tzinfo=timezone.utc)
+
+
+def test_column_file_round_trip_keeps_time_zone_and_int_values(tmp_path):
+    alerts = [make_alert("a", datetime(2024, 3, 1, 8, tzinfo=ZoneInfo("America/New_York")), value=7),
+              make_alert("b", datetime(2024, 3, 1, 9, tzinfo=ZoneInfo("America/New_York")), value=7.25)]
+    path = str(tmp_path / "alerts.cols")
+    write_alert_columns(alerts, path)
+    batch = open_alert_columns(path)
+    assert_same_items(batch.to_items(), alerts)
+    assert batch_jsonl_lines(batch) == [json.dumps(alert_to_dict(alert)) + "\n" for alert in alerts]
+
+
+def test_batch_jsonl_lines_write_int_values_as_ints():
+    alerts = [make_alert("a", datetime(2024, 1, 1), value=95), make_alert("b", datetime(2024, 1, 1), value=95.5)]
+    assert batch_jsonl_lines(AlertBatch.from_items(alerts)) == [json.dumps(alert_to_dict(a)) + "\n" for a in alerts]
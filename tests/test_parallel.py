@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from src.parallel import imap_bounded, map_bounded
+
+
+class Tracker:
+    """A slow function that records how many calls run at once."""
+    def __init__(self, delay=0.02, slow=()):
+        self.delay, self.slow = delay, set(slow)
+        self.lock = threading.Lock()
+        self.running = self.peak = 0
+
+    def __call__(self, item):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(1.0 if item in self.slow else self.delay)
+            return item * 10
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.mark.parametrize("mapper", [map_bounded, lambda *args, **kwargs: list(imap_bounded(*args, **kwargs))])
+def test_results_keep_input_order_and_concurrency_is_bounded(mapper):
+    tracker = Tracker()
+    assert mapper(tracker, range(20), max_in_flight=3) == [i * 10 for i in range(20)]
+    assert 1 < tracker.peak <= 3
+    assert mapper(tracker, [], max_in_flight=3) == []
+    with pytest.raises(ValueError):
+        mapper(tracker, range(3), max_in_flight=0)
+
+
+@pytest.mark.parametrize("mapper", [map_bounded, lambda *args, **kwargs: list(imap_bounded(*args, **kwargs))])
+def test_timed_out_calls_use_on_timeout(mapper):
+    tracker = Tracker(slow={2})
+    start = time.monotonic()
+    results = mapper(tracker, range(5), max_in_flight=2, timeout_seconds=0.3, on_timeout=lambda item: f"timeout {item}")
+    assert results == [0, 10, "timeout 2", 30, 40]
+    assert time.monotonic() - start < 1.0
+    with pytest.raises(TimeoutError):
+        mapper(Tracker(slow={0}), range(2), max_in_flight=2, timeout_seconds=0.1)
+
+
+@pytest.mark.parametrize("mapper", [map_bounded, lambda *args, **kwargs: list(imap_bounded(*args, **kwargs))])
+def test_rate_limit_spaces_call_starts(mapper):
+    start = time.monotonic()
+    mapper(lambda item: item, range(5), max_in_flight=5, requests_per_second=20)
+    assert time.monotonic() - start >= 0.19  # Four intervals of 50 ms between the five starts
+
+
+def test_imap_bounded_pulls_items_only_as_slots_free_up():
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    results = imap_bounded(lambda item: item, items(), max_in_flight=4)
+    assert next(results) == 0
+    assert len(pulled) <= 5
+    assert list(results) == list(range(1, 100))
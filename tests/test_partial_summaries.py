@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from backend import graph
+from backend.graph import _retrospective_prompt_parts, aupdate_partial_summaries, update_partial_summaries
+
+
+@pytest.fixture
+def prompts(monkeypatch):
+    """Records the LLM prompts; the n-th answer is "summary n"."""
+    sent = []
+
+    def invoke(prompt):
+        sent.append(prompt)
+        return f"summary {len(sent)}"
+
+    async def ainvoke(prompt):
+        return invoke(prompt)
+
+    monkeypatch.setattr(graph, "invoke_llm", invoke)
+    monkeypatch.setattr(graph, "ainvoke_llm", ainvoke)
+    return sent
+
+
+def entries(count):
+    return [{"text": f"entry {i}"} for i in range(count)]
+
+
+def spans(partials):
+    return [(p["level"], p["start"], p["end"]) for p in partials]
+
+
+def test_blocks_are_summarized_once_and_merged_by_level(prompts):
+    partials = update_partial_summaries(entries(25), [], block_size=10, fan_in=2)
+    assert spans(partials) == [(1, 0, 20)]
+    assert len(prompts) == 3  # Two blocks and one merge
+
+    partials = update_partial_summaries(entries(45), partials, block_size=10, fan_in=2)
+    assert spans(partials) == [(2, 0, 40)]
+    assert len(prompts) == 7  # Two new blocks, their merge, and the merge of both level-1 partials
+    assert not any("entry 0" in prompt or "entry 19" in prompt for prompt in prompts[3:])  # Old blocks are reused
+
+    assert update_partial_summaries(entries(49), partials, block_size=10, fan_in=2) == partials
+    assert len(prompts) == 7
+
+
+def test_retrospective_prompt_covers_partials_and_the_uncovered_tail(prompts):
+    summaries = entries(23)
+    partials = update_partial_summaries(summaries, [], block_size=10, fan_in=4)
+    assert spans(partials) == [(0, 0, 10), (0, 10, 20)]
+    instruction, texts = _retrospective_prompt_parts(summaries, partials)
+    assert "summaries of earlier periods" in instruction
+    assert texts == ["Summary of entries 1-10:\nsummary 1", "Summary of entries 11-20:\nsummary 2",
+                     "entry 20", "entry 21", "entry 22"]
+    assert _retrospective_prompt_parts([{"text": ""}], []) is None
+
+
+def test_blocks_without_text_are_not_sent(prompts):
+    partials = update_partial_summaries([{"text": ""}] * 10 + entries(10), [], block_size=10, fan_in=2)
+    assert spans(partials) == [(1, 0, 20)]
+    assert len(prompts) == 2  # The empty block costs nothing; the merge only sees the other one
+
+
+def test_async_version_builds_the_same_partials(prompts):
+    expected = update_partial_summaries(entries(45), [], block_size=10, fan_in=2)
+    prompts.clear()
+    assert asyncio.run(aupdate_partial_summaries(entries(45), [], block_size=10, fan_in=2)) == expected
+
+
+def test_block_size_must_be_positive(prompts):
+    with pytest.raises(ValueError):
+        update_partial_summaries(entries(5), [], block_size=0)
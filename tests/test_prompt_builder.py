@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from backend.prompt_builder import (SEPARATOR, abuild_reduced_prompt, build_reduced_prompt, chunk_texts,
+                                    estimate_tokens, fits_budget)
+
+INSTRUCTION = "Summarize these alerts:\n\n"
+TEXTS = [f"Alert {i}: CPU usage high on db-{i % 4} at {50 + i}%" for i in range(40)]
+
+
+class Recorder:
+    """An `invoke` that records its prompts and answers with a short summary of each."""
+    def __init__(self, answer=lambda prompt: f"summary of {len(prompt)} chars"):
+        self.prompts = []
+        self.answer = answer
+
+    def __call__(self, prompt):
+        self.prompts.append(prompt)
+        return self.answer(prompt)
+
+
+def test_chunk_texts_fit_the_budget_and_keep_order():
+    texts = TEXTS + ["x" * 1000]
+    chunks = chunk_texts(texts, 60)
+    assert len(chunks) > 1
+    assert all(fits_budget(SEPARATOR.join(chunk), 60) for chunk in chunks)
+    assert "".join(piece for chunk in chunks for piece in chunk) == "".join(texts)
+
+
+@pytest.mark.parametrize("budget", [0, -5])
+def test_chunk_texts_reject_non_positive_budgets(budget):
+    with pytest.raises(ValueError):
+        chunk_texts(TEXTS, budget)
+
+
+def test_prompt_that_fits_is_returned_as_is():
+    invoke = Recorder()
+    assert build_reduced_prompt(INSTRUCTION, TEXTS, invoke, budget_tokens=10_000) == INSTRUCTION + SEPARATOR.join(TEXTS)
+    assert invoke.prompts == []
+
+
+def test_prompt_that_does_not_fit_is_map_reduced():
+    invoke = Recorder()
+    budget = estimate_tokens(INSTRUCTION + SEPARATOR.join(TEXTS)) // 3
+    prompt = build_reduced_prompt(INSTRUCTION, TEXTS, invoke, budget_tokens=budget, max_workers=2)
+    assert len(invoke.prompts) > 1
+    assert all(fits_budget(p, budget) for p in invoke.prompts)
+    assert invoke.prompts[0].startswith(f"The following is part 1 of {len(invoke.prompts)}")
+    # Every text went to exactly one map call, in order.
+    assert "".join(p.split("\n\n", 1)[1] for p in invoke.prompts).replace(SEPARATOR, "") == "".join(TEXTS)
+    assert prompt == INSTRUCTION + SEPARATOR.join(invoke.answer(p) for p in invoke.prompts)
+    assert fits_budget(prompt, budget)
+
+
+def test_async_version_builds_the_same_prompt():
+    budget = estimate_tokens(INSTRUCTION + SEPARATOR.join(TEXTS)) // 3
+    invoke = Recorder()
+
+    async def ainvoke(prompt):
+        return invoke(prompt)
+
+    expected = build_reduced_prompt(INSTRUCTION, TEXTS, Recorder(), budget_tokens=budget)
+    assert asyncio.run(abuild_reduced_prompt(INSTRUCTION, TEXTS, ainvoke, budget_tokens=budget)) == expected
+
+
+def test_non_shrinking_map_outputs_are_truncated_after_max_reduce_depth():
+    invoke = Recorder(answer=lambda prompt: prompt)  # Map calls never shrink their input
+    budget = 80
+    prompt = build_reduced_prompt(INSTRUCTION, TEXTS, invoke, budget_tokens=budget)
+    assert prompt.startswith(INSTRUCTION)
+    assert fits_budget(prompt, budget)
+    assert invoke.prompts  # Reduced (and gave up) rather than overflowing or looping forever
+
+
+def test_instructions_larger_than_the_budget_truncate_without_map_calls():
+    invoke = Recorder()
+    long_map_instruction = "Summarize part {index} of {total}, keeping every detail. " * 20
+    prompt = build_reduced_prompt(INSTRUCTION, TEXTS, invoke, budget_tokens=50, map_instruction=long_map_instruction)
+    assert invoke.prompts == []
+    assert prompt.startswith(INSTRUCTION)
+    assert fits_budget(prompt, 50)
+    assert prompt == INSTRUCTION + SEPARATOR.join(TEXTS)[:len(prompt) - len(INSTRUCTION)]
@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from backend.retrospective_jobs import RetrospectiveJobQueue, retrospective_etag
+
+
+def test_jobs_for_the_same_version_are_coalesced():
+    queue = RetrospectiveJobQueue(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def generate(version):
+        calls.append(version)
+        release.wait(5)
+        return {"summary": f"v{version}"}
+
+    first, created = queue.submit("thread", 1, lambda: generate(1))
+    joined, joined_created = queue.submit("thread", 1, lambda: generate(1))
+    other, other_created = queue.submit("thread", 2, lambda: generate(2))
+    assert (created, joined_created, other_created) == (True, False, True)
+    assert joined is first and other is not first
+    with pytest.raises(TimeoutError):
+        first.result(timeout=0.01)
+
+    release.set()
+    assert first.result(timeout=5) == {"summary": "v1"}
+    assert other.result(timeout=5) == {"summary": "v2"}
+    assert sorted(calls) == [1, 2]
+    assert first.to_dict()["status"] == "succeeded" and first.to_dict()["result"] == {"summary": "v1"}
+    assert queue.get(first.job_id) is first
+
+    # A finished job is not joined: the next submission for the key runs again.
+    again, again_created = queue.submit("thread", 1, lambda: generate(1))
+    assert again_created and again is not first
+    assert again.result(timeout=5) == {"summary": "v1"}
+
+
+def test_failed_jobs_report_their_error():
+    queue = RetrospectiveJobQueue(max_workers=1)
+
+    def fail():
+        raise RuntimeError("LLM unavailable")
+
+    job, _ = queue.submit("thread", 1, fail)
+    with pytest.raises(RuntimeError):
+        job.result(timeout=5)
+    assert job.to_dict()["status"] == "failed" and job.to_dict()["error"] == "LLM unavailable"
+
+
+def test_etag_depends_on_thread_version_and_summary():
+    etag = retrospective_etag("tenant:a", 3, "summary")
+    assert etag.startswith("3-") and etag == retrospective_etag("tenant:a", 3, "summary")
+    assert len({etag, retrospective_etag("tenant:b", 3, "summary"), retrospective_etag("tenant:a", 4, "summary"),
+                retrospective_etag("tenant:a", 3, "other")}) == 4
@@ -0,0 +1,115 @@
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from backend.sqlite_checkpointer import AppendOnlySqliteSaver
+
+
+class State(TypedDict):
+    items: Annotated[list, operator.add]
+
+
+def build_graph(saver):
+    workflow = StateGraph(State)
+    workflow.add_node("add", lambda state: {})
+    workflow.set_entry_point("add")
+    workflow.add_edge("add", END)
+    return workflow.compile(checkpointer=saver)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite3")
+
+
+def make_saver(db_path):
+    return AppendOnlySqliteSaver(db_path, append_only_channels=("items",))
+
+
+def append_all(graph, config, values):
+    for value in values:
+        graph.invoke({"items": [value]}, config)
+
+
+def checkpoint_with_items(graph, config, items):
+    return next(s.config for s in graph.get_state_history(config) if s.values.get("items") == items)
+
+
+def test_appends_round_trip(db_path):
+    config = {"configurable": {"thread_id": "t"}}
+    append_all(build_graph(make_saver(db_path)), config, "abcde")
+    assert build_graph(make_saver(db_path)).get_state(config).values["items"] == list("abcde")
+
+
+def test_fork_from_earlier_checkpoint(db_path):
+    config = {"configurable": {"thread_id": "t"}}
+    graph = build_graph(make_saver(db_path))
+    append_all(graph, config, "abcde")
+    fork = graph.update_state(checkpoint_with_items(graph, config, list("abc")), {"items": ["x"]})
+    graph.update_state(fork, {"items": ["y", "z"]})
+    assert graph.get_state(config).values["items"] == list("abcxyz")
+
+    reloaded = build_graph(make_saver(db_path))
+    assert reloaded.get_state(config).values["items"] == list("abcxyz")
+    # The original branch is untouched.
+    history = [s.values.get("items") for s in reloaded.get_state_history(config)]
+    assert list("abcde") in history
+    # Appending on the fork keeps building on it.
+    reloaded.invoke({"items": ["w"]}, config)
+    assert build_graph(make_saver(db_path)).get_state(config).values["items"] == list("abcxyzw")
+
+
+def test_value_that_does_not_extend_its_parent(db_path):
+    """A value that shrank, or whose prefix changed, is stored as a new base rather than appended."""
+    saver = make_saver(db_path)
+    config = {"configurable": {"thread_id": "t"}}
+    graph = build_graph(saver)
+    append_all(graph, config, "abc")
+    checkpoint = saver.get_tuple(config)
+    for items in (["a"], ["q", "r", "s", "t"]):
+        new = checkpoint.checkpoint.copy()
+        new["id"] = f"{checkpoint.checkpoint['id'][:-4]}{len(items):04d}"
+        new["channel_values"] = {"items": items}
+        new["channel_versions"] = {**new["channel_versions"], "items": saver.get_next_version(new["channel_versions"]["items"], None)}
+        put_config = saver.put(checkpoint.config, new, {}, {"items": new["channel_versions"]["items"]})
+        assert make_saver(db_path).get_tuple(put_config).checkpoint["channel_values"]["items"] == items
+    # The checkpoint they were derived from still reads back unchanged.
+    assert make_saver(db_path).get_tuple(checkpoint.config).checkpoint["channel_values"]["items"] == list("abc")
+
+
+def test_delete_thread(db_path):
+    saver = make_saver(db_path)
+    config = {"configurable": {"thread_id": "t"}}
+    append_all(build_graph(saver), config, "ab")
+    saver.delete_thread("t")
+    assert make_saver(db_path).get_tuple(config) is None
+    append_all(build_graph(saver), config, "c")
+    assert build_graph(make_saver(db_path)).get_state(config).values["items"] == ["c"]
+
+
+def test_get_channel_values_reads_only_the_requested_channels(db_path):
+    saver = make_saver(db_path)
+    config = {"configurable": {"thread_id": "t"}}
+    append_all(build_graph(saver), config, "ab")
+    assert saver.get_channel_values(config, ["items"]) == {"items": ["a", "b"]}
+    assert saver.get_channel_values(config, ["other"]) == {}
+    assert saver.get_channel_values({"configurable": {"thread_id": "missing"}}, ["items"]) is None
+
+
+def test_thread_cache_is_bounded_and_reloads_evicted_threads(db_path):
+    saver = AppendOnlySqliteSaver(db_path, append_only_channels=("items",), max_cached_threads=2)
+    graph = build_graph(saver)
+    configs = [{"configurable": {"thread_id": f"t{i}"}} for i in range(5)]
+    for i, config in enumerate(configs):
+        append_all(graph, config, [f"{i}a", f"{i}b"])
+    assert saver.cached_thread_count() == 2
+    for i, config in enumerate(configs):
+        assert graph.get_state(config).values["items"] == [f"{i}a", f"{i}b"]
+    assert saver.cached_thread_count() == 2
+
+    saver.cache_idle_seconds = -1  # everything counts as idle
+    saver.evict_idle_threads()
+    assert saver.cached_thread_count() == 0
+    assert graph.get_state(configs[0]).values["items"] == ["0a", "0b"]
@@ -0,0 +1,74 @@
+import json
+from datetime import datetime, timedelta
+
+from src.data_generator import enrich_alert_items, group_alerts_into_summaries
+from src.models import AlertItem
+from src.streaming import JsonlSink, stream_enrich, stream_group
+from src.synthetic_alerts import SyntheticAlertGenerator
+
+START = datetime(2024, 1, 1)
+
+
+def make_alert(alert_id, minute, component):
+    return AlertItem(id=alert_id, title="Disk usage high", status="open", created_date=START + timedelta(minutes=minute),
+                     alert_node_analysis={"component": component, "metric": "DiskUsage", "value": 91.0},
+                     graph_analysis={})
+
+
+def synthetic_alerts(count=3000, seed=4):
+    alerts = SyntheticAlertGenerator(count, seed=seed).batch(0).to_items()
+    return sorted(alerts, key=lambda alert: alert.created_date)
+
+
+def test_stream_enrich_flags_match_enrich_alert_items():
+    alerts = synthetic_alerts()
+    streamed = list(stream_enrich(iter(alerts), noisy_threshold_count=2, noisy_window_minutes=30))
+    enriched = enrich_alert_items(alerts, noisy_threshold_count=2, noisy_window_minutes=30)
+    assert [(a.id, a.is_noisy, a.is_self_resolved) for a in streamed] == \
+        [(a.id, a.is_noisy, a.is_self_resolved) for a in enriched]
+    assert any(a.is_noisy for a in streamed) and not all(a.is_noisy for a in streamed)
+
+
+def test_stream_group_matches_group_alerts_into_summaries_at_the_end_of_input():
+    alerts = list(stream_enrich(synthetic_alerts()))
+    streamed = list(stream_group(iter(alerts), max_alerts_per_summary=25, flush_after_minutes=None))
+    grouped = group_alerts_into_summaries(alerts, max_alerts_per_summary=25)
+
+    def key(summary):
+        return tuple(alert.id for alert in summary.items), frozenset(summary.tags)
+    assert sorted(map(key, streamed)) == sorted(map(key, grouped))
+
+
+def test_stream_group_flushes_by_event_time_and_buffer_size():
+    alerts = [make_alert(str(i), i * 10, component=f"c{i % 2}") for i in range(12)]
+
+    def emitted_before_input_ends(**kwargs):
+        consumed = []
+
+        def feed():
+            for alert in alerts:
+                consumed.append(alert.id)
+                yield alert
+        return [(len(consumed), [a.id for a in summary.items]) for summary in stream_group(feed(), **kwargs)]
+
+    # Groups open at minutes 0 and 10 are flushed once an alert 60 minutes younger arrives.
+    flushed = emitted_before_input_ends(max_alerts_per_summary=100, flush_after_minutes=60)
+    assert flushed[:2] == [(7, ["0", "2", "4", "6"]), (8, ["1", "3", "5", "7"])]
+    assert sorted(alert_id for _, ids in flushed for alert_id in ids) == sorted(a.id for a in alerts)
+
+    # Over the buffer limit, the oldest group goes first; full groups go right away.
+    limited = emitted_before_input_ends(max_alerts_per_summary=100, flush_after_minutes=None, max_buffered_alerts=3)
+    assert limited[0] == (4, ["0", "2"])
+    assert emitted_before_input_ends(max_alerts_per_summary=2, flush_after_minutes=None)[0] == (3, ["0", "2"])
+
+
+def test_jsonl_sink_appends_one_line_per_record(tmp_path):
+    path = str(tmp_path / "insights.jsonl")
+    with JsonlSink(path) as sink:
+        sink.write({"summary_id": "a", "created": START})
+        sink.write({"summary_id": "b"})
+    with JsonlSink(path) as sink:
+        sink.write({"summary_id": "c"})
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["summary_id"] for r in records] == ["a", "b", "c"] and records[0]["created"] == str(START)
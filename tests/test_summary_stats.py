@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+
+from backend.summary_stats import (SummaryStats, SummaryStatsRegistry, entry_fields, entry_scope, scope_filters,
+                                   scope_key)
+
+TODAY = date(2024, 1, 7)
+ENTRIES = [
+    {"text": "Paged for db", "date": "2024-01-07", "type": "Incidents", "tags": ["db", "oncall"], "duration_minutes": 90},
+    {"text": "Disk alert", "date": "2024-01-06", "type": "Alerts", "tags": ["db"], "duration_minutes": 30},
+    {"text": "Notes", "date": "2023-12-01"},
+    {"text": "Old entry without a date", "type": "Tasks", "tags": ["infra"]},
+]
+
+
+def test_entry_fields_validate_and_normalize():
+    assert entry_fields({"type": "incident", "tags": ["db", "db", "api"], "duration_minutes": 15}, today=TODAY) == {
+        "date": "2024-01-07", "type": "Incidents", "tags": ["db", "api"], "duration_minutes": 15}
+    assert entry_fields({"date": "2024-01-02T10:00:00"}) == {"date": "2024-01-02"}
+    for bad in ({"date": "yesterday"}, {"type": "chore"}, {"tags": "db"}, {"tags": [""]},
+                {"duration_minutes": -1}, {"duration_minutes": True}, {"duration_minutes": float("inf")}):
+        with pytest.raises(ValueError):
+            entry_fields(bad)
+
+
+def test_counters_in_statistical_insights_shape():
+    stats = SummaryStats.from_entries(ENTRIES).to_dict(today=TODAY, trend_days=2)
+    assert stats["topTagsByCount"] == [{"tag": "db", "count": 2}, {"tag": "oncall", "count": 1},
+                                       {"tag": "Uncategorized", "count": 1}, {"tag": "infra", "count": 1}]
+    assert stats["itemCountsByType"] == [{"type": "Incidents", "count": 1}, {"type": "Alerts", "count": 1},
+                                         {"type": "Tasks", "count": 1}, {"type": "Notes", "count": 1}]
+    assert [(day["date"], day["incidents"], day["alerts"]) for day in stats["weeklyTrend"]] == [
+        ("2024-01-06", 0, 1), ("2024-01-07", 1, 0)]
+    assert stats["oncallLoadDistribution"] == [{"name": "db", "value": 2.0, "color": "#8b5cf6"}]
+    assert (stats["totalOncallTime"], stats["entryCount"]) == (2.0, 4)
+
+
+def test_registry_records_appends_and_catches_up_from_stored_entries():
+    registry = SummaryStatsRegistry()
+    loads = []
+
+    def load(entries):
+        def load_entries():
+            loads.append(len(entries))
+            return entries
+        return load_entries
+
+    stats = registry.get("t", 2, load(ENTRIES[:2]))
+    assert (stats.entry_count, loads) == (2, [2])
+    registry.record("t", ENTRIES[2:3], 2)
+    assert registry.get("t", 3, load(ENTRIES[:3])) is stats and loads == [2]  # In line: nothing loaded
+    registry.record("t", ENTRIES[3:], 2)  # Stale position: ignored
+    assert stats.entry_count == 3
+
+    # Entries written elsewhere are caught up from the stored tail.
+    assert registry.get("t", 4, load(ENTRIES)).entry_count == 4 and loads == [2, 4]
+    # Fewer stored entries than counted (e.g. the thread was replaced): rebuilt.
+    rebuilt = registry.get("t", 1, load(ENTRIES[:1]))
+    assert rebuilt is not stats and rebuilt.entry_count == 1
+    # Threads without counters are not recorded into; they are built on first read.
+    registry.record("other", ENTRIES, 0)
+    assert registry.get("other", 0, load([])).entry_count == 0
+
+
+def test_index_selects_entries_by_window_and_tags():
+    index = SummaryStats.from_entries(ENTRIES).index
+    assert [e["text"] for e in index.items(any_tags=["db"], start="2024-01-07")] == ["Paged for db"]
+    assert [e["text"] for e in index.items(start="2023-12-01", end="2024-01-06")] == ["Disk alert", "Notes"]
+    assert len(index.items()) == 4  # Undated entries only match unbounded queries
+
+
+def test_entry_scope_parses_and_validates():
+    assert entry_scope({}) is None
+    assert entry_scope({"start": "2024-01-01", "tags": "db,,api,db"}) == {
+        "start": "2024-01-01", "end": None, "tags": ["db", "api"], "match": "any"}
+    scope = entry_scope({"end": "2024-01-31", "tags": "db", "match": "all"})
+    assert scope_filters(scope) == {"start": None, "end": "2024-01-31", "any_tags": None, "all_tags": ["db"]}
+    assert scope_key(scope) == scope_key(dict(reversed(scope.items()))) != scope_key({**scope, "match": "any"})
+    for bad in ({"start": "01/02/2024"}, {"start": "2024-02-01", "end": "2024-01-01"}, {"tags": "db", "match": "some"}):
+        with pytest.raises(ValueError):
+            entry_scope(bad)
@@ -0,0 +1,56 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.alert_files import load_alert_batch
+from src.models import NO_TIMESTAMP
+from src.synthetic_alerts import SyntheticAlertGenerator, counter_ids, write_synthetic_alerts
+
+
+def columns(batch):
+    return (batch.ids.tolist(), batch.created_us.tolist(), batch.title_codes.tolist(),
+            batch.component_codes.tolist(), batch.values.tolist())
+
+
+def test_same_seed_gives_the_same_alerts():
+    a, b = SyntheticAlertGenerator(5000, seed=3), SyntheticAlertGenerator(5000, seed=3)
+    assert [columns(x) for x in a.batches(1500)] == [columns(y) for y in b.batches(1500)]
+    assert columns(a.batch(2, 1500)) == columns(b.batch(2, 1500))
+    assert columns(SyntheticAlertGenerator(5000, seed=4).batch(0)) != columns(a.batch(0))
+
+
+def test_batches_cover_every_alert_in_creation_order():
+    generator = SyntheticAlertGenerator(5000, seed=1, start=datetime(2024, 3, 1), span=timedelta(days=2))
+    batches = list(generator.batches(1500))
+    assert [len(batch) for batch in batches] == [1500, 1500, 1500, 500]
+    created = np.concatenate([batch.created_us for batch in batches])
+    assert np.all(np.diff(created) >= 0)
+    first, last = batches[0].item(0).created_date, batches[-1].item(len(batches[-1]) - 1).created_date
+    assert datetime(2024, 3, 1) <= first and last < datetime(2024, 3, 3)
+    ids = np.concatenate([batch.ids for batch in batches])
+    assert len(set(ids.tolist())) == 5000 and ids[0] == b"A000000000000"
+    closed = np.concatenate([batch.resolved_us != NO_TIMESTAMP for batch in batches])
+    assert 0 < closed.mean() < 1
+
+
+def test_volume_is_skewed_by_hour_title_and_component():
+    batch = SyntheticAlertGenerator(50_000, seed=2).batch(0, 50_000)
+    hours = Counter(item.hour for item in (datetime(1970, 1, 1) + timedelta(microseconds=int(us))
+                                          for us in batch.created_us[::10]))
+    assert sum(hours[h] for h in range(13, 17)) > 3 * sum(hours[h] for h in range(1, 5))  # Busy afternoons, quiet nights
+    title_counts = np.bincount(batch.title_codes)
+    assert np.sort(title_counts)[-10:].sum() > 0.3 * len(batch)  # A few titles make up much of the volume
+
+
+def test_counter_ids():
+    assert counter_ids(998, 3, "X").tolist() == [b"X000000000998", b"X000000000999", b"X000000001000"]
+
+
+def test_write_synthetic_alerts_in_either_format(tmp_path):
+    generator = SyntheticAlertGenerator(1200, seed=5)
+    expected = [alert for batch in generator.batches(500) for alert in batch.to_items()]
+    for name in ("alerts.cols", "alerts.jsonl.gz"):
+        path = str(tmp_path / name)
+        assert write_synthetic_alerts(path, 1200, seed=5, batch_size=500) == 1200
+        assert load_alert_batch(path).to_items() == expected
@@ -0,0 +1,70 @@
+import random
+from datetime import date, datetime
+
+from backend.tag_index import TagIndex, day_key, iter_positions
+
+TAGS = ["db", "network", "cpu", "security", "oncall"]
+DAYS = [f"2024-01-{d:02d}" for d in range(1, 11)]
+
+
+def build_index(count=600, seed=1):
+    rng = random.Random(seed)
+    index, items = TagIndex(), {}
+    for i in range(count):
+        item = {"id": f"item-{i}", "tags": rng.sample(TAGS, rng.randint(0, 3)), "day": rng.choice(DAYS)}
+        index.add(item["id"], item["tags"], item["day"], item)
+        items[item["id"]] = item
+    return index, items
+
+
+def expected(items, any_tags=None, all_tags=None, start=None, end=None):
+    return [item for item in items.values()
+            if (any_tags is None or set(any_tags) & set(item["tags"]))
+            and set(all_tags or ()) <= set(item["tags"])
+            and (start is None or item["day"] >= start) and (end is None or item["day"] <= end)]
+
+
+def test_day_key_and_iter_positions():
+    assert day_key("2024-01-05T10:30:00") == day_key(date(2024, 1, 5)) == day_key(datetime(2024, 1, 5, 23)) == "2024-01-05"
+    assert list(iter_positions(0)) == []
+    assert list(iter_positions(1 << 3 | 1 << 70 | 1 << 71)) == [3, 70, 71]
+
+
+def test_queries_match_a_scan():
+    index, items = build_index()
+    queries = [{}, {"any_tags": ["db", "cpu"]}, {"all_tags": ["db", "network"]}, {"any_tags": []},
+               {"start": "2024-01-03", "end": "2024-01-05"}, {"end": "2024-01-02"},
+               {"any_tags": ["security"], "all_tags": ["oncall"], "start": "2024-01-08"},
+               {"all_tags": ["unknown"]}]
+    for query in queries:
+        assert index.items(**query) == expected(items, **query), query
+        assert index.count(**query) == len(expected(items, **query))
+        assert index.item_ids(**query) == [item["id"] for item in expected(items, **query)]
+
+
+def test_items_by_day_groups_in_day_order():
+    index, items = build_index()
+    by_day = index.items_by_day(any_tags=["db"], start="2024-01-04")
+    assert list(by_day) == sorted(by_day)
+    assert [item for day_items in by_day.values() for item in day_items] == \
+        sorted(expected(items, any_tags=["db"], start="2024-01-04"), key=lambda item: item["day"])
+    assert all(item["day"] == day for day, day_items in by_day.items() for item in day_items)
+
+
+def test_add_replaces_and_discard_removes():
+    index, items = build_index(count=50)
+    index.add("item-3", ["security"], "2024-02-01", {"id": "item-3", "tags": ["security"], "day": "2024-02-01"})
+    index.discard("item-7")
+    index.discard("never-added")
+    assert len(index) == 49
+    assert "item-7" not in index.item_ids()
+    assert index.item_ids(start="2024-02-01") == ["item-3"]
+    assert "item-3" not in index.item_ids(end="2024-01-31")
+    assert index.days(start="2024-01-10") == ["2024-01-10", "2024-02-01"]
+
+
+def test_add_daily_summary_indexes_items_under_its_date():
+    index = TagIndex()
+    index.add_daily_summary({"date": "2024-03-01", "items": [{"id": "a", "tags": ["db"]}, {"id": "b"}]})
+    assert index.items_by_day() == {"2024-03-01": [{"id": "a", "tags": ["db"]}, {"id": "b"}]}
+    assert index.item_ids(any_tags=["db"]) == ["a"]
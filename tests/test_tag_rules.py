@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+
+from src.models import AlertBatch, AlertItem
+from src.synthetic_alerts import SyntheticAlertGenerator
+from src.tag_rules import FIELD_GETTERS, TagRuleSet, default_tag_rules
+
+RULES = {
+    "default_tag": "general",
+    "rules": [
+        {"type": "keyword", "field": "title", "keywords": ["NET"], "tag": "type:net"},
+        {"type": "keyword", "field": "title", "keywords": ["NETWORK", "LATENCY"], "tag": "type:network"},
+        {"type": "regex", "field": "title", "pattern": "(?i)time(d )?out", "tag": "type:timeout"},
+        {"type": "field", "field": "is_noisy", "equals": True, "tag": "status:noisy"},
+        {"type": "field", "field": "status", "equals": ["open", "acknowledged"], "tag": "status:active"},
+        {"type": "field", "field": "component", "tag": "component:{value}"},
+    ],
+}
+
+
+def make_alert(title, component=None, status="closed", is_noisy=False):
+    analysis = {"metric": "Latency", "value": 1.0}
+    if component is not None:
+        analysis["component"] = component
+    return AlertItem(id=title, title=title, status=status, created_date=datetime(2024, 1, 1),
+                     alert_node_analysis=analysis, graph_analysis={}, is_noisy=is_noisy)
+
+
+def test_rules_match_keywords_regexes_and_fields():
+    rules = TagRuleSet.from_dict(RULES)
+    assert rules.evaluate({"title": "Network latency high"}) == {"type:net", "type:network"}
+    assert rules.evaluate({"title": "net errors"}) == {"type:net"}
+    assert rules.evaluate({"title": "Request Timed Out"}) == {"type:timeout"}
+    assert rules.evaluate({"title": "Disk full", "is_noisy": True, "status": "acknowledged",
+                           "component": "db-1"}) == {"status:noisy", "status:active", "component:db-1"}
+    assert rules.evaluate({"title": "Disk full", "is_noisy": False, "status": "closed"}) == {"general"}
+
+
+def test_no_default_tag():
+    rules = TagRuleSet.from_dict({**RULES, "default_tag": None})
+    assert rules.evaluate({"title": "Disk full"}) == frozenset()
+
+
+@pytest.mark.parametrize("rule", [
+    {"type": "glob", "tag": "x"},
+    {"type": "keyword", "field": "owner", "keywords": ["x"], "tag": "x"},
+    {"type": "keyword", "keywords": [], "tag": "x"},
+    {"type": "regex", "pattern": "(", "tag": "x"},
+    {"type": "field", "field": "status"},
+])
+def test_invalid_rules_raise_value_error(rule):
+    with pytest.raises(ValueError):
+        TagRuleSet.from_dict({"rules": [rule]})
+
+
+def test_tags_for_caches_on_the_alert():
+    rules = TagRuleSet.from_dict(RULES)
+    alert = make_alert("Network down", component="edge-1")
+    assert rules.tags_for(alert) == {"type:net", "type:network", "component:edge-1"}
+    alert.is_noisy = True
+    assert "status:noisy" not in rules.tags_for(alert)
+    alert.tags = None
+    assert "status:noisy" in rules.tags_for(alert)
+
+
+def test_tag_batch_agrees_with_evaluate():
+    rules = default_tag_rules()
+    batch = SyntheticAlertGenerator(3000, seed=11).batch(0)
+    batch.is_noisy[::4] = True
+    combo_of_alert, tags_of_combo = rules.tag_batch(batch)
+    assert len(combo_of_alert) == len(batch)
+    for i in range(0, len(batch), 7):
+        alert = batch.item(i)
+        expected = rules.evaluate({name: FIELD_GETTERS[name](alert) for name in rules.fields})
+        assert tags_of_combo[combo_of_alert[i]] == expected
+
+
+def test_tag_batch_handles_missing_fields():
+    rules = TagRuleSet.from_dict(RULES)
+    alerts = [make_alert("Timeout", component="api"), make_alert("Timeout"), make_alert("Disk full", status="open")]
+    combo_of_alert, tags_of_combo = rules.tag_batch(AlertBatch.from_items(alerts))
+    assert [tags_of_combo[c] for c in combo_of_alert] == [
+        {"type:timeout", "component:api"}, {"type:timeout"}, {"status:active"}]
@@ -0,0 +1,22 @@
+import pytest
+
+from backend.tenancy import DEFAULT_THREAD_ID, InvalidTenantKey, ThreadLocks, thread_id_for_request
+
+
+def test_thread_id_comes_from_the_header_then_query_parameters():
+    assert thread_id_for_request({}, {}) == DEFAULT_THREAD_ID
+    assert thread_id_for_request({"X-Tenant-ID": "team-a"}, {"tenant": "team-b"}) == "tenant:team-a"
+    assert thread_id_for_request({}, {"team": "team-b", "session": "s1"}) == "tenant:team-b"
+    assert thread_id_for_request({}, {"session": "s1"}) == "tenant:s1"
+
+
+@pytest.mark.parametrize("key", ["has space", "a/b", "x" * 129, "tab\t"])
+def test_invalid_tenant_keys_raise(key):
+    with pytest.raises(InvalidTenantKey):
+        thread_id_for_request({"X-Tenant-ID": key}, {})
+
+
+def test_thread_locks_are_stable_per_thread_and_bounded():
+    locks = ThreadLocks(stripes=4)
+    assert locks("tenant:a") is locks("tenant:a")
+    assert len({id(locks(f"tenant:{i}")) for i in range(100)}) <= 4